@@ -7,38 +7,102 @@
 # https://www.youtube.com/watch?v=6EJrZeN0jNI
 # https://www.youtube.com/watch?v=Dx1ofZHGUtI
 
-import random
+import argparse
 import math
+import os
+import sys
 import time
 from multiprocessing import Pool
 import matplotlib.pyplot as plt
 import numpy as np
 import progressbar
-from statistics import mean
 
 from src.util import *
 from src.util.configs import OUT_WIDTH
-from src import Board, Player
+from src import Board, Player, simulate_lockstep
 
 
 sim_conf = SimulationConfig()
 if sim_conf.write_log:
-    log = Log()
+    log = Log(sim_conf.log_level)
 else:
     log = False
 
-# simulate one game
-def one_game(run_number):
-
-    game_rules = GameRulesConfig()
-
+# event stream of this process (sim_conf.event_log), opened by its first game
+events = None
+
+
+def event_log():
+    """EventLog of this process, None if games are not recorded"""
+    global events
+    if sim_conf.event_log is None:
+        return None
+    # a worker process does not write to the file of its parent
+    if events is None or events.pid != os.getpid():
+        os.makedirs(sim_conf.event_log, exist_ok=True)
+        path = os.path.join(sim_conf.event_log, f"events-{os.getpid()}.bin")
+        events = EventLog(path, sim_conf.compress_events)
+    return events
+
+
+def clear_event_log():
+    """start a new run: events of earlier runs would mix with its own"""
+    global events
+    if events is not None:
+        events.close()
+        events = None
+    if sim_conf.event_log is not None and os.path.isdir(sim_conf.event_log):
+        for path in event_files(sim_conf.event_log):
+            os.remove(path)
+
+
+def trim_event_log(completed):
+    """resume a run: keep only the games of its completed blocks, the others
+    (of blocks cut off by the interruption) are simulated and written again"""
+    global events
+    if events is not None:
+        events.close()
+        events = None
+    if sim_conf.event_log is not None and os.path.isdir(sim_conf.event_log):
+        keep_games(sim_conf.event_log, completed)
+
+
+# behaviours of the players, by seat
+def player_behaviours():
     normal_player_behaviours = PlayerBehaviourConfig(0)
     rulebased_player_behaviours = RuleBasedPlayerBehaviourConfig(0)
     random_player_behaviours = RandomPlayerBehaviourConfig(0)
     mcts_player_behaviours = MCTSPlayerBehaviourConfig(0)
     expectiminimax_player_behaviors = ExpectMiniMaxConfig(0)
     # Create 4 players with set behaviors
-    player_behaviors = [expectiminimax_player_behaviors, random_player_behaviours, random_player_behaviours, random_player_behaviours]
+    return [expectiminimax_player_behaviors, random_player_behaviours, random_player_behaviours, random_player_behaviours]
+
+def landing_heatmap():
+    """empty LandingHeatmap for the games to be counted in, None if not counted"""
+    if sim_conf.write_mode != WriteMode.CELL_HEATMAP:
+        return None
+    if sim_conf.engine != "objects":
+        raise ValueError("the landing heatmap needs the objects engine")
+    return LandingHeatmap(
+        sim_conf.n_players, sim_conf.n_moves, sim_conf.heatmap_per_player, sim_conf.heatmap_turn_bucket
+    )
+
+
+# simulate one game
+# net_worth: int32 array (n_moves + 1, n_players) to record the net worth of
+# the players in, at the start and after every turn (the last values repeat
+# after the end of the game)
+# landings: LandingCounter to count the cells the players land on in
+def one_game(run_number, campaign_seed=None, net_worth=None, landings=None):
+
+    game_rules = GameRulesConfig()
+
+    # every random draw of the game comes from its own stream
+    if campaign_seed is None:
+        campaign_seed = sim_conf.seed
+    rng = game_rng(campaign_seed, run_number)
+
+    player_behaviors = player_behaviours()
 
 
     # create players
@@ -47,7 +111,7 @@ def one_game(run_number):
     names = [player_names(i + 1) for i in range(sim_conf.n_players)]
     
     if sim_conf.shuffle_players:
-        random.shuffle(names)
+        rng.shuffle(names)
     
     for i in range(sim_conf.n_players):
         
@@ -59,23 +123,27 @@ def one_game(run_number):
         players.append(Player(names[i], starting_money, player_behaviors[i], sim_conf, sim_conf.write_log, log))
             
     # create board
-    game_board = Board(players, game_rules, sim_conf.write_log, log)
+    game_board = Board(players, game_rules, sim_conf.write_log, log, rng)
+    game_events = event_log()
+    if game_events:
+        game_events.start_game(run_number)
+        game_board.events = game_events
+    game_board.landings = landings
 
     #  net_worth history first point
-    if sim_conf.write_mode == WriteMode.NET_WORTH:
-        net_worth_string = ""
-        for player in players:
-            net_worth_string += str(player.net_worth(game_board))
-            if player != players[-1]:
-                net_worth_string += "\t"
-        if sim_conf.write_log:
-            log.write(net_worth_string, data=True)
+    if net_worth is not None:
+        net_worth[0] = [player.net_worth(game_board) for player in players]
+    net_worth_rows = 1
 
     last_turn = None
     # game
     for i in range(sim_conf.n_moves):
         
         last_turn = i - 1
+        if game_events:
+            game_events.turn = i + 1
+        if landings:
+            landings.set_turn(i + 1)
 
         if is_game_over(players):
             if sim_conf.write_log:
@@ -84,11 +152,10 @@ def one_game(run_number):
             break
         
         if sim_conf.write_log:
-            log.write("TURN "+str(i+1), 1)
-        for player in players:
-            if player.money > 0:
-                if sim_conf.write_log:
-                    log.write(f"{f'{player.name}: ':8} ${player.money} | position:"+str(player.position), 2)
+            log.write("TURN %d", 1, i + 1)
+            for player in players:
+                if player.money > 0:
+                    log.write("%-8s $%d | position:%d", 2, player.name + ": ", player.money, player.position)
 
         for player in players:
             if not is_game_over(players):  # Only continue if 2 or more players
@@ -97,19 +164,23 @@ def one_game(run_number):
                     pass
 
         # track net_worth history of the game
-        if sim_conf.write_mode == WriteMode.NET_WORTH:
-            net_worth_string = "\n"
-            for player in players:
-                net_worth_string += str(player.net_worth(game_board))
-                if player != players[-1]:
-                    net_worth_string += "\t"
-            if sim_conf.write_log:
-                log.write(net_worth_string, data=True)
+        if net_worth is not None:
+            net_worth[i + 1] = [player.net_worth(game_board) for player in players]
+            net_worth_rows = i + 2
 
     # tests
     # for player in players:
     # player.three_way_trade(gameBoard)
 
+    if game_events:
+        game_events.end_game()
+    # whole games in log.txt (worker processes never close the log)
+    if sim_conf.write_log:
+        log.flush()
+
+    if net_worth is not None:
+        net_worth[net_worth_rows:] = net_worth[net_worth_rows - 1]
+
     # return final scores
     results = [players[i].get_money() for i in range(sim_conf.n_players)]
 
@@ -125,108 +196,313 @@ def one_game(run_number):
         return results, last_turn
 
 
-def run_simulation(parallel=False):
-    """run multiple game simulations"""
-    results = []
-    if sim_conf.write_log:
-        local_log = Log()
+# data line of a game result (see WriteMode)
+def write_data(ending_net_worth):
+    if sim_conf.write_log and sim_conf.write_mode == WriteMode.REMAINING_PLAYERS:
+        rem_players = sum([1 for r in ending_net_worth if r > 0])
+        log.write(str(rem_players), data=True)
+        # (worker processes never close the log)
+        log.flush()
+
+
+# simulate a block of games inside a worker
+def one_block(block):
+    """simulate games start..stop-1 and return their aggregate
+    (and the game results themselves, if sim_conf.keep_results)
+
+    history: see net_worth_history, None if not recorded"""
+    campaign_seed, start, stop, history = block
+    aggregate = SimulationAggregate(sim_conf.n_players, sim_conf.n_moves)
+    aggregate.heatmap = landing_heatmap()
+    results = [] if sim_conf.keep_results else None
+    # rows of these games in the net worth history file
+    net_worth = None
+    if history is not None:
+        path, first_game = history
+        net_worth = np.load(path, mmap_mode="r+")[start - first_game:stop - first_game]
+    if sim_conf.engine == "lockstep":
+        # the whole block at once, from one random stream
+        seed = None if campaign_seed is None else derive_seed(campaign_seed, start, stop)
+        money, last_turns = simulate_lockstep(
+            stop - start, player_behaviours(), GameRulesConfig(), sim_conf.n_moves, seed
+        )
+        for ending_net_worth, last_turn in zip(money.tolist(), last_turns.tolist()):
+            aggregate.add_game(ending_net_worth, last_turn)
+            write_data(ending_net_worth)
+            if sim_conf.keep_results:
+                results.append((ending_net_worth, last_turn))
+        return (start, stop), aggregate, results
+    for run_number in range(start, stop):
+        landings = aggregate.heatmap.new_game() if aggregate.heatmap else None
+        game_result = one_game(
+            run_number, campaign_seed, None if net_worth is None else net_worth[run_number - start], landings
+        )
+        ending_net_worth, last_turn = game_result[:2]
+        aggregate.add_game(ending_net_worth, last_turn, landings)
+        write_data(ending_net_worth)
+        if sim_conf.keep_results:
+            results.append(game_result)
+    if net_worth is not None:
+        net_worth.flush()
+    return (start, stop), aggregate, results
+
+
+def net_worth_history(games, resume):
+    """the .npy file (sim_conf.net_worth_file) games record their net worth in,
+    as (path, number of its first game), None if not recorded
+
+    One int32 row (n_moves + 1, n_players) per game, see one_game. Worker
+    processes write their games straight into it (memory mapped).
+    """
+    path = sim_conf.net_worth_file
+    if path is None or sim_conf.write_mode != WriteMode.NET_WORTH:
+        return None
+    if sim_conf.engine != "objects":
+        raise ValueError("net worth history needs the objects engine")
+    shape = (games[1] - games[0], sim_conf.n_moves + 1, sim_conf.n_players)
+    if resume and os.path.exists(path):
+        if np.load(path, mmap_mode="r").shape != shape:
+            raise ValueError(f"{path} is the net worth history of a different run")
     else:
-        local_log = False
-
-    with Pool(processes=sim_conf.num_threads) as pool:
-
-        if sim_conf.show_progress_bar:
-            widgets = [progressbar.Percentage(), progressbar.Bar(), progressbar.ETA()]
-            pbar = progressbar.ProgressBar(widgets=widgets, term_width=OUT_WIDTH, maxval=sim_conf.n_simulations)
-            pbar.start()
-
-        results = []
-        game_lengths = []
-        i = 0
-        tracking_winners = [0]*sim_conf.n_players
-        
-        if parallel:
-            for game_result in pbwrapper(pool.imap(one_game, range(sim_conf.n_simulations)), sim_conf.n_simulations):
-                if sim_conf.show_progress_bar:
-                    pbar.update(i + 1)
-                    i += 1
-                results.append(game_result)
-
-                # determine winner, and calculate average game length
-                ending_net_worth, last_turn = game_result
-                if (last_turn != sim_conf.n_simulations - 2):
-                    game_lengths.append(last_turn)
-                
-                winner_result_map = list(enumerate(ending_net_worth))
-                winner_result_map = sorted(list(winner_result_map), reverse=True, key=lambda x: x[1])
-
-                if (winner_result_map[1][1] < 0):
-                    tracking_winners[winner_result_map[0][0]] += 1
-            
-                # write remaining players in a data log
-                if sim_conf.write_mode == WriteMode.REMAINING_PLAYERS:
-                    rem_players = sum([1 for r in result[-1] if r > 0])
-                    if sim_conf.write_log:
-                        local_log.write(str(rem_players), data=True)
+        np.lib.format.open_memmap(path, mode="w+", dtype=np.int32, shape=shape).flush()
+    return path, games[0]
+
+
+def make_blocks(ranges, chunk_size):
+    """split (start, stop) ranges of game numbers into (start, stop) blocks"""
+    if chunk_size is None:
+        n_games = sum(stop - start for start, stop in ranges)
+        if sim_conf.engine == "lockstep":
+            # one block per thread: the more games the lockstep engine plays
+            # at once, the less each of them costs
+            chunk_size = max(sim_conf.lockstep_block, math.ceil(n_games / sim_conf.num_threads))
         else:
-            for i in pbwrapper(range(sim_conf.n_simulations), sim_conf.n_simulations):
-                    
-                # remaining players - add to the results list
-                game_result = one_game(i)
-                results.append(game_result)
-
-                # determine winner
-                ending_net_worth, last_turn = game_result
-                if (last_turn != sim_conf.n_simulations - 2):
-                    game_lengths.append(last_turn)
-                
-                winner_result_map = list(enumerate(ending_net_worth))
-                winner_result_map = sorted(list(winner_result_map), reverse=True, key=lambda x: x[1])
-
-                if (winner_result_map[1][1] < 0):
-                    tracking_winners[winner_result_map[0][0]] += 1
-            
-                # write remaining players in a data log
-                if sim_conf.write_mode == WriteMode.REMAINING_PLAYERS:
-                    rem_players = sum([1 for r in result[-1] if r > 0])
-                    if sim_conf.write_log:
-                            local_log.write(str(rem_players), data=True)
-
-        if sim_conf.show_progress_bar:
-            pbar.finish()
-        
-        print(f"Winners distribution (A, B, C, D ...) across {len(game_lengths)} games that finished:")
-        print(tracking_winners)
-
-        print(f"Average game length: {mean(game_lengths)} (excluding games that did not finish).")
-
-    return results
+            # a few blocks per thread, so that slow blocks do not leave threads idle
+            chunk_size = max(1, math.ceil(n_games / (sim_conf.num_threads * 4)))
+    return [
+        (start, min(start + chunk_size, last))
+        for first, last in ranges
+        for start in range(first, last, chunk_size)
+    ]
+
+
+def adaptive_half_width(aggregate):
+    """half-width of the confidence interval adaptive stopping looks at"""
+    if sim_conf.adaptive_metric == "experiment":
+        intervals = [aggregate.experiment_interval(sim_conf.experiment_seat)]
+    else:
+        intervals = [aggregate.win_rate_interval(seat) for seat in range(sim_conf.n_players)]
+    return max((high - low) / 2 for low, high in intervals)
+
+
+def target_reached(aggregate):
+    """adaptive stopping: are the win rate estimates tight enough"""
+    if sim_conf.target_half_width is None or aggregate.n_games < sim_conf.min_simulations:
+        return False
+    return adaptive_half_width(aggregate) <= sim_conf.target_half_width
+
+
+def run_simulation(parallel=False, games=None, checkpoint=None, resume=False):
+    """run multiple game simulations
+
+    games: (start, stop) range of game numbers to simulate,
+    all n_simulations games by default
+    checkpoint: file to save progress to, every sim_conf.checkpoint_interval seconds
+    resume: continue from the checkpoint file, skipping the games it already has
+
+    With sim_conf.target_half_width, stops as soon as the win rate confidence
+    interval is that tight (checked between blocks), see target_reached.
+
+    Returns a SimulationAggregate of all games. With sim_conf.keep_results
+    returns (aggregate, results) with every game result, in game order.
+    """
+    if games is None:
+        games = (0, sim_conf.n_simulations)
+
+    aggregate = SimulationAggregate(sim_conf.n_players, sim_conf.n_moves)
+    aggregate.heatmap = landing_heatmap()
+    completed = []  # [start, stop) ranges of games already in the aggregate
+    block_results = []
+
+    # games are seeded by (campaign seed, game number), so the split into blocks
+    # and the order they are simulated in do not change the results
+    campaign_seed = sim_conf.seed if sim_conf.seed is not None else new_campaign_seed()
+
+    if resume and checkpoint is not None and os.path.exists(checkpoint):
+        if sim_conf.keep_results:
+            raise ValueError("keep_results can not be used with resume: earlier games are not kept")
+        state = read_checkpoint(checkpoint)
+        if (state["campaign_seed"], state["n_simulations"], tuple(state["games"])) != (
+            campaign_seed, sim_conf.n_simulations, tuple(games)
+        ):
+            raise ValueError(f"{checkpoint} is a checkpoint of a different run")
+        aggregate = state["aggregate"]
+        completed = state["completed"]
+        print(f"Resuming from {checkpoint}: {aggregate.n_games} games already done")
+
+    if resume:
+        trim_event_log(completed)
+    else:
+        clear_event_log()
+
+    if sim_conf.show_progress_bar:
+        widgets = [progressbar.Percentage(), progressbar.Bar(), progressbar.ETA()]
+        pbar = progressbar.ProgressBar(widgets=widgets, term_width=OUT_WIDTH, maxval=games[1] - games[0])
+        pbar.start()
+
+    history = net_worth_history(games, resume)
+    blocks = [
+        (campaign_seed, start, stop, history)
+        for start, stop in make_blocks(missing_ranges(games, completed), sim_conf.chunk_size)
+    ]
+    last_checkpoint = time.time()
+    pool = Pool(processes=sim_conf.num_threads) if parallel else None
+    try:
+        # workers simulate whole blocks and send back only their aggregates
+        if not parallel:
+            block_iter = map(one_block, blocks)
+        elif sim_conf.target_half_width is not None:
+            # in order, so that where the run stops does not depend on timing
+            block_iter = pool.imap(one_block, blocks)
+        else:
+            block_iter = pool.imap_unordered(one_block, blocks)
+        for (start, stop), block_aggregate, results in block_iter:
+            aggregate.merge(block_aggregate)
+            completed = add_range(completed, start, stop)
+            if sim_conf.keep_results:
+                block_results.append((start, results))
+            if sim_conf.show_progress_bar:
+                pbar.update(aggregate.n_games)
+            if checkpoint is not None and time.time() - last_checkpoint >= sim_conf.checkpoint_interval:
+                write_checkpoint(checkpoint, aggregate, campaign_seed, sim_conf.n_simulations, games, completed)
+                last_checkpoint = time.time()
+            if target_reached(aggregate):
+                break
+    finally:
+        if parallel:
+            pool.terminate()
+        # also on errors and Ctrl+C: everything merged so far is consistent
+        if checkpoint is not None:
+            write_checkpoint(checkpoint, aggregate, campaign_seed, sim_conf.n_simulations, games, completed)
+
+    if sim_conf.show_progress_bar:
+        pbar.finish()
+
+    if sim_conf.target_half_width is not None:
+        print(f"Adaptive stopping: {aggregate.n_games} games ({sum(aggregate.winners)} with a winner), "
+              f"confidence interval half-width {adaptive_half_width(aggregate):.2%} "
+              f"(target {sim_conf.target_half_width:.2%})")
+
+    aggregate.report()
+
+    if sim_conf.keep_results:
+        block_results.sort(key=lambda x: x[0])
+        return aggregate, [result for _, results in block_results for result in results]
+    return aggregate
+
+
+def shard_games(shard, n_simulations):
+    """game numbers (start, stop) of shard (k, N): the k-th of N equal slices"""
+    k, n_shards = shard
+    return (n_simulations * (k - 1) // n_shards, n_simulations * k // n_shards)
+
+
+def parse_shard(text):
+    try:
+        k, n_shards = (int(x) for x in text.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected k/N, got {text!r}")
+    if not 1 <= k <= n_shards:
+        raise argparse.ArgumentTypeError(f"shard {text} does not satisfy 1 <= k <= N")
+    return k, n_shards
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Monopoly simulator")
+    parser.add_argument("--seed", type=int, help="campaign seed (instead of SimulationConfig.seed)")
+    parser.add_argument("--parallel", action="store_true", help="simulate in num_threads processes")
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        metavar="k/N",
+        help="simulate only the k-th of N slices of the games and save a partial results file",
+    )
+    parser.add_argument("--output", help="partial results file of --shard (default: shard-k-of-N.json)")
+    parser.add_argument(
+        "--checkpoint",
+        default=sim_conf.checkpoint_file,
+        help="file to save progress to (default: SimulationConfig.checkpoint_file)",
+    )
+    parser.add_argument("--resume", action="store_true", help="continue the run saved in the checkpoint file")
+
+    subparsers = parser.add_subparsers(dest="command")
+    merge_parser = subparsers.add_parser("merge", help="merge partial results files of --shard runs")
+    merge_parser.add_argument("partials", nargs="+", help="partial results files")
+
+    args = parser.parse_args()
+    if args.resume and args.checkpoint is None:
+        parser.error("--resume needs a --checkpoint file")
+    if args.shard is not None and args.seed is None and sim_conf.seed is None:
+        parser.error("--shard needs a campaign seed shared by all shards (--seed)")
+    if args.shard is not None and sim_conf.target_half_width is not None:
+        # a shard stopping early would leave games of the campaign out of the merge
+        parser.error("--shard simulates all the games of its slice: set target_half_width = None")
+    return args
+
+
+def merge(paths):
+    """merge partial results files and print the results of the whole campaign"""
+    partials = [read_partial(path) for path in paths]
+    aggregate, missing = merge_partials(partials)
+
+    print("Players:", aggregate.n_players, " Turns:", aggregate.n_moves,
+          " Games:", partials[0]["n_simulations"], " Seed:", partials[0]["campaign_seed"])
+    print(f"Merged {len(partials)} partial results files ({aggregate.n_games} games)")
+    for start, stop in missing:
+        print(f"Warning: games {start}..{stop - 1} are missing")
+
+    aggregate.report()
+    return aggregate
 
 
 if __name__ == "__main__":
 
+    args = parse_args()
+    if args.command == "merge":
+        merge(args.partials)
+        sys.exit()
+
     print("="*OUT_WIDTH)
     t = time.time()
 
-    if sim_conf.seed != None:
-        random.seed(sim_conf.seed)
-    else:
-        random.seed()
+    if args.seed is not None:
+        sim_conf.seed = args.seed
+    # continue with the seed of the interrupted run
+    if args.resume and sim_conf.seed is None and os.path.exists(args.checkpoint):
+        sim_conf.seed = read_checkpoint(args.checkpoint)["campaign_seed"]
+    # a fresh campaign seed is printed, so that the run can be reproduced
+    if sim_conf.seed is None:
+        sim_conf.seed = new_campaign_seed()
 
     print("Players:", sim_conf.n_players, " Turns:", sim_conf.n_moves,
           " Games:", sim_conf.n_simulations, " Seed:", sim_conf.seed)
 
-    results_and_metrics = run_simulation(parallel=False)
-    results = []
-    metric_str = ""
-    for result, game_length in results_and_metrics:
-        results.append(result)
-        # metric_str += '\t'.join(metrics) + "\n"
+    if args.shard is not None:
+        games = shard_games(args.shard, sim_conf.n_simulations)
+        print(f"Shard {args.shard[0]}/{args.shard[1]}: games {games[0]}..{games[1] - 1}")
+    else:
+        games = None
+
+    aggregate = run_simulation(
+        parallel=args.parallel, games=games, checkpoint=args.checkpoint, resume=args.resume
+    )
 
-    #with open('data.txt', 'w') as f:
-    #    f.write(metric_str)
+    if args.shard is not None:
+        output = args.output or "shard-{}-of-{}.json".format(*args.shard)
+        write_partial(output, aggregate, sim_conf.seed, sim_conf.n_simulations, games, args.shard)
+        print("Partial results saved to", output)
 
-    # analyze_results(results, sim_conf)
+    # analyze_results(aggregate, sim_conf)
     # analyze_data()
 
-    print("Done in {:.2f}s".format(time.time()-t))
\ No newline at end of file
+    print("Done in {:.2f}s".format(time.time()-t))
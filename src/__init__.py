@@ -1,3 +1,5 @@
 from .board import *
 from .cells import *
 from .player import *
+from .lockstep import *
+from .markov import *
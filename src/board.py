@@ -1,400 +1,166 @@
+from array import array
+from collections import deque
+from .cards import CHANCE_CARDS, COMMUNITY_CARDS
 from .cells import Property, Cell, Community, PropertyTax, Chance, GoToJail, LuxuryTax
+from .markov import landing_model
+from .zobrist import OWNER, HOUSES, MORTGAGED
+from .layout import (
+    N_CELLS, KIND, NAME, GROUP, GROUP_ID, GROUP_NAMES, GROUP_BY_NAME, GROUP_CELLS,
+    RAIL, UTIL, RENT_TABLE, COST_BASE, COST_HOUSE, PROPERTY_CELLS,
+)
 from .util.configs import BANK_NAME
-import random
+from .util.events import BUILD
+from .util.log import NULL_LOG
+from .util.seeding import GameRandom
+
+# classes of the cells that are not properties, by kind (see layout.py)
+CELL_CLASSES = {
+    "cell": Cell,
+    "community": Community,
+    "chance": Chance,
+    "property_tax": PropertyTax,
+    "luxury_tax": LuxuryTax,
+    "go_to_jail": GoToJail,
+}
+
+# turns of expected rent a plot is worth in calcPlayerUtilities
+UTILITY_HORIZON = 30
 
 
 class Board:
-    def __init__(self, players, game_conf, write_log, log):
+    def __init__(self, players, game_conf, write_log, log, rng=None):
         """
         Board is a data for plots
 
-        name: does not really matter, just convenience
-        base_cost: used when buying plot, mortgage
-        base_rent: used for rent and monopoly rent
-         (for utilities and rail - in calculateRent method)
-        house_cost: price of one house (or a hotel)
-        house_rent: list of rent price with 1,2,3,4 houses and a hotel
-        group: used to determine monopoly
+        What is on each cell (names, prices, rents, groups) is static,
+        see layout.py. The state of the plots is kept in arrays indexed by cell:
+        owner_id: index of the owner in players, -1 if nobody owns it
+        houses: number of houses (5 is a hotel)
+        mortgaged, monopoly: flags
+        Property cells in b are views of these arrays.
+        Owners, houses and mortgages only change through setOwner, setHouses
+        and setMortgaged, which keep owned_in_group (plots of each group per
+        player), rails_owned (rails that are not mortgaged per player), the
+        players' ledgers and the Zobrist key, and note the groups and players that
+        recalculateAfterPropertyChange has to update.
+
+        rng: random stream of this game (dice, card decks, random decisions)
         """
 
         # I know it is messy, but I need this for players to pay each other
         self.players = players
-        self.log = log
+        # owner ids are indices in players
+        for i in range(len(players)):
+            players[i].index = i
+        # game log, NULL_LOG if not written
+        self.log = log if write_log else NULL_LOG
+        # " (name)" of each owner id in log lines, "" for -1 (nobody)
+        self.owner_names = tuple(" (" + player.name + ")" for player in players) + ("",)
         self.game_conf = game_conf
-
-        self.write_log = write_log
+        self.rng = rng if rng is not None else GameRandom()
+
+        # expected rent per opponent turn, by cell and rent level (markov.py)
+        self.expected_rent = landing_model(game_conf).rent
+        # binary event stream (util/events.py EventLog), None: not recorded
+        self.events = None
+        # cells the players land on (util/heatmap.py LandingCounter), None: not counted
+        self.landings = None
+
+        # state of the plots
+        self.owner_id = array("b", [-1] * N_CELLS)
+        self.houses = array("b", [0] * N_CELLS)
+        self.mortgaged = array("b", [0] * N_CELLS)
+        self.monopoly = array("b", [0] * N_CELLS)
+        self.owned_in_group = [array("b", [0] * len(GROUP_NAMES)) for player in players]
+        self.rails_owned = array("b", [0] * len(players))
+        # Zobrist key of the plots (zobrist.py), 0 for an empty board
+        self.zobrist = 0
+        # changed since the last recalculateAfterPropertyChange
+        self.changed_groups = set()
+        self.changed_players = set()
 
         self.b = []
-        # 0-4
-        self.b.append(Cell("Go", write_log, log))
-        self.b.append(
-            Property(
-                "A1 Mediterraneal Avenue",
-                60,
-                2,
-                50,
-                (10, 30, 90, 160, 250),
-                "brown",
-                write_log,
-                log,
-            )
-        )
-        self.b.append(Community("Community Chest", write_log, log))
-        self.b.append(
-            Property(
-                "A2 Baltic Avenue", 60, 4, 50, (20, 60, 180, 320, 450), "brown", write_log, log
-            )
-        )
-        self.b.append(PropertyTax("Property Tax", write_log, log))
-        # 5-9
-        self.b.append(
-            Property("R1 Reading railroad", 200, 0, 0, (0, 0, 0, 0, 0), "rail", write_log, log)
-        )
-        self.b.append(
-            Property(
-                "B1 Oriental Avenue",
-                100,
-                6,
-                50,
-                (30, 90, 270, 400, 550),
-                "lightblue",
-                write_log,
-                log,
-            )
-        )
-        self.b.append(Chance("Chance", write_log, log))
-        self.b.append(
-            Property(
-                "B2 Vermont Avenue",
-                100,
-                6,
-                50,
-                (30, 90, 270, 400, 550),
-                "lightblue",
-                write_log,
-                log,
-            )
-        )
-        self.b.append(
-            Property(
-                "B3 Connecticut Avenue",
-                120,
-                8,
-                50,
-                (40, 100, 300, 450, 600),
-                "lightblue",
-                write_log,
-                log,
-            )
-        )
-        # 10-14
-        self.b.append(Cell("Prison", write_log, log))
-        self.b.append(
-            Property(
-                "C1 St.Charle's Place",
-                140,
-                10,
-                100,
-                (50, 150, 450, 625, 750),
-                "pink",
-                write_log,
-                log,
-            )
-        )
-        self.b.append(
-            Property("U1 Electric Company", 150, 0, 0, (0, 0, 0, 0, 0), "util", write_log, log)
-        )
-        self.b.append(
-            Property(
-                "C2 States Avenue", 140, 10, 100, (50, 150, 450, 625, 750), "pink", write_log, log
-            )
-        )
-        self.b.append(
-            Property(
-                "C3 Virginia Avenue",
-                160,
-                12,
-                100,
-                (60, 180, 500, 700, 900),
-                "pink",
-                write_log,
-                log,
-            )
-        )
-        # 15-19
-        self.b.append(
-            Property(
-                "R2 Pennsylvania Railroad", 200, 0, 0, (0, 0, 0, 0, 0), "rail", write_log, log
-            )
-        )
-        self.b.append(
-            Property(
-                "D1 St.James Place",
-                180,
-                14,
-                100,
-                (70, 200, 550, 700, 950),
-                "orange",
-                write_log,
-                log,
-            )
-        )
-        self.b.append(Community("Community Chest", write_log,  log))
-        self.b.append(
-            Property(
-                "D2 Tennessee Avenue",
-                180,
-                14,
-                100,
-                (70, 200, 550, 700, 950),
-                "orange",
-                write_log,
-                log,
-            )
-        )
-        self.b.append(
-            Property(
-                "D3 New York Avenue",
-                200,
-                16,
-                100,
-                (80, 220, 600, 800, 1000),
-                "orange",
-                write_log,
-                log,
-            )
-        )
-        # 20-24
-        self.b.append(Cell("Free Parking", write_log, log))
-        self.b.append(
-            Property(
-                "E1 Kentucky Avenue",
-                220,
-                18,
-                150,
-                (90, 250, 700, 875, 1050),
-                "red",
-                write_log,
-                log,
-            )
-        )
-        self.b.append(Chance("Chance", write_log, log))
-        self.b.append(
-            Property(
-                "E2 Indiana Avenue", 220, 18, 150, (90, 250, 700, 875, 1050), "red", write_log, log
-            )
-        )
-        self.b.append(
-            Property(
-                "E3 Illinois Avenue",
-                240,
-                20,
-                150,
-                (100, 300, 750, 925, 1100),
-                "red",
-                write_log,
-                log,
-            )
-        )
-        # 25-29
-        self.b.append(
-            Property("R3 BnO Railroad", 200, 0, 0, (0, 0, 0, 0, 0), "rail", write_log, log)
-        )
-        self.b.append(
-            Property(
-                "F1 Atlantic Avenue",
-                260,
-                22,
-                150,
-                (110, 330, 800, 975, 1150),
-                "yellow",
-                write_log,
-                log,
-            )
-        )
-        self.b.append(
-            Property(
-                "F2 Ventinor Avenue",
-                260,
-                22,
-                150,
-                (110, 330, 800, 975, 1150),
-                "yellow",
-                write_log,
-                log,
-            )
-        )
-        self.b.append(
-            Property("U2 Waterworks", 150, 0, 0, (0, 0, 0, 0, 0), "util", write_log, log)
-        )
-        self.b.append(
-            Property(
-                "F3 Martin Gardens",
-                280,
-                24,
-                150,
-                (120, 360, 850, 1025, 1200),
-                "yellow",
-                write_log,
-                log,
-            )
-        )
-        # 30-34
-        self.b.append(GoToJail("Go To Jail", write_log, log))
-        self.b.append(
-            Property(
-                "G1 Pacific Avenue",
-                300,
-                26,
-                200,
-                (130, 390, 900, 1100, 1275),
-                "green",
-                write_log,
-                log,
-            )
-        )
-        self.b.append(
-            Property(
-                "G2 North Carolina Avenue",
-                300,
-                26,
-                200,
-                (130, 390, 900, 1100, 1275),
-                "green",
-                write_log,
-                log,
-            )
-        )
-        self.b.append(Community("Community Chest", write_log, log))
-        self.b.append(
-            Property(
-                "G3 Pennsylvania Avenue",
-                320,
-                28,
-                200,
-                (150, 450, 100, 1200, 1400),
-                "green",
-                write_log,
-                log,
-            )
-        )
-        # 35-39
-        self.b.append(
-            Property("R4 Short Line", 200, 0, 0, (0, 0, 0, 0, 0), "rail", write_log, log)
-        )
-        self.b.append(Chance("Chance", write_log, log))
-        self.b.append(
-            Property(
-                "H1 Park Place",
-                350,
-                35,
-                200,
-                (175, 500, 1100, 1300, 1500),
-                "indigo",
-                write_log,
-                log,
-            )
-        )
-        self.b.append(LuxuryTax("Luxury Tax", write_log, log))
-        self.b.append(
-            Property(
-                "H2 Boardwalk",
-                400,
-                50,
-                200,
-                (200, 600, 1400, 1700, 2000),
-                "indigo",
-                write_log,
-                log,
-            )
-        )
+        for i in range(N_CELLS):
+            if KIND[i] == "property":
+                self.b.append(Property(self, i))
+            else:
+                self.b.append(CELL_CLASSES[KIND[i]](NAME[i]))
 
         # number of built houses and hotels (to limit when needed)
         self.nHouses = 0
         self.nHotels = 0
 
-        # Chance
-        self.chanceCards = [i for i in range(16)]
-        random.shuffle(self.chanceCards)
+        # Chance (drawn from the left, put back on the right)
+        chanceCards = [i for i in range(len(CHANCE_CARDS))]
+        self.rng.shuffle(chanceCards)
+        self.chanceCards = deque(chanceCards)
 
         # Community Chest
-        self.communityCards = [i for i in range(16)]
-        random.shuffle(self.communityCards)
+        communityCards = [i for i in range(len(COMMUNITY_CARDS))]
+        self.rng.shuffle(communityCards)
+        self.communityCards = deque(communityCards)
 
     # Does the board have at least one monopoly
     # Used for statistics
     def hasMonopoly(self):
-        for i in range(len(self.b)):
-            if self.b[i].isMonopoly:
-                return True
-        return False
+        return any(self.monopoly)
+
+    # Owner id of a player ("" for nobody)
+    def ownerId(self, player):
+        return -1 if player == "" else player.index
 
     # Count the number of rails of the same owner as "position"
     # Used in rent calculations
     def countRails(self, position):
-        if type(self.b[position]) != Property or self.b[position].group != "rail":
+        if GROUP_ID[position] != RAIL:
             return False
-        railcount = 0
-        thisOwner = self.b[position].owner
-        for plot in self.b:
-            if (
-                type(plot) == Property
-                and plot.group == "rail"
-                and plot.owner == thisOwner
-                and plot.owner != ""
-                and not plot.isMortgaged
-            ):
-                railcount += 1
-        return railcount
+        owner = self.owner_id[position]
+        return 0 if owner == -1 else self.rails_owned[owner]
 
     # What is the rent of plot "position"
-    # Takes into account utilities, rails, monopoly
+    # Takes into account utilities, rails, monopoly (see RENT_TABLE)
 
     def calculateRent(self, position, special=""):
-        if type(self.b[position]) == Property:
-            rent = 0
-
-            # utility
-            if self.b[position].group == "util":
-                if self.b[position].isMonopoly or special == "from_chance":
-                    rent = (random.randint(1, 6) + random.randint(1, 6)) * 10
-                else:
-                    rent = (random.randint(1, 6) + random.randint(1, 6)) * 4
-
-            # rail
-            elif self.b[position].group == "rail":
-                rails = self.countRails(position)
-                rent = 0 if rails == 0 else 25 * 2 ** (rails)
-                if special == "from_chance":
-                    rent *= 2
-
-            # usual property
-            else:
-                if self.b[position].hasHouses > 0:
-                    if self.b[position].hasHouses - 1 > 5:
-                        print(self.b[position].hasHouses - 1)
-                        print(position)
-                        self.printMap()
-                    rent = self.b[position].rent_house[self.b[position].hasHouses - 1]
-                elif self.b[position].isMonopoly:
-                    rent = 2 * self.b[position].rent_base
-                else:
-                    rent = self.b[position].rent_base
-        else:  # not a Property
-            rent = 0
+        group = GROUP_ID[position]
+        # utility: multiplier of the dice
+        if group == UTIL:
+            multiplier = RENT_TABLE[position][self.monopoly[position] or special == "from_chance"]
+            return (self.rng.randint(1, 6) + self.rng.randint(1, 6)) * multiplier
+        rent = RENT_TABLE[position][self.rentLevel(position)]
+        if group == RAIL and special == "from_chance":
+            rent *= 2
         return rent
 
+    # Level of the rent of plot "position" in RENT_TABLE
+    def rentLevel(self, position):
+        group = GROUP_ID[position]
+        if group == UTIL:
+            return self.monopoly[position]
+        if group == RAIL:
+            return self.countRails(position)
+        # usual property (or not a property: 0)
+        houses = self.houses[position]
+        return houses + 1 if houses > 0 else self.monopoly[position]
+
+    # Rent one opponent is expected to pay for plot "position" per turn,
+    # at its current level (0 if nobody owns it or it is mortgaged) or at level
+    def expectedRent(self, position, level=None):
+        if level is None:
+            if self.owner_id[position] == -1 or self.mortgaged[position]:
+                return 0.0
+            level = self.rentLevel(position)
+        return self.expected_rent[position][level]
+
     # What % of plots of this group does player have
     # Used in calculation of least valuable property
     def shareOfGroup(self, group, player):
-        total = 0
+        cells = GROUP_CELLS[GROUP_BY_NAME[group]]
+        player = self.ownerId(player)
         owned = 0
-        for plot in self.b:
-            if type(plot) == Property and plot.group == group:
-                total += 1
-                if plot.owner == player:
-                    owned += 1
-        return owned / total
+        for i in cells:
+            if self.owner_id[i] == player:
+                owned += 1
+        return owned / len(cells)
 
     # What is the least valuable property / building
     # Used to pick what to mortgage / sell buildings
@@ -402,16 +168,15 @@ class Board:
     def choosePropertyToMortgageDowngrade(self, player):
         # list all the items this player has:
         ownedStuff = []
-        for i in range(len(self.b)):
-            plot = self.b[i]
-            if type(plot) == Property and not plot.isMortgaged and plot.owner == player:
+        for i in sorted(player.plots):
+            if not self.mortgaged[i]:
                 ownedStuff.append(
                     (
                         i,
-                        plot.cost_base,
-                        self.b[i].isMonopoly,
-                        self.shareOfGroup(plot.group, player),
-                        plot.hasHouses,
+                        COST_BASE[i],
+                        self.monopoly[i],
+                        self.owned_in_group[player.index][GROUP_ID[i]] / len(GROUP_CELLS[GROUP_ID[i]]),
+                        self.houses[i],
                     )
                 )
         if len(ownedStuff) == 0:
@@ -427,34 +192,31 @@ class Board:
         # smaller level of improvement in the group (to prevent inequal improvement)
         minInGroup = {}
         # start with listing all their monopolies
-        for i in range(len(self.b)):
-            plot = self.b[i]
+        for i in PROPERTY_CELLS:
             if (
-                type(plot) == Property
-                and self.b[i].isMonopoly
-                and plot.owner == player
-                and plot.group != "rail"
-                and plot.group != "util"
-                and plot.hasHouses < 5
+                self.monopoly[i]
+                and self.owner_id[i] == player.index
+                and GROUP_ID[i] != RAIL
+                and GROUP_ID[i] != UTIL
+                and self.houses[i] < 5
             ):
+                houses = self.houses[i]
                 # limit max houses experiment
-                if not (player.name == "exp" and expHouseBuildLimit == plot.hasHouses):
+                if not (player.name == "exp" and expHouseBuildLimit == houses):
                     toBuildStuff.append(
                         (
                             i,
-                            plot.name,
-                            plot.group,
-                            plot.hasHouses,
-                            plot.cost_house,
-                            plot.cost_base,
+                            NAME[i],
+                            GROUP[i],
+                            houses,
+                            COST_HOUSE[i],
+                            COST_BASE[i],
                         )
                     )
-                    if plot.group in minInGroup:
-                        minInGroup[plot.group] = min(
-                            plot.hasHouses, minInGroup[plot.group]
-                        )
+                    if GROUP[i] in minInGroup:
+                        minInGroup[GROUP[i]] = min(houses, minInGroup[GROUP[i]])
                     else:
-                        minInGroup[plot.group] = plot.hasHouses
+                        minInGroup[GROUP[i]] = houses
         if len(toBuildStuff) == 0:
             return []
 
@@ -468,9 +230,14 @@ class Board:
 
         # sort by house price and base
         if player.behaviour.build_randomly:
-            random.shuffle(toBuildStuff)
+            self.rng.shuffle(toBuildStuff)
         elif player.behaviour.build_cheapest:
             toBuildStuff.sort(key=lambda x: (-x[4], -x[5]))
+        elif player.behaviour.build_by_rent:
+            # most expected rent added per dollar last (built first)
+            toBuildStuff.sort(
+                key=lambda x: (self.expected_rent[x[0]][x[3] + 2] - self.expected_rent[x[0]][x[3] + 1]) / x[4]
+            )
         else:
             toBuildStuff.sort(key=lambda x: (x[4], x[5]))
 
@@ -512,20 +279,22 @@ class Board:
             return False
 
         # Check if we reached the limit of available Houses/Hotels
-        thisIsHotel = True if self.b[propertyToImprove].hasHouses == 4 else False
+        thisIsHotel = True if self.houses[propertyToImprove] == 4 else False
         if thisIsHotel:
             if self.nHotels == board.game_conf.hotel_limit:
-                if self.write_log:
-                    self.log.write("reached hotel limit", 3)
+                self.log.write("reached hotel limit", 3)
                 return False
         else:
             if self.nHouses == board.game_conf.house_limit:
-                if self.write_log:
-                    self.log.write("reached house limit", 3)
+                self.log.write("reached house limit", 3)
                 return False
 
         # add a building
-        self.b[propertyToImprove].hasHouses += 1
+        self.setHouses(propertyToImprove, self.houses[propertyToImprove] + 1)
+        if self.events:
+            self.events.add(
+                BUILD, player.index, propertyToImprove, self.houses[propertyToImprove], COST_HOUSE[propertyToImprove]
+            )
         # add to the counter
         if thisIsHotel:
             self.nHotels += 1
@@ -533,82 +302,124 @@ class Board:
         else:
             self.nHouses += 1
 
-        if self.write_log:
-            self.log.write(
-                player.name
-                + " builds house N"
-                + str(self.b[propertyToImprove].hasHouses)
-                + " on "
-                + self.b[propertyToImprove].name,
-                3,
-            )
-        player.take_money(self.b[propertyToImprove].cost_house, self, BANK_NAME)
+        self.log.write(
+            "%s builds house N%s on %s", 3, player.name, self.houses[propertyToImprove], NAME[propertyToImprove],
+        )
+        player.take_money(COST_HOUSE[propertyToImprove], self, BANK_NAME)
         player.plots_to_build = self.listPropertyToBuild(player, board)
         return True
 
     # When player is bankrupt - return all their property to market
 
     def sellAll(self, player, other_player=None):
-        for plot in self.b:
-            if type(plot) == Property and plot.owner == player:
-                if other_player is None:
-                    plot.owner = ""
-                    plot.isMortgaged = False
-                else:
-                    plot.owner = other_player
+        for i in sorted(player.plots):
+            if other_player is None:
+                self.setOwner(i, -1)
+                self.setMortgaged(i, False)
+            else:
+                self.setOwner(i, other_player.index)
+
+    # Change the owner of plot "position" (owner id, -1 for nobody)
+    def setOwner(self, position, owner):
+        old = self.owner_id[position]
+        if old == owner:
+            return
+        group = GROUP_ID[position]
+        counts_as_rail = group == RAIL and not self.mortgaged[position]
+        self.book(position, -1)
+        if old != -1:
+            self.owned_in_group[old][group] -= 1
+            if counts_as_rail:
+                self.rails_owned[old] -= 1
+            self.players[old].plots.discard(position)
+            self.changed_players.add(old)
+        if owner != -1:
+            self.owned_in_group[owner][group] += 1
+            if counts_as_rail:
+                self.rails_owned[owner] += 1
+            self.players[owner].plots.add(position)
+            self.changed_players.add(owner)
+        self.owner_id[position] = owner
+        self.zobrist ^= OWNER[position][old + 1] ^ OWNER[position][owner + 1]
+        self.book(position, 1)
+        self.changed_groups.add(group)
+
+    # Mortgage (or unmortgage) plot "position"
+    def setMortgaged(self, position, mortgaged):
+        owner = self.owner_id[position]
+        if owner != -1 and GROUP_ID[position] == RAIL and bool(self.mortgaged[position]) != bool(mortgaged):
+            self.rails_owned[owner] += -1 if mortgaged else 1
+        self.book(position, -1)
+        if bool(self.mortgaged[position]) != bool(mortgaged):
+            self.zobrist ^= MORTGAGED[position]
+        self.mortgaged[position] = mortgaged
+        self.book(position, 1)
+        self.plotChanged(position)
+
+    # Set the number of houses on plot "position" (5 is a hotel)
+    def setHouses(self, position, houses):
+        self.book(position, -1)
+        self.zobrist ^= HOUSES[position][self.houses[position]] ^ HOUSES[position][houses]
+        self.houses[position] = houses
+        self.book(position, 1)
+        self.plotChanged(position)
+
+    # Take plot "position" out of its owner's ledger (sign -1), or put it back (1)
+    def book(self, position, sign):
+        owner = self.owner_id[position]
+        if owner == -1:
+            return
+        player = self.players[owner]
+        houses = self.houses[position]
+        if self.mortgaged[position]:
+            player.plots_worth += sign * (COST_BASE[position] // 2)
+        else:
+            player.plots_worth += sign * (COST_BASE[position] + COST_HOUSE[position] * houses)
+        if houses == 5:
+            player.hotels_built += sign
+        else:
+            player.houses_built += sign * houses
+
+    # Houses or mortgage of plot "position" changed: its owner's lists need an update
+    def plotChanged(self, position):
+        if self.owner_id[position] != -1:
+            self.changed_players.add(self.owner_id[position])
 
     # Get the list of plots player would want to get
     # that is he lacks one to for a monopoly
 
     def getListOfWantedPlots(self, player):
-        groups = {}
-        for plot in self.b:
-            if plot.group != "":
-                if plot.group in groups:
-                    groups[plot.group][0] += 1
-                else:
-                    groups[plot.group] = [1, 0]
-                if plot.owner == player:
-                    groups[plot.group][1] += 1
+        owned = self.owned_in_group[player.index]
         wanted = []
-        for group in groups:
-            if group != "util" and groups[group][0] - groups[group][1] == 1:
-                for i in range(len(self.b)):
-                    if (
-                        type(self.b[i]) == Property
-                        and self.b[i].group == group
-                        and self.b[i].owner != player
-                    ):
+        for group in range(len(GROUP_CELLS)):
+            if group != UTIL and len(GROUP_CELLS[group]) - owned[group] == 1:
+                for i in GROUP_CELLS[group]:
+                    if self.owner_id[i] != player.index:
                         wanted.append(i)
-        return sorted(wanted)
+        # in the order of the board
+        wanted.sort()
+        return wanted
 
     # Get the list of plots player would want to offer for trade
     # that one random plot in a group
     def getListOfOfferedPlots(self, player):
-        groups = {}
-        for plot in self.b:
-            if plot.group != "":
-                if plot.group not in groups:
-                    groups[plot.group] = 0
-                if plot.owner == player:
-                    groups[plot.group] += 1
+        owned = self.owned_in_group[player.index]
         offered = []
-        for group in groups:
-            if group != "util" and groups[group] == 1:
-                for i in range(len(self.b)):
-                    if (
-                        type(self.b[i]) == Property
-                        and self.b[i].group == group
-                        and self.b[i].owner == player
-                        and self.b[i].isMortgaged == False
-                    ):
+        for group in range(len(GROUP_CELLS)):
+            if group != UTIL and owned[group] == 1:
+                for i in GROUP_CELLS[group]:
+                    if self.owner_id[i] == player.index and not self.mortgaged[i]:
                         offered.append(i)
-        return sorted(offered)
+        # in the order of the board
+        offered.sort()
+        return offered
     
     # Calculate initial utility of every player based on current plots owned and funds
     # To be used in the calc_self_utlility in player.py
+    # Utility of each player (for search players): money, and plots worth
+    # what they would raise (mortgage, houses sold) plus the rent they are
+    # expected to bring in over UTILITY_HORIZON turns, in the units of money
     def calcPlayerUtilities(self):
-        property_worth = {"brown": 12, 'lightblue': 14, 'pink': 16, 'orange': 18, 'red': 20, 'yellow': 22, 'green': 24, 'indigo': 26}
         player_utilities = {} # playernames: utility value
         # Calculate utility from money each player has
         for player in self.players:
@@ -618,65 +429,137 @@ class Board:
             else: # less utility after >$500 in the bank
                 player_utilities[player.name] += 5 + ((player.money - 500) / 250)
         # Calculate utility from properties/houses/hotels owned by players
-        for i in range(len(self.b)):
-            plot = self.b[i]
-            if type(plot) == Property:
-                if plot.owner != "":
-                    player_utilities[plot.owner] += self.shareOfGroup(plot.group, plot.owner) * property_worth[plot.group]
-                    player_utilities[plot.owner] += plot.hasHouses * (property_worth[plot.group] / 10) # Scale result of houses/hotel
+        # rent comes from the other players still in the game
+        opponents = sum(1 for player in self.players if not player.is_bankrupt) - 1
+        for i in PROPERTY_CELLS:
+            owner = self.owner_id[i]
+            if owner != -1 and not self.mortgaged[i]:
+                worth = (
+                    COST_BASE[i] / 2
+                    + self.houses[i] * COST_HOUSE[i] / 2
+                    + UTILITY_HORIZON * opponents * self.expectedRent(i)
+                )
+                player_utilities[self.players[owner].name] += worth / 100
         return player_utilities
 
 
-    # update isMonopoly status for all plots
-    def checkMonopolies(self):
-        groups = {}
-        for i in range(len(self.b)):
-            plot = self.b[i]
-            if type(plot) == Property:
-                if plot.owner == "":
-                    groups[plot.group] = False
-                else:
-                    if plot.group in groups:
-                        if groups[plot.group] != plot.owner:
-                            groups[plot.group] = False
-                    else:
-                        groups[plot.group] = plot.owner
-        for i in range(len(self.b)):
-            plot = self.b[i]
-            if type(plot) == Property:
-                if groups[plot.group] != False:
-                    plot.isMonopoly = True
-                else:
-                    plot.isMonopoly = False
+    # update isMonopoly status for the plots of one group
+    def updateMonopoly(self, group):
+        size = len(GROUP_CELLS[group])
+        monopoly = any(owned[group] == size for owned in self.owned_in_group)
+        for i in GROUP_CELLS[group]:
+            self.monopoly[i] = monopoly
 
     # calculating heavy tasks that we want to do after property change:
     # list of wanted and offered properties for each player
+    # only for the groups and players that changed since the last time
     def recalculateAfterPropertyChange(self):
-        self.checkMonopolies()
+        for group in self.changed_groups:
+            self.updateMonopoly(group)
+        self.changed_groups.clear()
+        for player in self.players:
+            if player.index in self.changed_players:
+                player.plots_wanted = self.getListOfWantedPlots(player)
+                player.plots_offered = self.getListOfOfferedPlots(player)
+                player.plots_to_build = self.listPropertyToBuild(player, self)
+            elif player.behaviour.build_randomly:
+                # shuffled again every time
+                player.plots_to_build = self.listPropertyToBuild(player, self)
+        self.changed_players.clear()
+
+    # Save the state of the game: plots, players, card decks and dice
+    # Search players try moves out on the board itself, then restore it
+    def snapshot(self):
+        return (
+            self.owner_id[:],
+            self.houses[:],
+            self.mortgaged[:],
+            self.monopoly[:],
+            [owned[:] for owned in self.owned_in_group],
+            self.rails_owned[:],
+            self.zobrist,
+            set(self.changed_groups),
+            set(self.changed_players),
+            self.nHouses,
+            self.nHotels,
+            tuple(self.chanceCards),
+            tuple(self.communityCards),
+            self.rng,
+            self.rng.getstate(),
+            self.log,
+            self.events,
+            self.landings,
+            [player.snapshot() for player in self.players],
+        )
+
+    # Go back to a snapshot (it can be restored any number of times)
+    def restore(self, snapshot):
+        (
+            owner_id,
+            houses,
+            mortgaged,
+            monopoly,
+            owned_in_group,
+            rails_owned,
+            self.zobrist,
+            changed_groups,
+            changed_players,
+            self.nHouses,
+            self.nHotels,
+            chanceCards,
+            communityCards,
+            self.rng,
+            rng_state,
+            self.log,
+            self.events,
+            self.landings,
+            players,
+        ) = snapshot
+        # in place, the Property views point to these arrays
+        self.owner_id[:] = owner_id
+        self.houses[:] = houses
+        self.mortgaged[:] = mortgaged
+        self.monopoly[:] = monopoly
+        for owned, saved in zip(self.owned_in_group, owned_in_group):
+            owned[:] = saved
+        self.rails_owned[:] = rails_owned
+        self.changed_groups = set(changed_groups)
+        self.changed_players = set(changed_players)
+        self.chanceCards.clear()
+        self.chanceCards.extend(chanceCards)
+        self.communityCards.clear()
+        self.communityCards.extend(communityCards)
+        self.rng.setstate(rng_state)
+        for player, state in zip(self.players, players):
+            player.restore(state)
+
+    # No game log, events or landings for moves that are only tried out (restore turns them back on)
+    def muteLog(self):
+        self.log = NULL_LOG
+        self.events = None
+        self.landings = None
         for player in self.players:
-            player.plots_wanted = self.getListOfWantedPlots(player)
-            player.plots_offered = self.getListOfOfferedPlots(player)
-            player.plots_to_build = self.listPropertyToBuild(player, self)
+            player.log = NULL_LOG
 
     # perform action for a player on a plot
 
     def action(self, player, position, special=""):
         # Landed on a property - calculate rent first
-        if type(self.b[position]) == Property:
+        if KIND[position] == "property":
             # calculate the rent one would have to pay (but not pay it yet)
             rent = self.calculateRent(position, special=special)
             # pass action to to the cell
-            self.b[position].action(player, rent, self, write_log=self.write_log)
+            self.b[position].action(player, rent, self)
         # landed on a chance, pass board, to track the chance cards
         elif (
             type(self.b[position]) == Chance
             or type(self.b[position]) == Community
             or type(self.b[position]) == PropertyTax
         ):
-            self.b[position].action(player, self, write_log=self.write_log)
+            self.b[position].action(player, self)
         # other cells
         else:
-            self.b[position].action(player, self, write_log=self.write_log)
+            self.b[position].action(player, self)
 
     def printMap(self):
         for i in range(len(self.b)):
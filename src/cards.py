@@ -0,0 +1,53 @@
+# Chance and Community Chest cards, by card number
+#
+# (text, effect, value), effects (see Cards in cells.py):
+# advance: go to cell value (salary if that means passing GO), act there
+# back: go back value cells, act there
+# nearest_rail, nearest_util: advance to the nearest one, pay double / 10x dice
+# collect, pay: money from / to the bank
+# collect_each, pay_each: money from / to every other player
+# repairs: pay for houses and hotels, value is the rate ("chance" or "community")
+# jail: go directly to jail
+# jail_card: Get Out Of Jail Free, kept by the player until used
+
+CHANCE_CARDS = (
+    ("Advance to St.Charle's", "advance", 11),
+    ("Get Out Of Jail Free", "jail_card", None),
+    ("Take a ride on the Reading", "advance", 5),
+    ("Move to the nearest railroad and pay double", "nearest_rail", None),
+    ("Advance to Illinois Avenue", "advance", 24),
+    ("Make general repairs to your property", "repairs", "chance"),
+    ("Advance to GO", "advance", 0),
+    ("Bank pays you dividend $50", "collect", 50),
+    ("Pay poor tax $15", "pay", 15),
+    ("Advance to the nearest Utility and pay 10x dice", "nearest_util", None),
+    ("Go Directly to Jail", "jail", None),
+    ("You've been elected chairman. Pay each player $50", "pay_each", 50),
+    ("Advance to BoardWalk", "advance", 39),
+    ("Go back 3 spaces", "back", 3),
+    ("Your building loan matures. Receive $150", "collect", 150),
+    ("You have won a crossword competition. Collect $100", "collect", 100),
+)
+
+COMMUNITY_CARDS = (
+    ("Pay school tax $150", "pay", 150),
+    ("Opera night: collect $50 from each player", "collect_each", 50),
+    ("You inherit $100", "collect", 100),
+    ("Pay hospital $100", "pay", 100),
+    ("Income tax refund $20", "collect", 20),
+    ("Go Directly to Jail", "jail", None),
+    ("Get Out Of Jail Free", "jail_card", None),
+    ("Second prize in beauty contest $10", "collect", 10),
+    ("You are assigned for street repairs", "repairs", "community"),
+    ("Bank error in your favour: $200", "collect", 200),
+    ("Advance to GO", "advance", 0),
+    ("X-Mas fund matured: $100", "collect", 100),
+    ("Doctor's fee $50", "pay", 50),
+    ("From sale of stock you get $45", "collect", 45),
+    ("Receive for services $25", "collect", 25),
+    ("Life insurance matures, collect $100", "collect", 100),
+)
+
+# Get Out Of Jail Free cards, put back in the deck when used
+CHANCE_JAIL_CARD = 1
+COMMUNITY_JAIL_CARD = 6
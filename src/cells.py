@@ -1,449 +1,256 @@
-import random
+from .cards import CHANCE_CARDS, COMMUNITY_CARDS
+from .layout import NAME, COST_BASE, RENT_BASE, COST_HOUSE, RENT_HOUSE, GROUP
 from .util.configs import BANK_NAME
+from .util.events import MOVE, BUY, RENT, SELL_HOUSE, MORTGAGE, UNMORTGAGE
 
 
 class Cell:
     """Generic Cell Class, base for other classes"""
 
-    def __init__(self, name, write_log, log):
+    def __init__(self, name):
         self.name = name
-        self.write_log = write_log
-        self.log = log
         self.group = ""
 
-    def action(self, player, board, write_log):
+    def action(self, player, board):
         pass
 
 
 class LuxuryTax(Cell):
     """Pay Luxury Tax cell (#38)"""
 
-    def action(self, player, board, write_log):
+    def action(self, player, board):
         player.take_money(board.game_conf.luxury_tax, board, BANK_NAME)
-        if write_log:   
-            self.log.write(
-                player.name + " pays Luxury Tax $" + str(board.game_conf.luxury_tax), 3
-            )
+        board.log.write("%s pays Luxury Tax $%d", 3, player.name, board.game_conf.luxury_tax)
 
 
 class PropertyTax(Cell):
     """Pay Property Tax cell (200 or 10%) (#4)"""
 
-    def action(self, player, board, write_log):
+    def action(self, player, board):
         toPay = min(board.game_conf.property_tax, player.net_worth(board) // 10)
-        if write_log:
-            self.log.write(player.name + " pays Property Tax $" + str(toPay), 3)
+        board.log.write("%s pays Property Tax $%d", 3, player.name, toPay)
         player.take_money(toPay, board, BANK_NAME)
 
 
 class GoToJail(Cell):
     """Go to Jail (#30)"""
 
-    def action(self, player, board, write_log):
-        player.move_to(10)
+    def action(self, player, board):
+        player.move_to(10, board)
         player.in_jail = True
-        if write_log:
-            self.log.write(player.name + " goes to jail from Go To Jail ", 3)
+        board.log.write("%s goes to jail from Go To Jail ", 3, player.name)
 
 
-class Chance(Cell):
-    """Chance cards"""
+class Cards(Cell):
+    """Cell where a card is drawn (base for Chance and Community)
+
+    Cards of a deck are numbers, the shuffled deck is a deque on the board.
+    What each card does is in cards.py, as effects below.
+    """
+
+    cards = ()
+    deck = ""  # name of the deck: "chance" or "community"
 
-    def action(self, player, board, write_log):
+    def action(self, player, board):
         # Get the card
-        chanceCard = board.chanceCards.pop(0)
-
-        # Actions for various cards
-
-        # 0: Advance to St.Charle
-        if chanceCard == 0:
-            if write_log:
-                self.log.write(player.name + " gets chance card: Advance to St.Charle's", 3)
-            if player.position >= 11:
-                player.add_money(board.game_conf.salary)
-                if write_log:
-                    self.log.write(
-                        player.name + " gets salary: $" + str(board.game_conf.salary), 3
-                    )
-            player.position = 11
-            if write_log:
-                self.log.write(player.name + " goes to " + str(board.b[11].name), 3)
-            board.action(player, player.position)
-
-        # 1: Get Out Of Jail Free
-        elif chanceCard == 1:
-            if write_log:
-                self.log.write(player.name + " gets chance card: Get Out Of Jail Free", 3)
-            player.has_jail_card_chance = True
+        deck = board.chanceCards if self.deck == "chance" else board.communityCards
+        card = deck.popleft()
+        text, effect, value = self.cards[card]
+        board.log.write("%s gets %s card: %s", 3, player.name, self.deck, text)
 
-        # 2: Take a ride on the Reading
-        elif chanceCard == 2:
-            if write_log:
-                self.log.write(
-                    player.name + " gets chance card: Take a ride on the Reading", 3
-                )
-            if player.position >= 5:
-                player.add_money(board.game_conf.salary)
-                if write_log:
-                    self.log.write(
-                        player.name + " gets salary: $" + str(board.game_conf.salary), 3
-                    )
-            player.position = 5
-            if write_log:
-                self.log.write(
-                    player.name + " goes to " + str(board.b[player.position].name), 3
-                )
-            board.action(player, player.position)
-
-        # 3: Move to the nearest railroad and pay double
-        elif chanceCard == 3:
-            if write_log:
-                self.log.write(
-                    player.name
-                    + " gets chance card: Move to the nearest railroad and pay double",
-                    3,
-                )
-            # Don't get salary, even if you pass GO (card doesnt say to do it)
-            # Dont move is already on a rail.
-            # Also, I assue advance means you should go to the nearest in fron of you, not behind
-            player.position = (
-                (player.position + 4) // 10 * 10 + 5
-            ) % 40  # nearest railroad
-            # twice for double rent, if needed
-            board.action(player, player.position, special="from_chance")
-
-        # 4: Advance to Illinois Avenue
-        elif chanceCard == 4:
-            if write_log:
-                self.log.write(
-                    player.name + " gets chance card: Advance to Illinois Avenue", 3
-                )
-            if player.position >= 24:
-                player.add_money(board.game_conf.salary)
-                if write_log:
-                    self.log.write(
-                        player.name + " gets salary: $" + str(board.game_conf.salary), 3
-                    )
-            player.position = 24
-            if write_log:
-                self.log.write(
-                    player.name + " goes to " + str(board.b[player.position].name), 3
-                )
-            board.action(player, player.position)
-
-        # 5: Make general repairs to your property
-        elif chanceCard == 5:
-            if write_log:
-                self.log.write(
-                    player.name
-                    + " gets chance card: Make general repairs to your property",
-                    3,
-                )
-            player.make_repairs(board, "chance")
-
-        # 6: Advance to GO
-        elif chanceCard == 6:
-            if write_log:
-                self.log.write(player.name + " gets chance card: Advance to GO", 3)
-            player.add_money(board.game_conf.salary)
-            if write_log:
-                self.log.write(
-                    player.name + " gets salary: $" + str(board.game_conf.salary), 3
-                )
-            player.position = 0
-            if write_log:
-                self.log.write(
-                    player.name + " goes to " + str(board.b[player.position].name), 3
-                )
-
-        # 7: Bank pays you dividend $50
-        elif chanceCard == 7:
-            if write_log:
-                self.log.write(
-                    player.name + " gets chance card: Bank pays you dividend $50", 3
-                )
-            player.add_money(50)
-
-        # 8: Pay poor tax $15
-        elif chanceCard == 8:
-            if write_log:
-                self.log.write(player.name + " gets chance card: Pay poor tax $15", 3)
-            player.take_money(15, board, BANK_NAME)
-
-        # 9: Advance to the nearest Utility and pay 10x dice
-        elif chanceCard == 9:
-            if write_log:
-                self.log.write(
-                    player.name
-                    + " gets chance card: Advance to the nearest Utility and pay 10x dice",
-                    3,
-                )
-            if player.position > 12 and player.position <= 28:
-                player.position = 28
-            else:
-                player.position = 12
-            board.action(player, player.position, special="from_chance")
-
-        # 10: Go Directly to Jail
-        elif chanceCard == 10:
-            if write_log:
-                self.log.write(player.name + " gets chance card: Go Directly to Jail", 3)
-            player.move_to(10)
-            player.in_jail = True
-            if write_log:
-                self.log.write(player.name + " goes to jail on Chance card", 3)
-
-        # 11: You've been elected chairman. Pay each player $50
-        elif chanceCard == 11:
-            if write_log:
-                self.log.write(
-                    player.name
-                    + " gets chance card: You've been elected chairman. Pay each player $50",
-                    3,
-                )
-            for other_player in board.players:
-                if other_player != player and not other_player.is_bankrupt:
-                    player.take_money(50, board, BANK_NAME)
-                    other_player.add_money(50)
-
-        # 12: Advance to BoardWalk
-        elif chanceCard == 12:
-            if write_log:
-                self.log.write(player.name + " gets chance card: Advance to BoardWalk", 3)
-            player.position = 39
-            if write_log:
-                self.log.write(
-                    player.name + " goes to " + str(board.b[player.position].name), 3
-                )
-            board.action(player, player.position)
-
-        # 13: Go back 3 spaces
-        elif chanceCard == 13:
-            if write_log:
-                self.log.write(player.name + " gets chance card: Go back 3 spaces", 3)
-            player.position -= 3
-            if write_log:
-                self.log.write(
-                    player.name + " goes to " + str(board.b[player.position].name), 3
-                )
-            board.action(player, player.position)
-
-        # 14: Your building loan matures. Receive $150.
-        elif chanceCard == 14:
-            if write_log:
-                self.log.write(
-                    player.name
-                    + " gets chance card: Your building loan matures. Receive $150",
-                    3,
-                )
-            player.add_money(150)
-
-        # 15: You have won a crossword competition. Collect $100
-        elif chanceCard == 15:
-            if write_log:
-                self.log.write(
-                    player.name
-                    + " gets chance card: You have won a crossword competition. Collect $100",
-                    3,
-                )
-            player.add_money(100)
+        self.effects[effect](self, player, board, value)
 
         # Put the card back
-        if chanceCard != 1:  # except GOOJF card
-            board.chanceCards.append(chanceCard)
+        if effect != "jail_card":  # except GOOJF card
+            deck.append(card)
 
+    def goes_to(self, player, board):
+        if board.events:
+            board.events.add(MOVE, player.index, player.position)
+        board.log.write("%s goes to %s", 3, player.name, board.b[player.position].name)
 
-class Community(Cell):
-    """Community Chest cards"""
+    def advance(self, player, board, position):
+        if player.position >= position:
+            player.add_money(board.game_conf.salary)
+            board.log.write("%s gets salary: $%d", 3, player.name, board.game_conf.salary)
+        player.position = position
+        self.goes_to(player, board)
+        board.action(player, player.position)
+
+    def back(self, player, board, cells):
+        player.position -= cells
+        self.goes_to(player, board)
+        board.action(player, player.position)
+
+    def nearest_rail(self, player, board, value):
+        # Don't get salary, even if you pass GO (card doesnt say to do it)
+        # Dont move is already on a rail.
+        # Also, I assue advance means you should go to the nearest in fron of you, not behind
+        player.position = ((player.position + 4) // 10 * 10 + 5) % 40  # nearest railroad
+        if board.events:
+            board.events.add(MOVE, player.index, player.position)
+        # twice for double rent, if needed
+        board.action(player, player.position, special="from_chance")
+
+    def nearest_util(self, player, board, value):
+        if player.position > 12 and player.position <= 28:
+            player.position = 28
+        else:
+            player.position = 12
+        if board.events:
+            board.events.add(MOVE, player.index, player.position)
+        board.action(player, player.position, special="from_chance")
+
+    def collect(self, player, board, amount):
+        player.add_money(amount)
+
+    def pay(self, player, board, amount):
+        player.take_money(amount, board, BANK_NAME)
+
+    def collect_each(self, player, board, amount):
+        for other_player in board.players:
+            if other_player != player and not other_player.is_bankrupt:
+                player.add_money(amount)
+                other_player.take_money(amount, board, BANK_NAME)
+
+    def pay_each(self, player, board, amount):
+        for other_player in board.players:
+            if other_player != player and not other_player.is_bankrupt:
+                player.take_money(amount, board, BANK_NAME)
+                other_player.add_money(amount)
+
+    def repairs(self, player, board, repairtype):
+        player.make_repairs(board, repairtype)
+
+    def jail(self, player, board, value):
+        player.move_to(10, board)
+        player.in_jail = True
+        board.log.write("%s goes to jail on %s card", 3, player.name, self.name)
 
-    def action(self, player, board, write_log):
-        # Get the card
-        communityCard = board.communityCards.pop(0)
-
-        # Actions for various cards
-
-        # 0: Pay school tax $150
-        if communityCard == 0:
-            if write_log:
-                self.log.write(player.name + " gets community card: Pay school tax $150", 3)
-            player.take_money(150, board, BANK_NAME)
-
-        # 1: Opera night: collect $50 from each player
-        if communityCard == 1:
-            if write_log:
-                self.log.write(
-                    player.name + " Opera night: collect $50 from each player", 3
-                )
-            for other_player in board.players:
-                if other_player != player and not other_player.is_bankrupt:
-                    player.add_money(50)
-                    other_player.take_money(50, board, BANK_NAME)
-
-        # 2: You inherit $100
-        if communityCard == 2:
-            if write_log:
-                self.log.write(player.name + " gets community card: You inherit $100", 3)
-            player.add_money(100)
-
-        # 3: Pay hospital $100
-        if communityCard == 3:
-            if write_log:
-                self.log.write(player.name + " gets community card: Pay hospital $100", 3)
-            player.take_money(100, board, BANK_NAME)
-
-        # 4: Income tax refund $20
-        if communityCard == 4:
-            if write_log:
-                self.log.write(
-                    player.name + " gets community card: Income tax refund $20", 3
-                )
-            player.add_money(20)
-
-        # 5: Go Directly to Jail
-        elif communityCard == 5:
-            if write_log:
-                self.log.write(player.name + " gets community card: Go Directly to Jail", 3)
-            player.move_to(10)
-            player.in_jail = True
-            if write_log:
-                self.log.write(player.name + " goes to jail on Community card", 3)
-
-        # 6: Get Out Of Jail Free
-        elif communityCard == 6:
-            if write_log:
-                self.log.write(
-                    player.name + " gets community card: Get Out Of Jail Free", 3
-                )
+    def jail_card(self, player, board, value):
+        if self.deck == "chance":
+            player.has_jail_card_chance = True
+        else:
             player.has_jail_card_community = True
 
-        # 7: Second prize in beauty contest $10
-        if communityCard == 7:
-            if write_log:
-                self.log.write(
-                    player.name
-                    + " gets community card: Second prize in beauty contest $10",
-                    3,
-                )
-            player.add_money(10)
-
-        # 8: You are assigned for street repairs
-        elif communityCard == 8:
-            if write_log:
-                self.log.write(
-                    player.name
-                    + " gets community card: You are assigned for street repairs",
-                    3,
-                )
-            player.make_repairs(board, "community")
-
-        # 9: Bank error in your favour: $200
-        if communityCard == 9:
-            if write_log:
-                self.log.write(
-                    player.name + " gets community card: Bank error in your favour: $200", 3
-                )
-            player.add_money(200)
-
-        # 10: Advance to GO
-        elif communityCard == 10:
-            if write_log:
-                self.log.write(player.name + " gets community card: Advance to GO", 3)
-            player.add_money(board.game_conf.salary)
-            if write_log:
-                self.log.write(
-                    player.name + " gets salary: $" + str(board.game_conf.salary), 3
-                )
-            player.position = 0
-            if write_log:
-                self.log.write(
-                    player.name + " goes to " + str(board.b[player.position].name), 3
-                )
-
-        # 11: X-Mas fund matured: $100
-        if communityCard == 11:
-            if write_log:
-                self.log.write(
-                    player.name + " gets community card: X-Mas fund matured: $100", 3
-                )
-            player.add_money(100)
-
-        # 12: Doctor's fee $50
-        if communityCard == 12:
-            if write_log:
-                self.log.write(player.name + " gets community card: Doctor's fee $50", 3)
-            player.take_money(50, board, BANK_NAME)
-
-        # 13: From sale of stock you get $45
-        if communityCard == 13:
-            if write_log:
-                self.log.write(
-                    player.name + " gets community card: From sale of stock you get $45", 3
-                )
-            player.add_money(45)
-
-        # 14: Receive for services $25
-        if communityCard == 14:
-            if write_log:
-                self.log.write(
-                    player.name + " gets community card: Receive for services $25", 3
-                )
-            player.add_money(25)
-
-        # 15: Life insurance matures, collect $100
-        if communityCard == 15:
-            if write_log:
-                self.log.write(
-                    player.name
-                    + " gets community card: Life insurance matures, collect $100",
-                    3,
-                )
-            player.add_money(100)
+    effects = {
+        "advance": advance,
+        "back": back,
+        "nearest_rail": nearest_rail,
+        "nearest_util": nearest_util,
+        "collect": collect,
+        "pay": pay,
+        "collect_each": collect_each,
+        "pay_each": pay_each,
+        "repairs": repairs,
+        "jail": jail,
+        "jail_card": jail_card,
+    }
+
+
+class Chance(Cards):
+    """Chance cards"""
 
-        # Put the card back
-        if communityCard != 6:  # except GOOJF card
-            board.communityCards.append(communityCard)
+    cards = CHANCE_CARDS
+    deck = "chance"
+
+
+class Community(Cards):
+    """Community Chest cards"""
+
+    cards = COMMUNITY_CARDS
+    deck = "community"
 
 
 class Property(Cell):
-    """Property Class (for Properties, Rails, Utilities)"""
+    """Property Class (for Properties, Rails, Utilities)
 
-    def __init__(self, name, cost_base, rent_base, cost_house, rent_house, group, write_log, log):
-        self.name = name
-        self.cost_base = cost_base
-        self.rent_base = rent_base
-        self.cost_house = cost_house
-        self.rent_house = rent_house
-        self.group = group
-        self.log = log
-        self.write_log = write_log
-        self.owner = ""
-        self.isMortgaged = False
-        self.isMonopoly = False
-        self.hasHouses = 0
+    A view of one cell of the board: what it is comes from the static
+    layout tables, its state (owner, houses, mortgage, monopoly) lives
+    in the board's arrays
+    """
+
+    def __init__(self, board, index):
+        self.board = board
+        self.index = index
+
+    # static data
+
+    @property
+    def name(self):
+        return NAME[self.index]
+
+    @property
+    def cost_base(self):
+        return COST_BASE[self.index]
+
+    @property
+    def rent_base(self):
+        return RENT_BASE[self.index]
+
+    @property
+    def cost_house(self):
+        return COST_HOUSE[self.index]
+
+    @property
+    def rent_house(self):
+        return RENT_HOUSE[self.index]
+
+    @property
+    def group(self):
+        return GROUP[self.index]
+
+    # state
+
+    @property
+    def owner(self):
+        owner_id = self.board.owner_id[self.index]
+        return "" if owner_id == -1 else self.board.players[owner_id]
+
+    @owner.setter
+    def owner(self, player):
+        self.board.setOwner(self.index, self.board.ownerId(player))
+
+    @property
+    def hasHouses(self):
+        return self.board.houses[self.index]
+
+    @hasHouses.setter
+    def hasHouses(self, houses):
+        self.board.setHouses(self.index, houses)
+
+    @property
+    def isMortgaged(self):
+        return bool(self.board.mortgaged[self.index])
+
+    @isMortgaged.setter
+    def isMortgaged(self, mortgaged):
+        self.board.setMortgaged(self.index, mortgaged)
+
+    @property
+    def isMonopoly(self):
+        return bool(self.board.monopoly[self.index])
+
+    @isMonopoly.setter
+    def isMonopoly(self, monopoly):
+        self.board.monopoly[self.index] = monopoly
 
-    def action(self, player, rent, board, write_log):
+    def action(self, player, rent, board):
         """Player ended on a property"""
 
         # it's their property or mortgaged - do nothing
         if self.owner == player or self.isMortgaged:
-            if write_log:
-                self.log.write("No rent this time", 3)
+            board.log.write("No rent this time", 3)
             return
 
         # Property up for sale
         elif self.owner == "":
-            if player.wants_to_buy(self.cost_base, self.cost_base, self.group, board) and ((player.behaviour.random and random.randint(0, 1)) or not player.behaviour.random):
-                if write_log:    
-                    self.log.write(
-                        player.name
-                        + " buys property "
-                        + self.name
-                        + " for $"
-                        + str(self.cost_base),
-                        3,
-                    )
+            if player.wants_to_buy(self.cost_base, self.cost_base, self.group, board) and ((player.behaviour.random and board.rng.randint(0, 1)) or not player.behaviour.random):
+                board.log.write("%s buys property %s for $%d", 3, player.name, self.name, self.cost_base)
                 player.take_money(self.cost_base, board, BANK_NAME)
                 self.owner = player
+                if board.events:
+                    board.events.add(BUY, player.index, self.index, -1, self.cost_base)
                 board.recalculateAfterPropertyChange()
             # Remove auction functionality 
             # else: 
@@ -494,11 +301,9 @@ class Property(Cell):
         else:
             amount_taken = player.take_money(rent, board, self.owner)
             self.owner.add_money(amount_taken)
-            if write_log:
-                self.log.write(
-                    player.name + " pays the rent $" + str(rent) + " to " + self.owner.name,
-                    3,
-                )
+            if board.events:
+                board.events.add(RENT, player.index, self.index, self.owner.index, amount_taken)
+            board.log.write("%s pays the rent $%d to %s", 3, player.name, rent, self.owner.name)
 
     # mortgage the plot to the player / or sell the house
     def mortgage(self, player, board):
@@ -507,23 +312,26 @@ class Property(Cell):
             player.add_money(self.cost_house * 5 // 2)
             self.hasHouses = 0
             board.nHotels -= 1
-            if board.write_log:
-                self.log.write(player.name + " sells hotel on " + self.name, 3)
+            if board.events:
+                board.events.add(SELL_HOUSE, player.index, self.index, 0, self.cost_house * 5 // 2)
+            board.log.write("%s sells hotel on %s", 3, player.name, self.name)
         # Sell one house
         elif self.hasHouses > 0:
             player.add_money(self.cost_house // 2)
             self.hasHouses -= 1
             board.nHouses -= 1
-            if board.write_log:
-                self.log.write(player.name + " sells house on " + self.name, 3)
+            if board.events:
+                board.events.add(SELL_HOUSE, player.index, self.index, self.hasHouses, self.cost_house // 2)
+            board.log.write("%s sells house on %s", 3, player.name, self.name)
         # Mortgage
         else:
             self.isMortgaged = True
             player.add_money(self.cost_base // 2)
             # log name of the plot and money player need to pay to get it back
             player.has_mortgages.append((self, int((self.cost_base // 2) * 1.1)))
-            if board.write_log:
-                self.log.write(player.name + " mortgages " + self.name, 3)
+            if board.events:
+                board.events.add(MORTGAGE, player.index, self.index, -1, self.cost_base // 2)
+            board.log.write("%s mortgages %s", 3, player.name, self.name)
 
     # unmortgage thr plot
 
@@ -535,5 +343,6 @@ class Property(Cell):
         self.isMortgaged = False
         player.take_money(thisMortgage[1], board, BANK_NAME)
         player.has_mortgages.remove(thisMortgage)
-        if board.write_log:
-            self.log.write(player.name + " unmortgages " + self.name, 3)
+        if board.events:
+            board.events.add(UNMORTGAGE, player.index, self.index, -1, thisMortgage[1])
+        board.log.write("%s unmortgages %s", 3, player.name, self.name)
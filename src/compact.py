@@ -0,0 +1,144 @@
+from array import array
+
+from .layout import PROPERTY_CELLS, NAME, GROUP, COST_HOUSE, COST_BASE
+
+# Compact states of a game: what changes during a game (plots, decks, dice,
+# players), as bytes and ints, to hand a position to another process
+# (root-parallel search, expectiminimax.py). Everything the Board and the
+# Players know about themselves that does not change (names, behaviours,
+# rules, the log) stays behind: the other process puts the state on a board
+# of its own for the same game, with unpack_state.
+#
+# What the setters of the Board keep (owned_in_group, rails_owned, the
+# players' ledgers, the Zobrist key) is not sent, unpack_state rebuilds it
+# through them.
+
+
+def pack_state(board):
+    """state of the game on board, see unpack_state"""
+    # GameRandom: the rest of the current blocks of dice and coins (1 byte each)
+    rng = board.rng
+    bit_generator = rng.generator.bit_generator.state
+    rng_state = (
+        bit_generator["state"]["state"],
+        bit_generator["state"]["inc"],
+        bit_generator["has_uint32"],
+        bit_generator["uinteger"],
+        bytes(rng.dice[rng.dice_pos:]),
+        bytes(rng.coins[rng.coins_pos:]),
+    )
+    players = tuple(
+        (
+            player.position,
+            player.money,
+            player.consequent_doubles,
+            player.in_jail,
+            player.days_in_jail,
+            player.has_jail_card_chance,
+            player.has_jail_card_community,
+            player.is_bankrupt,
+            tuple((plot.index, amount) for plot, amount in player.has_mortgages),
+            bytes(player.plots_wanted),
+            bytes(player.plots_offered),
+            # (cell, houses when it was listed)
+            bytes(x for plot in player.plots_to_build for x in (plot[0], plot[3])),
+            player.turns,
+            tuple(player.action_list),
+            player.mcts_single_move,
+        )
+        for player in board.players
+    )
+    return (
+        board.owner_id.tobytes(),
+        board.houses.tobytes(),
+        board.mortgaged.tobytes(),
+        board.monopoly.tobytes(),
+        bytes(board.changed_groups),
+        bytes(board.changed_players),
+        board.nHouses,
+        board.nHotels,
+        bytes(board.chanceCards),
+        bytes(board.communityCards),
+        rng_state,
+        players,
+    )
+
+
+def unpack_state(board, state):
+    """Put a state from pack_state on board
+
+    board must be of the same game (players in the same seats, same rules),
+    in any state.
+    """
+    (
+        owner_id,
+        houses,
+        mortgaged,
+        monopoly,
+        changed_groups,
+        changed_players,
+        board.nHouses,
+        board.nHotels,
+        chance_cards,
+        community_cards,
+        rng_state,
+        players,
+    ) = state
+    owner_id, houses, mortgaged = array("b", owner_id), array("b", houses), array("b", mortgaged)
+
+    # plots: cleared, then set again, through the setters
+    for i in PROPERTY_CELLS:
+        board.setHouses(i, 0)
+        board.setMortgaged(i, 0)
+        board.setOwner(i, -1)
+    for i in PROPERTY_CELLS:
+        board.setOwner(i, owner_id[i])
+        board.setMortgaged(i, mortgaged[i])
+        board.setHouses(i, houses[i])
+    # as it was, even if not recalculated yet
+    board.monopoly[:] = array("b", monopoly)
+    board.changed_groups = set(changed_groups)
+    board.changed_players = set(changed_players)
+
+    board.chanceCards.clear()
+    board.chanceCards.extend(chance_cards)
+    board.communityCards.clear()
+    board.communityCards.extend(community_cards)
+
+    rng = board.rng
+    pcg_state, inc, has_uint32, uinteger, dice, coins = rng_state
+    rng.generator.bit_generator.state = {
+        "bit_generator": "PCG64",
+        "state": {"state": pcg_state, "inc": inc},
+        "has_uint32": has_uint32,
+        "uinteger": uinteger,
+    }
+    rng.dice, rng.dice_pos = list(dice), 0
+    rng.coins, rng.coins_pos = list(coins), 0
+
+    for player, player_state in zip(board.players, players):
+        (
+            player.position,
+            player.money,
+            player.consequent_doubles,
+            player.in_jail,
+            player.days_in_jail,
+            player.has_jail_card_chance,
+            player.has_jail_card_community,
+            player.is_bankrupt,
+            has_mortgages,
+            plots_wanted,
+            plots_offered,
+            plots_to_build,
+            player.turns,
+            action_list,
+            player.mcts_single_move,
+        ) = player_state
+        player.has_mortgages = [(board.b[i], amount) for i, amount in has_mortgages]
+        player.plots_wanted = list(plots_wanted)
+        player.plots_offered = list(plots_offered)
+        player.plots_to_build = [
+            (i, NAME[i], GROUP[i], houses, COST_HOUSE[i], COST_BASE[i])
+            for i, houses in zip(plots_to_build[::2], plots_to_build[1::2])
+        ]
+        player.action_list = list(action_list)
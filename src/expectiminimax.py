@@ -1,17 +1,45 @@
+import atexit
 import itertools
+import math
+import multiprocessing
+import pickle
+import time
 from .board import Board
-import copy
+from .compact import pack_state, unpack_state
+from .markov import DICE
 from .player import *
+from .zobrist import state_key
 
+# values are kept within this much of the value at the root, so that the
+# search knows their bounds (see ChanceValue)
+EVAL_MARGIN = 50
+
+# kinds of values in the transposition table
+EXACT, LOWER, UPPER = range(3)
+
+
+# rolls of the dice: (dice1, dice2, probability), the most likely first
+# (every sum, as a double and not)
+def _rolls():
+    rolls = []
+    for sum_, is_double, p in DICE:
+        dice1 = sum_ // 2 if is_double else max(1, sum_ - 6)
+        rolls.append((dice1, sum_ - dice1, p))
+    return sorted(rolls, key=lambda roll: -roll[2])
+
+
+ROLLS = _rolls()
+
+
+# next player still in the game
 def getNextPlayer(player, board):
-    player_index = 0
-    for i in range(len(board.players)):
-        if board.players[i].name == player.name:
-            player_index = i
-    if i == len(board.players)-1:
-        return  board.players[0]
-    else:
-        return board.players[player_index+1]
+    players = board.players
+    i = player.index
+    for _ in range(len(players)):
+        i = (i + 1) % len(players)
+        if not players[i].is_bankrupt:
+            return players[i]
+    return player
 def Eval(player, board):
   #  player_utilities = board.calcPlayerUtilities()
     self_utility = player.calc_self_utility(board)
@@ -24,8 +52,8 @@ def Eval(player, board):
     #         self_utility -= (player_utilities[players] / 10)
     return self_utility 
 
-def IsCutoff(depth, board):
-    if depth > 7:
+def IsCutoff(depth, board, max_depth):
+    if depth > max_depth:
         return True
     if is_game_over(board.players):
         return True
@@ -76,46 +104,397 @@ class ChanceNode:
         self.chance_val =chance
 
 
+class TranspositionTable:
+    """Values of the positions a search has been through, by Zobrist key
+
+    The same position is often reached again through other subsets of the
+    actions or other dice. The table has a fixed number of slots (key % size);
+    an entry replaces the one in its slot unless that one was searched deeper.
+    The key leaves out the dice, the decks and the exact money (see zobrist.py),
+    positions that differ only in those share their value.
+    A value cut off by the search window is only a bound (LOWER or UPPER).
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.keys = [None] * size
+        self.depths = [0] * size  # levels searched below the position
+        self.values = [0] * size
+        self.bounds = [EXACT] * size
+        self.hits = 0
+
+    def lookup(self, key, depth, alpha, beta):
+        """value of the position, if it was searched at least depth levels deep
+        and is good enough for the window (alpha, beta)"""
+        slot = key % self.size
+        if self.keys[slot] != key or self.depths[slot] < depth:
+            return None
+        value, bound = self.values[slot], self.bounds[slot]
+        if bound == EXACT or (bound == LOWER and value >= beta) or (bound == UPPER and value <= alpha):
+            self.hits += 1
+            return value
+        return None
 
+    def store(self, key, depth, value, bound=EXACT):
+        slot = key % self.size
+        if self.keys[slot] is None or self.keys[slot] == key or self.depths[slot] <= depth:
+            self.keys[slot] = key
+            self.depths[slot] = depth
+            self.values[slot] = value
+            self.bounds[slot] = bound
 
 
-def ExpectiMiniMaxSearch(node, depth, board,player):
-    if IsCutoff(depth, board) or not GetActions(board,player):
-        return Eval(player,board), []
+class BudgetSpent(Exception):
+    """The time or nodes of a search ran out (see Search.spend)"""
+
+
+class Search:
+    """What the nodes of one search share
+
+    root: the player searching, values are its Eval, which the other
+    players minimise
+    value: Eval of the root player at the root
+    low, high: bounds of every value, EVAL_MARGIN around value
+    table: TranspositionTable, None if not used
+    depth: deepest level to search (levels are decisions and rolls of the dice)
+    max_depth: deepest level of the current iteration (see IterativeDeepening)
+    best: best actions at the root of the last iteration, searched first
+    deadline, node_limit: budget of the decision (inf: none)
+    nodes: number of nodes searched, over all the iterations
+    """
+
+    # value: of the position at the root, if the search starts below it
+    def __init__(self, board, root, sim_conf, value=None):
+        self.root = root
+        if value is None:
+            value = Eval(root, board)
+        self.value = value
+        self.low = value - EVAL_MARGIN
+        self.high = value + EVAL_MARGIN
+        table_size = sim_conf.expectiminimax_table_size
+        self.table = TranspositionTable(table_size) if table_size else None
+        self.depth = sim_conf.expectiminimax_depth
+        self.max_depth = self.depth
+        self.best = None
+        self.deadline = math.inf
+        if sim_conf.decision_time is not None:
+            self.deadline = time.perf_counter() + sim_conf.decision_time
+        self.node_limit = math.inf
+        if sim_conf.expectiminimax_nodes is not None:
+            self.node_limit = sim_conf.expectiminimax_nodes
+        self.budgeted = self.deadline < math.inf or self.node_limit < math.inf
+        self.interruptible = False
+        self.nodes = 0
+
+    # count a node, and stop the search once the budget is spent
+    def spend(self):
+        self.nodes += 1
+        if self.interruptible and (self.nodes > self.node_limit or time.perf_counter() > self.deadline):
+            raise BudgetSpent
+
+    def leaf(self, board):
+        return min(max(Eval(self.root, board), self.low), self.high)
+
+
+# Value of the position for the root player (the value, and the best actions
+# at the root), searching only what can change the value within (alpha, beta):
+# a value at or below alpha (above beta) is only an upper (lower) bound
+def ExpectiMiniMaxSearch(node, depth, board, player, search=None, alpha=-math.inf, beta=math.inf):
     if node == None:
-        node = Node(board)
+        # the search tries moves out on the real board, and puts it back after each
+        state = board.snapshot()
+        board.muteLog()
+        try:
+            search = Search(board, player, player.sim_conf)
+            workers = player.sim_conf.expectiminimax_workers
+            # (the worker processes of a parallel simulation cannot have their own)
+            if workers > 1 and not multiprocessing.current_process().daemon:
+                return RootParallel(board, player, search, workers)
+            return IterativeDeepening(board, player, search)
+        finally:
+            board.restore(state)
+    search.spend()
+    if IsCutoff(depth, board, search.max_depth):
+        return search.leaf(board), []
+    # positions below the root: searched before?
+    key = None
+    if search.table is not None and depth > 0:
+        key = state_key(board, player, type(node) == ChanceNode)
+        value = search.table.lookup(key, search.max_depth - depth, alpha, beta)
+        if value is not None:
+            return value, []
     if type(node) == Node:
-        val = -100000
-        best_actions = []
-        for actions in GetActions(board,player):
-            player.action_list = actions
-            newBoard = copy.deepcopy(board)
-            for players in newBoard.players:
-                if players.name == player.name:
-                    players.takeAction(newBoard)
-                    newnode = ChanceNode(newBoard,0)
-                    node.children.append(newnode)
-                    val1, move = max(ExpectiMiniMaxSearch(newnode,depth+1,newBoard,getNextPlayer(players,newBoard)))
-                    if val1 > val:
-                        val = val1
-                        best_actions = actions
-        if (depth == 0):
-            for i in range(len(node.children)):
-                if node.children[i].score == val:
-                    return val, best_actions
-            
-        return val, []
-    if type(node) == ChanceNode:
-        value = 0
-        chancevals = {2:1/36,3:2/36,4:3/36,5:4/36,6:5/36,7:1/6,8:5/36,9:4/36,10:3/36,11:3/36,12:1/36}
-        for states in range(2,12):
-            newBoard = copy.deepcopy(board)
-            for players in newBoard.players:
-                if players.name == player.name:
-                    players.action_list = []
-                    players.static_make_a_move(newBoard,states)
-                    newnode = Node(newBoard)
-                    val1, move = ExpectiMiniMaxSearch(newnode,depth +1,newBoard,getNextPlayer(players,newBoard))
-                    value += chancevals[states] * val1
-            
-        return value, []
\ No newline at end of file
+        value, best_actions = DecisionValue(depth, board, player, search, alpha, beta)
+    else:
+        value, best_actions = ChanceValue(depth, board, player, search, alpha, beta), []
+    if key is not None:
+        bound = UPPER if value <= alpha else LOWER if value >= beta else EXACT
+        search.table.store(key, search.max_depth - depth, value, bound)
+    return value, best_actions
+
+
+# With a budget, searches one level deeper at a time until it is spent, and
+# returns the result of the deepest search that finished (the first one, one
+# roll of the dice deep, always does); without one, only the deepest level.
+# Each search starts with the best actions of the one before, and the
+# transposition table keeps the values found so far.
+def IterativeDeepening(board, player, search):
+    first = 1 if search.budgeted else search.depth
+    result = None
+    for max_depth in range(first, search.depth + 1):
+        search.max_depth = max_depth
+        search.interruptible = max_depth > first
+        try:
+            result = ExpectiMiniMaxSearch(Node(board), 0, board, player, search, search.low, search.high)
+        except BudgetSpent:
+            break
+        search.best = result[1]
+    return result
+
+
+# Root-parallel search (SimulationConfig.expectiminimax_workers): each subset
+# of the actions of the root player and roll of the dice after it is searched
+# in a worker process, which gets the position as a compact state (compact.py).
+# The workers deepen their searches like IterativeDeepening, and send back
+# the value at each depth they finished; the result is that of the deepest
+# level finished after every subset and roll. The first level (the values
+# right after the rolls) is evaluated here, the rest within the budget.
+# Subtrees are searched with the full window, without the cut offs the
+# serial search makes between them.
+def RootParallel(board, player, search, workers):
+    actions = SearchOrder(0, board, player, search)
+    state = board.snapshot()
+    sim_conf = player.sim_conf
+    setup = pickle.dumps((board.game_conf, sim_conf, [(other.name, other.behaviour) for other in board.players]))
+    decision = next(_decisions)
+    deadline = None
+    if search.deadline < math.inf:
+        # perf_counter is not shared between processes
+        deadline = time.time() + search.deadline - time.perf_counter()
+    # values[subset][roll]: {depth: value}, tasks: (subset, roll, task)
+    values = []
+    tasks = []
+    for a, actions_tried in enumerate(actions):
+        player.action_list = list(actions_tried)
+        player.takeAction(board)
+        after_actions = board.snapshot()
+        values.append([])
+        for r, (dice1, dice2, p) in enumerate(ROLLS):
+            # (the actions are taken already)
+            player.action_list = []
+            go_again = player.static_make_a_move(board, dice1, dice2)
+            next_player = player if go_again else getNextPlayer(player, board)
+            leaf = search.leaf(board)
+            if is_game_over(board.players):
+                values[a].append({depth: leaf for depth in range(1, search.depth + 1)})
+            else:
+                values[a].append({1: leaf})
+                task = (setup, decision, pack_state(board), next_player.index, player.index, search.value, deadline)
+                tasks.append((a, r, task))
+            board.restore(after_actions)
+        board.restore(state)
+
+    if tasks:
+        node_limit = search.node_limit / len(tasks)
+        results = SearchPool(workers).map(
+            _searchTask, [task + (node_limit,) for a, r, task in tasks], chunksize=1
+        )
+        for (a, r, task), result in zip(tasks, results):
+            values[a][r].update(result)
+
+    # deepest level finished everywhere
+    for depth in range(search.depth, 0, -1):
+        if all(depth in roll for subset in values for roll in subset):
+            break
+    val = -math.inf
+    best_actions = []
+    for actions_tried, subset in zip(actions, values):
+        val1 = sum(ROLLS[r][2] * roll[depth] for r, roll in enumerate(subset))
+        if val1 > val:
+            val = val1
+            best_actions = actions_tried
+    return val, best_actions
+
+
+# numbers of the root-parallel searches of this process
+_decisions = itertools.count()
+# worker processes of root-parallel searches, kept for the next searches
+_pool = None
+_pool_size = 0
+
+
+def SearchPool(workers):
+    global _pool, _pool_size
+    if _pool_size != workers:
+        if _pool is not None:
+            _pool.terminate()
+        _pool = multiprocessing.Pool(processes=workers)
+        _pool_size = workers
+        atexit.register(_pool.terminate)
+    return _pool
+
+
+# in a worker process: the board its searches play on, the setup of the game
+# it is for, and the transposition table of the current search
+_task_setup = None
+_task_board = None
+_task_table = None
+
+
+# search below a roll of the dice at the root (see RootParallel):
+# {depth: value} for each depth finished
+def _searchTask(task):
+    global _task_setup, _task_board, _task_table
+    setup, decision, state, next_index, root_index, value, deadline, node_limit = task
+    if setup != _task_setup:
+        from .player import Player  # (player.py imports this module)
+        game_conf, sim_conf, seats = pickle.loads(setup)
+        players = [Player(name, 0, behaviour, sim_conf, False, None) for name, behaviour in seats]
+        _task_board = Board(players, game_conf, False, None)
+        _task_setup = setup
+        _task_table = None
+    board = _task_board
+    unpack_state(board, state)
+    root = board.players[root_index]
+    search = Search(board, root, root.sim_conf, value)
+    # the table is shared by the tasks of the same search
+    if _task_table is not None and _task_table[0] == decision:
+        search.table = _task_table[1]
+    else:
+        _task_table = (decision, search.table)
+    if deadline is not None:
+        search.deadline = time.perf_counter() + deadline - time.time()
+    search.node_limit = node_limit
+    search.budgeted = search.deadline < math.inf or node_limit < math.inf
+    search.interruptible = True
+
+    values = {}
+    first = 2 if search.budgeted else search.depth
+    for max_depth in range(first, search.depth + 1):
+        search.max_depth = max_depth
+        try:
+            values[max_depth], move = ExpectiMiniMaxSearch(
+                Node(board), 2, board, board.players[next_index], search, search.low, search.high
+            )
+        except BudgetSpent:
+            break
+    return values
+
+
+# subsets of the actions of player, in the order to search them
+def SearchOrder(depth, board, player, search):
+    maximizing = player is search.root
+    actions = GetActions(board, player)
+    if len(actions) > 1:
+        state = board.snapshot()
+        # subsets that come to the same position (e.g. a trade nobody takes)
+        # are searched once; the others are ordered by the value right after
+        # them, the most promising first, so that the rest are cut off sooner
+        outcomes = {}
+        for actions_tried in actions:
+            player.action_list = list(actions_tried)
+            player.takeAction(board)
+            outcome = (state_key(board, player, True), tuple(other.money for other in board.players))
+            if outcome not in outcomes:
+                outcomes[outcome] = (Eval(search.root, board), actions_tried)
+            board.restore(state)
+        actions = [
+            actions_tried
+            for score, actions_tried in sorted(outcomes.values(), key=lambda x: x[0], reverse=maximizing)
+        ]
+    if depth == 0 and search.best in actions:
+        actions.remove(search.best)
+        actions.insert(0, search.best)
+    return actions
+
+
+# player picks a subset of the actions: the root player the best one for
+# itself, the others the worst one for it (alpha-beta)
+def DecisionValue(depth, board, player, search, alpha, beta):
+    maximizing = player is search.root
+    actions = SearchOrder(depth, board, player, search)
+    state = board.snapshot()
+    val = -math.inf if maximizing else math.inf
+    best_actions = []
+    for actions_tried in actions:
+        player.action_list = list(actions_tried)
+        player.takeAction(board)
+        val1, move = ExpectiMiniMaxSearch(ChanceNode(board, 0), depth + 1, board, player, search, alpha, beta)
+        board.restore(state)
+        if maximizing:
+            if val1 > val:
+                val = val1
+                best_actions = actions_tried
+            alpha = max(alpha, val1)
+        else:
+            if val1 < val:
+                val = val1
+                best_actions = actions_tried
+            beta = min(beta, val1)
+        if alpha >= beta:
+            break
+    return val, best_actions
+
+
+# player rolls the dice: expected value over the rolls (Star1/Star2)
+# Every value is within [search.low, search.high], so once some rolls are
+# searched, the bounds of the rest may already put the expected value out
+# of (alpha, beta). Star2 first probes each roll with a single subset of the
+# actions of the next player (no actions): that is a lower bound of the value
+# if the next player maximises, an upper bound if it minimises. Probes go
+# through the transposition table, so they are only made with one.
+def ChanceValue(depth, board, player, search, alpha, beta):
+    state = board.snapshot()
+    n = len(ROLLS)
+    lo = [search.low] * n  # bounds of the value after each roll
+    hi = [search.high] * n
+    # probes: only with a window to cut off against, and not of the leaves
+    # (those are evaluated one by one below)
+    window = alpha > search.low or beta < search.high
+    if window and search.table is not None and depth + 1 <= search.max_depth:
+        for i, (dice1, dice2, p) in enumerate(ROLLS):
+            player.action_list = []
+            go_again = player.static_make_a_move(board, dice1, dice2)
+            next_player = player if go_again else getNextPlayer(player, board)
+            if IsCutoff(depth + 1, board, search.max_depth):
+                lo[i] = hi[i] = search.leaf(board)
+            else:
+                next_player.action_list = []
+                next_player.takeAction(board)
+                probe, move = ExpectiMiniMaxSearch(
+                    ChanceNode(board, 0), depth + 2, board, next_player, search, search.low, search.high
+                )
+                if next_player is search.root:
+                    lo[i] = probe
+                else:
+                    hi[i] = probe
+            board.restore(state)
+
+    for i, (dice1, dice2, p) in enumerate(ROLLS):
+        value_lo = sum(ROLLS[j][2] * lo[j] for j in range(n))
+        value_hi = sum(ROLLS[j][2] * hi[j] for j in range(n))
+        if value_hi <= alpha:
+            return value_hi
+        if value_lo >= beta:
+            return value_lo
+        if lo[i] == hi[i]:
+            continue
+        # window of this roll for the expected value to stay within (alpha, beta)
+        child_alpha = (alpha - (value_hi - p * hi[i])) / p
+        child_beta = (beta - (value_lo - p * lo[i])) / p
+        player.action_list = []
+        # the same player again after a double
+        go_again = player.static_make_a_move(board, dice1, dice2)
+        next_player = player if go_again else getNextPlayer(player, board)
+        val1, move = ExpectiMiniMaxSearch(
+            Node(board), depth + 1, board, next_player, search,
+            max(child_alpha, lo[i]), min(child_beta, hi[i]),
+        )
+        board.restore(state)
+        if val1 <= child_alpha:
+            return value_hi - p * hi[i] + p * val1
+        if val1 >= child_beta:
+            return value_lo - p * lo[i] + p * val1
+        # a bound at lo[i] or hi[i] is the value itself
+        lo[i] = hi[i] = min(max(val1, lo[i]), hi[i])
+    return sum(ROLLS[j][2] * lo[j] for j in range(n))
@@ -0,0 +1,105 @@
+# Static layout of the board, shared (read only) by every Board
+#
+# name: does not really matter, just convenience
+# cost_base: used when buying plot, mortgage
+# rent_base: used for rent and monopoly rent
+#  (for utilities and rail - in Board.calculateRent)
+# cost_house: price of one house (or a hotel)
+# rent_house: list of rent price with 1,2,3,4 houses and a hotel
+# group: used to determine monopoly
+
+# (kind, name) of other cells,
+# (kind, name, cost_base, rent_base, cost_house, rent_house, group) of properties
+CELLS = (
+    # 0-4
+    ("cell", "Go"),
+    ("property", "A1 Mediterraneal Avenue", 60, 2, 50, (10, 30, 90, 160, 250), "brown"),
+    ("community", "Community Chest"),
+    ("property", "A2 Baltic Avenue", 60, 4, 50, (20, 60, 180, 320, 450), "brown"),
+    ("property_tax", "Property Tax"),
+    # 5-9
+    ("property", "R1 Reading railroad", 200, 0, 0, (0, 0, 0, 0, 0), "rail"),
+    ("property", "B1 Oriental Avenue", 100, 6, 50, (30, 90, 270, 400, 550), "lightblue"),
+    ("chance", "Chance"),
+    ("property", "B2 Vermont Avenue", 100, 6, 50, (30, 90, 270, 400, 550), "lightblue"),
+    ("property", "B3 Connecticut Avenue", 120, 8, 50, (40, 100, 300, 450, 600), "lightblue"),
+    # 10-14
+    ("cell", "Prison"),
+    ("property", "C1 St.Charle's Place", 140, 10, 100, (50, 150, 450, 625, 750), "pink"),
+    ("property", "U1 Electric Company", 150, 0, 0, (0, 0, 0, 0, 0), "util"),
+    ("property", "C2 States Avenue", 140, 10, 100, (50, 150, 450, 625, 750), "pink"),
+    ("property", "C3 Virginia Avenue", 160, 12, 100, (60, 180, 500, 700, 900), "pink"),
+    # 15-19
+    ("property", "R2 Pennsylvania Railroad", 200, 0, 0, (0, 0, 0, 0, 0), "rail"),
+    ("property", "D1 St.James Place", 180, 14, 100, (70, 200, 550, 700, 950), "orange"),
+    ("community", "Community Chest"),
+    ("property", "D2 Tennessee Avenue", 180, 14, 100, (70, 200, 550, 700, 950), "orange"),
+    ("property", "D3 New York Avenue", 200, 16, 100, (80, 220, 600, 800, 1000), "orange"),
+    # 20-24
+    ("cell", "Free Parking"),
+    ("property", "E1 Kentucky Avenue", 220, 18, 150, (90, 250, 700, 875, 1050), "red"),
+    ("chance", "Chance"),
+    ("property", "E2 Indiana Avenue", 220, 18, 150, (90, 250, 700, 875, 1050), "red"),
+    ("property", "E3 Illinois Avenue", 240, 20, 150, (100, 300, 750, 925, 1100), "red"),
+    # 25-29
+    ("property", "R3 BnO Railroad", 200, 0, 0, (0, 0, 0, 0, 0), "rail"),
+    ("property", "F1 Atlantic Avenue", 260, 22, 150, (110, 330, 800, 975, 1150), "yellow"),
+    ("property", "F2 Ventinor Avenue", 260, 22, 150, (110, 330, 800, 975, 1150), "yellow"),
+    ("property", "U2 Waterworks", 150, 0, 0, (0, 0, 0, 0, 0), "util"),
+    ("property", "F3 Martin Gardens", 280, 24, 150, (120, 360, 850, 1025, 1200), "yellow"),
+    # 30-34
+    ("go_to_jail", "Go To Jail"),
+    ("property", "G1 Pacific Avenue", 300, 26, 200, (130, 390, 900, 1100, 1275), "green"),
+    ("property", "G2 North Carolina Avenue", 300, 26, 200, (130, 390, 900, 1100, 1275), "green"),
+    ("community", "Community Chest"),
+    ("property", "G3 Pennsylvania Avenue", 320, 28, 200, (150, 450, 100, 1200, 1400), "green"),
+    # 35-39
+    ("property", "R4 Short Line", 200, 0, 0, (0, 0, 0, 0, 0), "rail"),
+    ("chance", "Chance"),
+    ("property", "H1 Park Place", 350, 35, 200, (175, 500, 1100, 1300, 1500), "indigo"),
+    ("luxury_tax", "Luxury Tax"),
+    ("property", "H2 Boardwalk", 400, 50, 200, (200, 600, 1400, 1700, 2000), "indigo"),
+)
+
+N_CELLS = len(CELLS)
+
+# groups by id: colour groups in board order, then rail and util
+GROUP_NAMES = ("brown", "lightblue", "pink", "orange", "red", "yellow", "green", "indigo", "rail", "util")
+GROUP_BY_NAME = {name: group for group, name in enumerate(GROUP_NAMES)}
+RAIL = GROUP_BY_NAME["rail"]
+UTIL = GROUP_BY_NAME["util"]
+
+# per cell tables (zeros / "" / -1 for cells that are not properties)
+KIND = tuple(cell[0] for cell in CELLS)
+NAME = tuple(cell[1] for cell in CELLS)
+COST_BASE = tuple(cell[2] if len(cell) > 2 else 0 for cell in CELLS)
+RENT_BASE = tuple(cell[3] if len(cell) > 2 else 0 for cell in CELLS)
+COST_HOUSE = tuple(cell[4] if len(cell) > 2 else 0 for cell in CELLS)
+RENT_HOUSE = tuple(cell[5] if len(cell) > 2 else (0, 0, 0, 0, 0) for cell in CELLS)
+GROUP = tuple(cell[6] if len(cell) > 2 else "" for cell in CELLS)
+GROUP_ID = tuple(GROUP_BY_NAME[group] if group else -1 for group in GROUP)
+
+PROPERTY_CELLS = tuple(i for i in range(N_CELLS) if KIND[i] == "property")
+
+# property cells of each group, by group id
+GROUP_CELLS = tuple(
+    tuple(i for i in PROPERTY_CELLS if GROUP_ID[i] == group) for group in range(len(GROUP_NAMES))
+)
+RAIL_CELLS = GROUP_CELLS[RAIL]
+UTIL_CELLS = GROUP_CELLS[UTIL]
+
+# rent of each cell by level, so that the rent is a single lookup:
+# street: 0 no houses, 1 no houses in a monopoly (double rent), 2-6 houses 1-4 and a hotel
+# rail: number of rails (not mortgaged) the owner has, 0-4
+# util: 0 owner has one utility, 1 both - multipliers of the dice roll
+def _rent_levels(i):
+    if GROUP_ID[i] == RAIL:
+        return (0,) + tuple(25 * 2 ** rails for rails in range(1, 5))
+    if GROUP_ID[i] == UTIL:
+        return (4, 10)
+    if GROUP_ID[i] != -1:
+        return (RENT_BASE[i], 2 * RENT_BASE[i]) + RENT_HOUSE[i]
+    return (0,)
+
+
+RENT_TABLE = tuple(_rent_levels(i) for i in range(N_CELLS))
@@ -0,0 +1,868 @@
+import functools
+
+import numpy as np
+
+from .layout import (
+    N_CELLS, KIND, GROUP_ID, GROUP_NAMES, RAIL, UTIL,
+    COST_BASE, RENT_BASE, COST_HOUSE, RENT_HOUSE,
+)
+from .markov import landing_model
+
+# Lockstep engine: plays many games at once, with the state of all games held
+# in NumPy arrays and every rule applied to all games it concerns in one go.
+# It follows the rules of Board/Player/cells for rule based and random players
+# (no search players), so results match one_game statistically, not game by game.
+
+# creditors of take_money: the bank, or nobody (money changing hands in trades)
+BANK = -1
+NOONE = -2
+
+# kinds of cells
+PLAIN, PROPERTY, CHANCE, COMMUNITY, PROPERTY_TAX, LUXURY_TAX, GO_TO_JAIL = range(7)
+
+# money cards: card number -> amount (positive: collect, negative: pay the bank)
+CHANCE_MONEY = {7: 50, 8: -15, 14: 150, 15: 100}
+COMMUNITY_MONEY = {
+    0: -150, 2: 100, 3: -100, 4: 20, 7: 10, 9: 200,
+    11: 100, 12: -50, 13: 45, 14: 25, 15: 100,
+}
+# "advance to" chance cards: card number -> cell (salary when passing GO)
+CHANCE_ADVANCE = {0: 11, 2: 5, 4: 24}
+
+
+class _Tables:
+    """Static board data (layout.py) as arrays"""
+
+    def __init__(self):
+        kinds = {"property": PROPERTY, "chance": CHANCE, "community": COMMUNITY,
+                 "property_tax": PROPERTY_TAX, "luxury_tax": LUXURY_TAX, "go_to_jail": GO_TO_JAIL}
+        self.n_cells = N_CELLS
+        self.kind = np.array([kinds.get(kind, PLAIN) for kind in KIND])
+        self.group = np.array(GROUP_ID)
+        self.rail = RAIL
+        self.util = UTIL
+
+        n_groups = len(GROUP_NAMES)
+        self.group_cells = [np.flatnonzero(self.group == i) for i in range(n_groups)]
+        self.group_size = np.array([len(cells) for cells in self.group_cells])
+        width = self.group_size.max()
+        # cells of each group, padded with GO (that nobody owns)
+        self.group_cells_padded = np.zeros((n_groups, width), dtype=np.int64)
+        for i, cells in enumerate(self.group_cells):
+            self.group_cells_padded[i, : len(cells)] = cells
+        # group of each cell (0 for non-properties, masked out with is_property)
+        self.group_safe = np.maximum(self.group, 0)
+        self.size_of_cell = np.where(self.group >= 0, self.group_size[self.group_safe], 0)
+
+        self.is_property = self.kind == PROPERTY
+        self.is_street = self.is_property & (self.group != self.rail) & (self.group != self.util)
+        self.tradeable = self.is_property & (self.group != self.util)
+        groups = np.arange(n_groups)
+        self.street_groups = groups[(groups != self.rail) & (groups != self.util)]
+        self.trade_groups = groups[groups != self.util]
+        self.trade_group_cells = self.group_cells_padded[self.trade_groups]
+        self.trade_group_size = self.group_size[self.trade_groups]
+        # three different groups (of trade_groups)
+        n = len(self.trade_groups)
+        a, b, c = np.ix_(range(n), range(n), range(n))
+        self.three_groups = (a != b) & (a != c) & (b != c)
+        self.rail_cells = self.group_cells[self.rail]
+
+        self.cost_base = np.array(COST_BASE)
+        self.rent_base = np.array(RENT_BASE)
+        self.cost_house = np.array(COST_HOUSE)
+        self.rent_house = np.array(RENT_HOUSE)
+        self.unmortgage_cost = (self.cost_base // 2 * 1.1).astype(np.int64)
+        # what selling (cell, level) brings: 0 the mortgage, 1-4 a house, 5 the hotel
+        self.sale_proceeds = np.zeros((self.n_cells, 6), dtype=np.int64)
+        self.sale_proceeds[:, 0] = self.cost_base // 2
+        self.sale_proceeds[:, 1:5] = (self.cost_house // 2)[:, None]
+        self.sale_proceeds[:, 5] = self.cost_house * 5 // 2
+
+        # building preference: most expensive house first, then base cost
+        # (ties: higher cell number), as Board.listPropertyToBuild sorts them
+        cells = np.arange(self.n_cells)
+        self.build_key = (self.cost_house * 1000 + self.cost_base) * 64 + cells
+        self.build_key_cheapest = ((1 << 20) - self.cost_house * 1000 - self.cost_base) * 64 + cells
+
+
+@functools.lru_cache(maxsize=None)
+def tables():
+    return _Tables()
+
+
+class LockstepGames:
+    """State of n_games games, advanced together turn by turn"""
+
+    def __init__(self, n_games, behaviours, game_conf, rng):
+        for behaviour in behaviours:
+            if behaviour.expectiminimax or behaviour.mcts:
+                raise ValueError("the lockstep engine has no search players")
+            if not (behaviour.random or behaviour.rule_based):
+                raise ValueError("the lockstep engine needs random or rule based players")
+
+        t = self.t = tables()
+        self.n_games = n_games
+        self.n_players = n_players = len(behaviours)
+        self.behaviours = behaviours
+        self.game_conf = game_conf
+        self.rng = rng
+        self.cash_limit = np.array([b.unspendable_cash for b in behaviours])
+        self.is_random = np.array([b.random for b in behaviours])
+        if any(b.build_by_rent for b in behaviours):
+            # expected rent a house adds per dollar, by cell and houses before
+            # it, as Board.listPropertyToBuild orders plots for build_by_rent
+            rent = landing_model(game_conf).rent
+            self.rent_per_dollar = np.zeros((t.n_cells, 5))
+            for i in np.flatnonzero(t.is_street):
+                for houses in range(5):
+                    self.rent_per_dollar[i, houses] = (rent[i][houses + 2] - rent[i][houses + 1]) / t.cost_house[i]
+
+        shape = (n_games, n_players)
+        if game_conf.starting_money_per_player is None:
+            self.money = np.full(shape, game_conf.starting_money, dtype=np.int64)
+        else:
+            self.money = np.tile(
+                np.array(game_conf.starting_money_per_player[:n_players], dtype=np.int64),
+                (n_games, 1),
+            )
+        self.position = np.zeros(shape, dtype=np.int64)
+        self.in_jail = np.zeros(shape, dtype=bool)
+        self.days_in_jail = np.zeros(shape, dtype=np.int64)
+        self.doubles = np.zeros(shape, dtype=np.int64)
+        self.turns = np.zeros(shape, dtype=np.int64)
+        self.jail_card_chance = np.zeros(shape, dtype=bool)
+        self.jail_card_community = np.zeros(shape, dtype=bool)
+        self.bankrupt = np.zeros(shape, dtype=bool)
+
+        cells = (n_games, t.n_cells)
+        self.owner = np.full(cells, -1, dtype=np.int64)
+        self.houses = np.zeros(cells, dtype=np.int64)
+        self.mortgaged = np.zeros(cells, dtype=bool)
+        # whose has_mortgages list holds the mortgage (the one who can repay it)
+        self.mortgage_holder = np.full(cells, -1, dtype=np.int64)
+        # kept up to date with owner by count_owned: plots each player owns of
+        # each group, and the owner of each whole group (-1: none)
+        n_groups = len(t.group_size)
+        self.owned_in_group = np.zeros((n_games, n_players, n_groups), dtype=np.int64)
+        self.group_owner = np.full((n_games, n_groups), -1, dtype=np.int64)
+        self.n_houses = np.zeros(n_games, dtype=np.int64)
+        self.n_hotels = np.zeros(n_games, dtype=np.int64)
+
+        # card decks as ring buffers: cards, index of the top card, deck size
+        self.chance_deck = rng.permuted(np.tile(np.arange(16), (n_games, 1)), axis=1)
+        self.community_deck = rng.permuted(np.tile(np.arange(16), (n_games, 1)), axis=1)
+        self.chance_top = np.zeros(n_games, dtype=np.int64)
+        self.community_top = np.zeros(n_games, dtype=np.int64)
+        self.chance_size = np.full(n_games, 16, dtype=np.int64)
+        self.community_size = np.full(n_games, 16, dtype=np.int64)
+
+    # random draws
+
+    def coins(self, n):
+        return self.rng.integers(0, 2, size=n).astype(bool)
+
+    def dice(self, n):
+        roll = self.rng.integers(1, 7, size=(n, 2))
+        return roll[:, 0], roll[:, 1]
+
+    # ownership queries
+
+    def count_owned(self, g):
+        """owned_in_group and group_owner of games g, after owners changed"""
+        t = self.t
+        owners = self.owner[g][:, None, t.group_cells_padded]
+        owned = (owners == np.arange(self.n_players)[None, :, None, None]).sum(axis=3)
+        self.owned_in_group[g] = owned
+        complete = owned == t.group_size
+        self.group_owner[g] = np.where(complete.any(axis=1), complete.argmax(axis=1), -1)
+
+    def monopoly(self, g, cells):
+        """Is cells[i] part of a monopoly in game g[i]"""
+        return self.group_owner[g, self.t.group_safe[cells]] >= 0
+
+    def net_worth(self, g, p):
+        t = self.t
+        owned = self.owner[g] == p[:, None]
+        mortgaged = self.mortgaged[g]
+        value = np.where(
+            mortgaged,
+            t.cost_base // 2,
+            t.cost_base + t.cost_house * self.houses[g],
+        )
+        return self.money[g, p] + (value * owned).sum(axis=1)
+
+    # money
+
+    def take_money(self, g, p, amount, creditor):
+        """Player.take_money for player p[i] of game g[i]; returns the amount
+        the creditor gets (less than amount if the player went bankrupt)"""
+        before = self.money[g, p]
+        after = before - amount
+        self.money[g, p] = after
+        short = after < 0
+        if short.any():
+            gs, ps = g[short], p[short]
+            self.liquidate(gs, ps)
+            broke = self.money[gs, ps] < 0
+            if broke.any():
+                self.go_bankrupt(gs[broke], ps[broke], creditor[short][broke])
+        proceeds = self.money[g, p] - after
+        return np.where(self.bankrupt[g, p], np.minimum(before, amount) + proceeds, amount)
+
+    def liquidate(self, g, p):
+        """Sell buildings / mortgage property while in debt
+        (Board.choosePropertyToMortgageDowngrade order: least share of its
+        group first, then most houses, then cell number)
+
+        Selling a house only moves the next sale of its plot back in that
+        order, so all the sales are ordered at once and each player makes the
+        fewest of them that pay its debt (or all of them).
+        """
+        t = self.t
+        in_debt = self.money[g, p] < 0
+        g, p = g[in_debt], p[in_debt]
+        if not len(g):
+            return
+        rows = np.arange(len(g))[:, None]
+        houses = self.houses[g][:, :, None]
+        owned = (self.owner[g] == p[:, None]) & t.is_property & ~self.mortgaged[g]
+        order = self.owned_in_group[g, p][:, t.group_safe] / np.maximum(t.size_of_cell, 1) * 100
+        order += np.arange(t.n_cells) / 100
+        # (games, cells, level) sales: 0 mortgages the plot, 1-4 sell a house, 5 the hotel
+        level = np.arange(6)
+        for_sale = owned[:, :, None] & np.where(houses == 5, (level == 0) | (level == 5), level <= houses)
+        key = np.where(for_sale, order[:, :, None] + 5 - level, np.inf).reshape(len(g), -1)
+        sales = key.argsort(axis=1)
+        proceeds = np.where(for_sale, t.sale_proceeds, 0).reshape(len(g), -1)
+        paid = (self.money[g, p][:, None] + proceeds[rows, sales].cumsum(axis=1)) >= 0
+        n_sales = np.where(paid.any(axis=1), paid.argmax(axis=1) + 1, for_sale.sum(axis=(1, 2)))
+        sold = np.zeros(key.shape, dtype=bool)
+        sold[rows, sales] = np.arange(key.shape[1]) < n_sales[:, None]
+        self.money[g, p] += (proceeds * sold).sum(axis=1)
+
+        sold = sold.reshape(for_sale.shape)
+        hotel, n_houses, plot = sold[:, :, 5], sold[:, :, 1:5].sum(axis=2), sold[:, :, 0]
+        self.houses[g] = np.where(hotel, 0, houses[:, :, 0] - n_houses)
+        self.n_hotels[g] -= hotel.sum(axis=1)
+        self.n_houses[g] -= n_houses.sum(axis=1)
+        self.mortgaged[g] |= plot
+        self.mortgage_holder[g] = np.where(plot, p[:, None], self.mortgage_holder[g])
+
+    def go_bankrupt(self, g, p, creditor):
+        self.bankrupt[g, p] = True
+        to_bank = (creditor == BANK) | self.game_conf.bankruptcy_goes_to_bank
+        transfer = to_bank | (creditor >= 0)
+        g, p, creditor, to_bank = g[transfer], p[transfer], creditor[transfer], to_bank[transfer]
+        owned = self.owner[g] == p[:, None]
+        new_owner = np.where(to_bank, -1, creditor)
+        self.owner[g] = np.where(owned, new_owner[:, None], self.owner[g])
+        # property back to the bank is free of mortgages
+        freed = owned & to_bank[:, None]
+        self.mortgaged[g] = self.mortgaged[g] & ~freed
+        self.mortgage_holder[g] = np.where(freed, -1, self.mortgage_holder[g])
+        self.count_owned(g)
+
+    # actions before the roll
+
+    def repay_mortgages(self, g, p):
+        """Player.repay_mortgage, while there is one to repay"""
+        coeff = self.behaviours[p].unmortgage_coeff
+        while len(g):
+            held = self.mortgaged[g] & (self.mortgage_holder[g] == p)
+            cost = np.where(held, self.t.unmortgage_cost, 1 << 40)
+            cell = cost.argmin(axis=1)
+            cheapest = cost[np.arange(len(g)), cell]
+            repay = held.any(axis=1) & (self.money[g, p] > cheapest * coeff)
+            g, cell, cheapest = g[repay], cell[repay], cheapest[repay]
+            self.mortgaged[g, cell] = False
+            self.mortgage_holder[g, cell] = -1
+            # has at least coeff times the cost, never goes bankrupt here
+            self.money[g, p] -= cheapest
+
+    def build(self, g, p):
+        """Board.improveProperty, while there is something to build"""
+        t = self.t
+        behaviour = self.behaviours[p]
+        # only games where p has all the streets of a group, and those streets
+        # (the owners do not change while building)
+        g = g[(self.group_owner[g][:, t.street_groups] == p).any(axis=1)]
+        streets = (self.group_owner[g][:, t.group_safe] == p) & t.is_street
+        while len(g):
+            houses = self.houses[g]
+            candidate = streets & (houses < 5)
+            some = candidate.any(axis=1)
+            g, houses, candidate, streets = g[some], houses[some], candidate[some], streets[some]
+            if not self.game_conf.allow_unequal_development:
+                # only the least developed plots of a group
+                least = np.where(candidate, houses, 99)[:, t.group_cells_padded].min(axis=2)
+                candidate &= houses == least[:, t.group_safe]
+            available = self.money[g, p] - self.cash_limit[p]
+            candidate &= t.cost_house <= available[:, None]
+
+            if behaviour.build_randomly:
+                key = self.rng.random(candidate.shape)
+            elif behaviour.build_cheapest:
+                key = t.build_key_cheapest
+            elif behaviour.build_by_rent:
+                key = self.rent_per_dollar[np.arange(t.n_cells), np.minimum(houses, 4)]
+            else:
+                key = t.build_key
+            key = np.where(candidate, key, -1)
+            cell = key.argmax(axis=1)
+            found = candidate.any(axis=1)
+            g, cell, streets = g[found], cell[found], streets[found]
+
+            hotel = self.houses[g, cell] == 4
+            limit_hit = np.where(
+                hotel,
+                self.n_hotels[g] >= self.game_conf.hotel_limit,
+                self.n_houses[g] >= self.game_conf.house_limit,
+            )
+            g, cell, hotel, streets = g[~limit_hit], cell[~limit_hit], hotel[~limit_hit], streets[~limit_hit]
+            self.houses[g, cell] += 1
+            self.n_hotels[g] += hotel
+            self.n_houses[g] += np.where(hotel, -4, 1)
+            self.money[g, p] -= t.cost_house[cell]
+
+    # trades
+
+    def trade_lists(self, g):
+        """plots_wanted and plots_offered of every player, by tradeable group
+        (t.trade_groups): (games, players, groups) masks and cells
+
+        A player wants the one plot of a group that it lacks for a monopoly,
+        and offers the one plot it has of a group (unless it is mortgaged).
+        """
+        t = self.t
+        owners = self.owner[g][:, None, t.trade_group_cells]
+        mine = owners == np.arange(self.n_players)[None, :, None, None]
+        owned = self.owned_in_group[g][:, :, t.trade_groups]
+        # the plot owned of a group, or the one missing (GO if neither)
+        owned_cells = (mine * t.trade_group_cells).sum(axis=3)
+        wanted = owned == t.trade_group_size - 1
+        wanted_cell = np.where(wanted, t.trade_group_cells.sum(axis=1) - owned_cells, 0)
+        offered = owned == 1
+        offered_cell = np.where(offered, owned_cells, 0)
+        offered &= ~self.mortgaged[g[:, None, None], offered_cell]
+        return wanted, wanted_cell, offered, offered_cell
+
+    def trade(self, g, p):
+        """Player.two_way_trade, then three_way_trade if there was none
+
+        Which games have a trade that would go through is worked out for all
+        games at once, by group: in a group a player wants or offers at most
+        one plot. The few trades themselves are done game by game.
+        """
+        t = self.t
+        # quick filter: p lacks one plot of a group, and has one of a group
+        owned = self.owned_in_group[g, p][:, t.trade_groups]
+        g = g[(owned == t.trade_group_size - 1).any(axis=1) & (owned == 1).any(axis=1)]
+        if not len(g):
+            return
+        wanted, wanted_cell, offered, offered_cell = self.trade_lists(g)
+        owner = self.owner[g[:, None, None], wanted_cell]
+        # (i, a, b): in game i, p wants the plot of group a, which someone (the
+        # first owner) owns, and the first owner wants the plot of group b
+        rows = np.arange(len(g))[:, None]
+        first = np.maximum(owner[:, p], 0)
+        i, a, b = np.nonzero(
+            (wanted[:, p] & (owner[:, p] >= 0))[:, :, None]
+            & wanted[rows, first]
+            & ~np.eye(len(t.trade_groups), dtype=bool)
+        )
+        first = first[i, a]
+        cell_b = wanted_cell[i, first, b]
+        cost_a, cost_b = t.cost_base[wanted_cell[i, p, a]], t.cost_base[cell_b]
+        money_p, first_money = self.money[g[i], p], self.money[g[i], first]
+        first_limit = self.cash_limit[first]
+
+        # two-way: p offers b; the owner of the cheaper plot pays the difference
+        a_cheaper = cost_a < cost_b
+        payer_money = np.where(a_cheaper, first_money, money_p)
+        payer_limit = np.where(a_cheaper, first_limit, self.cash_limit[p])
+        two = (
+            offered[i, p, b]
+            & (cell_b == offered_cell[i, p, b])
+            & (payer_money - np.abs(cost_b - cost_a) >= payer_limit)
+        )
+        two_way = np.zeros(len(g), dtype=bool)
+        two_way[i[two]] = True
+
+        three_way = np.zeros(len(g), dtype=bool)
+        if self.n_players >= 3 and self.behaviours[p].three_way_trade:
+            # someone (the second owner) owns b, in games without a two-way trade
+            second = owner[i, first, b]
+            s = (second >= 0) & ~two_way[i]
+            i, a, b, second = i[s], a[s], b[s], second[s]
+            cost_a, cost_b, money_p = cost_a[s], cost_b[s], money_p[s]
+            first_money, first_limit = first_money[s], first_limit[s]
+            # (i, a, b) x c: the second owner wants the plot of group c, which p offers
+            cell_c = wanted_cell[i, second]
+            cost_c = t.cost_base[cell_c]
+            # (sic) the same money checks as Player.three_way_trade
+            # p pays cost a - cost c, the owner of a pays cost b - cost a
+            # and, checked against its own money, cost c - cost b
+            three = (
+                wanted[i, second]
+                & offered[i, p]
+                & (cell_c == offered_cell[i, p])
+                & t.three_groups[a, b]
+                & (money_p[:, None] - cost_a[:, None] + cost_c > self.cash_limit[p])
+                & (first_money - cost_b + cost_a > first_limit)[:, None]
+                & (first_money[:, None] - cost_c + cost_b[:, None] > self.cash_limit[second][:, None])
+            ).any(axis=1)
+            three_way[i[three]] = True
+
+        for game, two, three in zip(g, two_way, three_way):
+            if two:
+                self.two_way_trade(game, p)
+            elif three:
+                self.three_way_trade(game, p)
+
+    def wanted(self, game, p):
+        t = self.t
+        owner = self.owner[game]
+        owned = self.owned_in_group[game, p]
+        return [
+            cell for cell in np.flatnonzero(t.tradeable & (owner != p))
+            if owned[t.group[cell]] == t.size_of_cell[cell] - 1
+        ]
+
+    def offered(self, game, p):
+        t = self.t
+        owner = self.owner[game]
+        owned = self.owned_in_group[game, p]
+        return [
+            cell for cell in np.flatnonzero(t.tradeable & (owner == p) & ~self.mortgaged[game])
+            if owned[t.group[cell]] == 1
+        ]
+
+    def pay(self, game, p, amount):
+        """Money changing hands in a trade (nobody gets the property if it bankrupts)"""
+        self.take_money(np.array([game]), np.array([p]), np.array([amount]), np.array([NOONE]))
+
+    def two_way_trade(self, game, p):
+        t = self.t
+        trade_happened = False
+        # as of the last trade
+        offered = self.offered(game, p)
+        for i_want in self.wanted(game, p)[::-1]:
+            owner_of_wanted = self.owner[game, i_want]
+            if owner_of_wanted == -1:
+                continue
+            for they_want in self.wanted(game, owner_of_wanted)[::-1]:
+                if they_want not in offered or t.group[i_want] == t.group[they_want]:
+                    continue
+                if t.cost_base[i_want] < t.cost_base[they_want]:
+                    cheaper, expensive = i_want, they_want
+                else:
+                    cheaper, expensive = they_want, i_want
+                price_diff = t.cost_base[expensive] - t.cost_base[cheaper]
+                payer, payee = self.owner[game, cheaper], self.owner[game, expensive]
+                if self.money[game, payer] - price_diff >= self.cash_limit[payer]:
+                    self.pay(game, payer, price_diff)
+                    self.money[game, payee] += price_diff
+                    self.owner[game, cheaper], self.owner[game, expensive] = payee, payer
+                    self.count_owned(np.array([game]))
+                    offered = self.offered(game, p)
+                    trade_happened = True
+        return trade_happened
+
+    def three_way_trade(self, game, p):
+        t = self.t
+        # as of the last trade
+        offered = self.offered(game, p)
+        for wanted1 in self.wanted(game, p)[::-1]:
+            first_owner = self.owner[game, wanted1]
+            if first_owner == -1:
+                continue
+            for wanted2 in self.wanted(game, first_owner)[::-1]:
+                second_owner = self.owner[game, wanted2]
+                if second_owner == -1:
+                    continue
+                for wanted3 in self.wanted(game, second_owner)[::-1]:
+                    if wanted3 not in offered:
+                        continue
+                    if len({t.group[wanted1], t.group[wanted2], t.group[wanted3]}) < 3:
+                        continue
+                    topay1 = t.cost_base[wanted1] - t.cost_base[wanted3]
+                    topay2 = t.cost_base[wanted2] - t.cost_base[wanted1]
+                    topay3 = t.cost_base[wanted3] - t.cost_base[wanted2]
+                    # (sic) the same checks as Player.three_way_trade
+                    if (
+                        self.money[game, p] - topay1 > self.cash_limit[p]
+                        and self.money[game, first_owner] - topay2 > self.cash_limit[first_owner]
+                        and self.money[game, first_owner] - topay3 > self.cash_limit[second_owner]
+                    ):
+                        self.owner[game, wanted1] = p
+                        self.owner[game, wanted2] = first_owner
+                        self.owner[game, wanted3] = second_owner
+                        self.count_owned(np.array([game]))
+                        self.pay(game, p, topay1)
+                        self.pay(game, first_owner, topay2)
+                        self.pay(game, second_owner, topay3)
+                        offered = self.offered(game, p)
+
+    # landing on cells
+
+    def rent(self, g, cell, special):
+        """Board.calculateRent (cell is owned in every game)"""
+        t = self.t
+        group = t.group[cell]
+        owner = self.owner[g, cell]
+
+        street = t.is_street[cell]
+        houses = self.houses[g, cell]
+        monopoly = self.monopoly(g, cell)
+        rent = np.where(
+            street & (houses > 0),
+            t.rent_house[cell, np.maximum(houses - 1, 0)],
+            np.where(street & monopoly, 2 * t.rent_base[cell], t.rent_base[cell]),
+        )
+
+        rail = group == t.rail
+        if rail.any():
+            rails = (
+                (self.owner[g[rail, None], t.rail_cells] == owner[rail, None])
+                & ~self.mortgaged[g[rail, None], t.rail_cells]
+            ).sum(axis=1)
+            rent[rail] = np.where(rails == 0, 0, 25 * 2**rails) * np.where(special[rail], 2, 1)
+
+        util = group == t.util
+        if util.any():
+            dice1, dice2 = self.dice(util.sum())
+            rent[util] = (dice1 + dice2) * np.where(monopoly[util] | special[util], 10, 4)
+        return rent
+
+    def land_property(self, g, p, cell, special):
+        """Property.action"""
+        t = self.t
+        owner = self.owner[g, cell]
+        no_rent = (owner == p) | self.mortgaged[g, cell]
+
+        for_sale = ~no_rent & (owner == -1)
+        if for_sale.any():
+            gs, ps, cs = g[for_sale], p[for_sale], cell[for_sale]
+            buy = self.money[gs, ps] > t.cost_base[cs] + self.cash_limit[ps]
+            random_player = self.is_random[ps]
+            buy &= ~random_player | self.coins(len(gs))
+            gs, ps, cs = gs[buy], ps[buy], cs[buy]
+            # has more than the price, never goes bankrupt here
+            self.money[gs, ps] -= t.cost_base[cs]
+            self.owner[gs, cs] = ps
+            self.count_owned(gs)
+
+        pays = ~no_rent & (owner >= 0)
+        if pays.any():
+            gs, ps, cs, owners = g[pays], p[pays], cell[pays], owner[pays]
+            rent = self.rent(gs, cs, special[pays])
+            taken = self.take_money(gs, ps, rent, owners)
+            # np.add.at: every game appears once, but keep it safe
+            np.add.at(self.money, (gs, owners), taken)
+
+    def go_to_jail(self, g, p):
+        self.position[g, p] = 10
+        self.in_jail[g, p] = True
+
+    def salary(self, g, p):
+        self.money[g, p] += self.game_conf.salary
+
+    def charge(self, g, p, amount):
+        """pay the bank"""
+        if len(g):
+            self.take_money(g, p, np.broadcast_to(amount, g.shape), np.full(len(g), BANK))
+
+    def repairs(self, g, p, per_house, per_hotel):
+        owned = self.owner[g] == p[:, None]
+        houses = self.houses[g]
+        cost = (np.where(houses == 5, per_hotel, houses * per_house) * owned).sum(axis=1)
+        self.charge(g, p, cost)
+
+    def draw(self, deck, top, size, g):
+        card = deck[g, top[g]]
+        top[g] = (top[g] + 1) % 16
+        size[g] -= 1
+        return card
+
+    def put_back(self, deck, top, size, g, card):
+        deck[g, (top[g] + size[g]) % 16] = card
+        size[g] += 1
+
+    def chance(self, g, p):
+        """Chance.action; returns the (games, players, special) that moved
+        and have to act on their new cell"""
+        card = self.draw(self.chance_deck, self.chance_top, self.chance_size, g)
+        position = self.position[g, p]
+        moved = np.zeros(len(g), dtype=bool)
+        special = np.zeros(len(g), dtype=bool)
+
+        for number, target in CHANCE_ADVANCE.items():
+            s = card == number
+            passes_go = s & (position >= target)
+            self.salary(g[passes_go], p[passes_go])
+            self.position[g[s], p[s]] = target
+            moved |= s
+
+        s = card == 1
+        self.jail_card_chance[g[s], p[s]] = True
+
+        # nearest railroad, double rent; no salary
+        s = card == 3
+        self.position[g[s], p[s]] = ((position[s] + 4) // 10 * 10 + 5) % 40
+        moved |= s
+        special |= s
+
+        s = card == 5
+        self.repairs(g[s], p[s], 25, 100)
+
+        s = card == 6
+        self.salary(g[s], p[s])
+        self.position[g[s], p[s]] = 0
+
+        for number, amount in CHANCE_MONEY.items():
+            s = card == number
+            if amount > 0:
+                self.money[g[s], p[s]] += amount
+            else:
+                self.charge(g[s], p[s], -amount)
+
+        # nearest utility, 10x dice
+        s = card == 9
+        self.position[g[s], p[s]] = np.where((position[s] > 12) & (position[s] <= 28), 28, 12)
+        moved |= s
+        special |= s
+
+        s = card == 10
+        self.go_to_jail(g[s], p[s])
+
+        # chairman: pay each player $50
+        s = card == 11
+        if s.any():
+            gs, ps = g[s], p[s]
+            for other in range(self.n_players):
+                paid = (ps != other) & ~self.bankrupt[gs, other]
+                self.charge(gs[paid], ps[paid], 50)
+                self.money[gs[paid], other] += 50
+
+        s = card == 12
+        self.position[g[s], p[s]] = 39
+        moved |= s
+
+        s = card == 13
+        self.position[g[s], p[s]] = position[s] - 3
+        moved |= s
+
+        # all cards go back, except Get Out Of Jail Free
+        back = card != 1
+        self.put_back(self.chance_deck, self.chance_top, self.chance_size, g[back], card[back])
+        return g[moved], p[moved], special[moved]
+
+    def community(self, g, p):
+        """Community.action"""
+        card = self.draw(self.community_deck, self.community_top, self.community_size, g)
+
+        for number, amount in COMMUNITY_MONEY.items():
+            s = card == number
+            if amount > 0:
+                self.money[g[s], p[s]] += amount
+            else:
+                self.charge(g[s], p[s], -amount)
+
+        # opera night: collect $50 from every player
+        s = card == 1
+        if s.any():
+            gs, ps = g[s], p[s]
+            for other in range(self.n_players):
+                pays = (ps != other) & ~self.bankrupt[gs, other]
+                self.money[gs[pays], ps[pays]] += 50
+                self.charge(gs[pays], np.full(pays.sum(), other), 50)
+
+        s = card == 5
+        self.go_to_jail(g[s], p[s])
+
+        s = card == 6
+        self.jail_card_community[g[s], p[s]] = True
+
+        s = card == 8
+        self.repairs(g[s], p[s], 40, 115)
+
+        s = card == 10
+        self.salary(g[s], p[s])
+        self.position[g[s], p[s]] = 0
+
+        back = card != 6
+        self.put_back(self.community_deck, self.community_top, self.community_size, g[back], card[back])
+
+    def land(self, g, p, special):
+        """Board.action, including moves caused by cards"""
+        t = self.t
+        while len(g):
+            cell = self.position[g, p]
+            kind = t.kind[cell]
+            s = kind == PROPERTY
+            if s.any():
+                self.land_property(g[s], p[s], cell[s], special[s])
+
+            s = kind == PROPERTY_TAX
+            if s.any():
+                gs, ps = g[s], p[s]
+                self.charge(gs, ps, np.minimum(self.game_conf.property_tax, self.net_worth(gs, ps) // 10))
+
+            s = kind == LUXURY_TAX
+            self.charge(g[s], p[s], self.game_conf.luxury_tax)
+
+            s = kind == GO_TO_JAIL
+            self.go_to_jail(g[s], p[s])
+
+            s = kind == COMMUNITY
+            if s.any():
+                self.community(g[s], p[s])
+
+            s = kind == CHANCE
+            if s.any():
+                g, p, special = self.chance(g[s], p[s])
+            else:
+                break
+
+    # one move of player p in games g
+
+    def pre_roll_selection(self, g, p):
+        """games where p does an optional action: rule based always, random players on a coin flip"""
+        if self.behaviours[p].random:
+            return g[self.coins(len(g))]
+        if self.behaviours[p].rule_based:
+            return g
+        return g[:0]
+
+    def jail_fine(self, g, p):
+        self.charge(g, np.full(len(g), p), self.game_conf.jail_fine)
+        self.days_in_jail[g, p] = 0
+
+    def use_jail_card(self, g, p, chance):
+        if chance:
+            self.jail_card_chance[g, p] = False
+            self.put_back(self.chance_deck, self.chance_top, self.chance_size, g, np.full(len(g), 1))
+        else:
+            self.jail_card_community[g, p] = False
+            self.put_back(self.community_deck, self.community_top, self.community_size, g, np.full(len(g), 6))
+
+    def jail(self, g, p, double):
+        """Player.make_a_move jail rules for players of g in jail
+        Returns (stays in jail, left on a double) masks"""
+        behaviour = self.behaviours[p]
+        turns = self.turns[g, p]
+        undecided = np.ones(len(g), dtype=bool)
+
+        if behaviour.advanced_jail_strat:
+            # early game: get out as soon as possible
+            early = turns <= 20
+            s = early & self.jail_card_chance[g, p]
+            self.use_jail_card(g[s], p, chance=True)
+            undecided &= ~s
+            s = early & undecided & self.jail_card_community[g, p]
+            self.use_jail_card(g[s], p, chance=False)
+            undecided &= ~s
+            s = early & undecided & (self.money[g, p] >= 140 + self.game_conf.jail_fine)
+            self.jail_fine(g[s], p)
+            undecided &= ~s
+            # mid game: as without the strategy
+            # late game: stay as long as possible, rolling for doubles
+            normal = undecided & ~early & (turns < 40)
+            rolls = undecided & ~normal
+        else:
+            normal = undecided
+            rolls = np.zeros(len(g), dtype=bool)
+
+        s = normal & self.jail_card_chance[g, p]
+        if behaviour.random:
+            s[s] = self.coins(s.sum())
+        self.use_jail_card(g[s], p, chance=True)
+        normal &= ~s
+        s = normal & self.jail_card_community[g, p]
+        if behaviour.random:
+            s[s] = self.coins(s.sum())
+        self.use_jail_card(g[s], p, chance=False)
+        normal &= ~s
+        if behaviour.random:
+            s = normal.copy()
+            s[s] = self.coins(s.sum())
+            self.jail_fine(g[s], p)
+            normal &= ~s
+        rolls |= normal
+
+        # need doubles, pay the fine on the third try
+        s = rolls & ~double
+        self.days_in_jail[g[s], p] += 1
+        stays = s & (self.days_in_jail[g, p] < 3)
+        self.jail_fine(g[s & ~stays], p)
+        left_on_double = rolls & double
+        self.days_in_jail[g[left_on_double], p] = 0
+        return stays, left_on_double
+
+    def move(self, g, p):
+        """Player.make_a_move of player p in games g; returns which games p goes again in"""
+        behaviour = self.behaviours[p]
+        self.repay_mortgages(self.pre_roll_selection(g, p), p)
+        self.build(self.pre_roll_selection(g, p), p)
+        if not behaviour.refuse_to_trade:
+            self.trade(self.pre_roll_selection(g, p), p)
+
+        dice1, dice2 = self.dice(len(g))
+        double = dice1 == dice2
+        self.turns[g, p] += 1
+
+        just_left_jail = np.zeros(len(g), dtype=bool)
+        jailed = self.in_jail[g, p]
+        if jailed.any():
+            stays, just_left_jail[jailed] = self.jail(g[jailed], p, double[jailed])
+            self.in_jail[g[jailed][~stays], p] = False
+            # players staying in jail do not move
+            moving = np.ones(len(g), dtype=bool)
+            moving[np.flatnonzero(jailed)[stays]] = False
+            g, dice1, dice2, double = g[moving], dice1[moving], dice2[moving], double[moving]
+            just_left_jail = just_left_jail[moving]
+
+        # doubles: go again, or to jail on the third one
+        go_again = double & ~just_left_jail
+        self.doubles[g, p] = np.where(go_again, self.doubles[g, p] + 1, 0)
+        third = self.doubles[g, p] == 3
+        self.go_to_jail(g[third], np.full(third.sum(), p))
+        self.doubles[g[third], p] = 0
+        go_again &= ~third
+        g, dice1, dice2, go_again = g[~third], dice1[~third], dice2[~third], go_again[~third]
+
+        position = self.position[g, p] + dice1 + dice2
+        passed_go = position >= 40
+        self.position[g, p] = position % 40
+        self.salary(g[passed_go], p)
+
+        pa = np.full(len(g), p)
+        self.land(g, pa, np.zeros(len(g), dtype=bool))
+        return g[go_again]
+
+    def play(self, n_moves):
+        """Play all games; returns final money (games x players) and last_turn of each game"""
+        last_turn = np.full(self.n_games, n_moves - 2)
+        playing = np.ones(self.n_games, dtype=bool)
+        for i in range(n_moves):
+            over = (~self.bankrupt).sum(axis=1) <= 1
+            ended = playing & over
+            last_turn[ended] = i - 1
+            playing &= ~over
+            if not playing.any():
+                break
+            for p in range(self.n_players):
+                # only continue if 2 or more players
+                g = np.flatnonzero(playing & ((~self.bankrupt).sum(axis=1) > 1) & ~self.bankrupt[:, p])
+                while len(g):
+                    g = self.move(g, p)
+                    g = g[~self.bankrupt[g, p]]
+        return self.money.copy(), last_turn
+
+
+def simulate_lockstep(n_games, behaviours, game_conf, n_moves, seed=None):
+    """Play n_games games in lockstep; returns final money (games x players)
+    and last_turn of each game, like one_game does for a single game"""
+    games = LockstepGames(n_games, behaviours, game_conf, np.random.default_rng(seed))
+    return games.play(n_moves)
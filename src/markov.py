@@ -0,0 +1,253 @@
+import functools
+
+import numpy as np
+
+from .cards import CHANCE_CARDS, COMMUNITY_CARDS
+from .layout import N_CELLS, KIND, GROUP_ID, UTIL, RENT_TABLE, COST_BASE, COST_HOUSE
+from .util.configs import GameRulesConfig
+
+# Landing probabilities of the board as a Markov chain, computed exactly
+# instead of counted over simulated games (WriteMode.CELL_HEATMAP).
+#
+# The chain follows one player, one roll of the dice at a time, with the
+# rules of Player.make_a_move and the cells:
+# - doubles roll again, the third double in a row goes to jail
+# - Go To Jail and the movement cards of Chance and Community Chest
+#   (cards are drawn at random: a deck of 16 cards, each card 1/16)
+# - in jail: "stay" rolls for doubles, and pays the fine and moves after the
+#   third roll without them (leaving on doubles does not roll again);
+#   "pay" pays the fine at once and rolls as usual
+# Going to jail on a double ends the move, but not the turn: the player rolls
+# again, in jail.
+#
+# A landing is where a roll leaves the player (after cards and Go To Jail),
+# staying in jail counts as landing on the Prison cell.
+#
+# Expected rent follows from the landings per turn, for every rent level of
+# RENT_TABLE (cards that make the rent double or 10x the dice are not counted).
+
+JAIL = 10
+# mean sum of the dice utility rent is a multiple of
+MEAN_DICE = 7
+
+# dice (sum, is_double, probability) of a roll of two dice
+def _dice():
+    counts = {}
+    for a in range(1, 7):
+        for b in range(1, 7):
+            counts[(a + b, a == b)] = counts.get((a + b, a == b), 0) + 1
+    return tuple((sum_, is_double, count / 36) for (sum_, is_double), count in sorted(counts.items()))
+
+
+DICE = _dice()
+
+# states: (cell, doubles rolled this turn) when free, then the jail states
+# (days in jail, rolls again this turn); the first roll of a turn is made from
+# a free state without doubles or from a jail state that is not the same turn
+FREE_STATES = tuple((cell, doubles) for doubles in range(3) for cell in range(N_CELLS))
+JAIL_STATES = ((0, False), (0, True), (1, False), (2, False))
+N_STATES = len(FREE_STATES) + len(JAIL_STATES)
+
+
+def _free(cell, doubles):
+    return doubles * N_CELLS + cell
+
+
+def _jail(days, same_turn=False):
+    return len(FREE_STATES) + JAIL_STATES.index((days, same_turn))
+
+
+def _nearest_rail(cell):
+    return ((cell + 4) // 10 * 10 + 5) % N_CELLS
+
+
+def _nearest_util(cell):
+    return 28 if 12 < cell <= 28 else 12
+
+
+def resolve(cell):
+    """Where landing on cell takes the player: {cell or None (jail): probability}"""
+    if KIND[cell] == "go_to_jail":
+        return {None: 1.0}
+    if KIND[cell] not in ("chance", "community"):
+        return {cell: 1.0}
+    cards = CHANCE_CARDS if KIND[cell] == "chance" else COMMUNITY_CARDS
+    outcomes = {}
+    for text, effect, value in cards:
+        if effect == "advance":
+            targets = resolve(value)
+        elif effect == "back":
+            targets = resolve(cell - value)
+        elif effect == "nearest_rail":
+            targets = {_nearest_rail(cell): 1.0}
+        elif effect == "nearest_util":
+            targets = {_nearest_util(cell): 1.0}
+        elif effect == "jail":
+            targets = {None: 1.0}
+        else:
+            targets = {cell: 1.0}
+        for target, p in targets.items():
+            outcomes[target] = outcomes.get(target, 0.0) + p / len(cards)
+    return outcomes
+
+
+def invested(cell, level):
+    """what a plot at rent level costs: the plot, and the houses of a street"""
+    if COST_HOUSE[cell] and level > 1:
+        return COST_BASE[cell] + (level - 1) * COST_HOUSE[cell]
+    return COST_BASE[cell]
+
+
+def _stationary(transition):
+    """stationary distribution of a Markov chain with a single recurrent class"""
+    # pi (P - I) = 0 and sum(pi) = 1, the sum replacing one of the equations
+    n = len(transition)
+    system = transition.T - np.eye(n)
+    system[-1] = 1
+    rhs = np.zeros(n)
+    rhs[-1] = 1
+    return np.linalg.solve(system, rhs)
+
+
+class LandingModel:
+    """Markov chain of the rolls of one player (see the top of this module)
+
+    transition: (N_STATES, N_STATES) probabilities of the state after a roll
+    cell: cell of each state, turn_start: states a turn starts from
+    per_roll: stationary probability of landing on each cell, per roll
+    per_turn: stationary expected number of landings on each cell, per turn
+    rent[cell][level]: expected rent one opponent pays per turn, by rent level
+    roi[cell][level]: rent[cell][level] per dollar the plot and its houses cost
+    """
+
+    def __init__(self, jail="stay"):
+        if jail not in ("stay", "pay"):
+            raise ValueError(f"unknown jail strategy {jail!r}")
+        self.jail = jail
+        self.cell = np.array([cell for cell, _ in FREE_STATES] + [JAIL] * len(JAIL_STATES))
+        self.turn_start = np.array(
+            [doubles == 0 for _, doubles in FREE_STATES] + [not same_turn for _, same_turn in JAIL_STATES]
+        )
+        # state -> cell
+        self.cells = np.zeros((N_STATES, N_CELLS))
+        self.cells[np.arange(N_STATES), self.cell] = 1
+
+        self.transition = np.zeros((N_STATES, N_STATES))
+        for cell, doubles in FREE_STATES:
+            self._roll(_free(cell, doubles), cell, doubles)
+        for days, same_turn in JAIL_STATES:
+            state = _jail(days, same_turn)
+            if jail == "pay":
+                self._roll(state, JAIL, 0)
+                continue
+            for sum_, is_double, p in DICE:
+                if is_double or days == 2:
+                    # out on doubles or after paying the fine, no roll again
+                    self._move(state, JAIL, sum_, 0, p)
+                else:
+                    self.transition[state, _jail(days + 1)] += p
+
+        self.per_roll = self.stationary() @ self.cells
+        self.per_turn = self._turn_stationary() @ self._turn_landings()
+
+        # plain tuples: looked up in evaluation functions
+        self.rent = tuple(
+            tuple(
+                float(self.per_turn[i]) * rent * (MEAN_DICE if GROUP_ID[i] == UTIL else 1)
+                for rent in RENT_TABLE[i]
+            )
+            for i in range(N_CELLS)
+        )
+        self.roi = tuple(
+            tuple(rent / invested(i, level) if COST_BASE[i] else 0.0 for level, rent in enumerate(self.rent[i]))
+            for i in range(N_CELLS)
+        )
+
+    # roll from a free state at cell (or leaving jail by paying the fine)
+    def _roll(self, state, cell, doubles):
+        for sum_, is_double, p in DICE:
+            if not is_double:
+                self._move(state, cell, sum_, 0, p)
+            elif doubles == 2:
+                self.transition[state, _jail(0)] += p
+            else:
+                self._move(state, cell, sum_, doubles + 1, p)
+
+    # move sum_ cells, doubles: doubles this turn after the move (0: turn ends)
+    def _move(self, state, cell, sum_, doubles, p):
+        for target, q in resolve((cell + sum_) % N_CELLS).items():
+            if target is None:
+                self.transition[state, _jail(0, doubles > 0)] += p * q
+            else:
+                self.transition[state, _free(target, doubles)] += p * q
+
+    def stationary(self):
+        """stationary distribution of the states, per roll"""
+        return _stationary(self.transition)
+
+    def roll_distribution(self, rolls, start=0):
+        """(rolls, N_CELLS) probabilities of the cell after each of the first rolls,
+        starting on cell start at the beginning of a turn"""
+        distribution = np.zeros(N_STATES)
+        distribution[_free(start, 0)] = 1
+        result = np.zeros((rolls, N_CELLS))
+        for roll in range(rolls):
+            distribution = distribution @ self.transition
+            result[roll] = distribution @ self.cells
+        return result
+
+    # Turns: a turn is the rolls from a turn start state to the next one
+    # (absorbing chain of the rolls in the middle of a turn)
+    def _turn_parts(self):
+        start, middle = self.turn_start, ~self.turn_start
+        # expected visits of the middle states before the turn ends
+        visits = np.linalg.inv(np.eye(middle.sum()) - self.transition[np.ix_(middle, middle)])
+        return start, middle, visits
+
+    def _turn_kernel(self):
+        """(start states, start states) probabilities of the start of the next turn"""
+        start, middle, visits = self._turn_parts()
+        P = self.transition
+        return P[np.ix_(start, start)] + P[np.ix_(start, middle)] @ visits @ P[np.ix_(middle, start)]
+
+    def _turn_landings(self):
+        """(start states, N_CELLS) expected landings during a turn"""
+        start, middle, visits = self._turn_parts()
+        P = self.transition
+        return (P[start] + P[np.ix_(start, middle)] @ visits @ P[middle]) @ self.cells
+
+    def _turn_stationary(self):
+        return _stationary(self._turn_kernel())
+
+    def turn_landings(self, turns, start=0):
+        """(turns, N_CELLS) expected landings on each cell in each of the first
+        turns, starting on cell start (e.g. a new game from GO)"""
+        kernel, landings = self._turn_kernel(), self._turn_landings()
+        distribution = np.zeros(len(kernel))
+        distribution[np.flatnonzero(self.turn_start) == _free(start, 0)] = 1
+        result = np.zeros((turns, N_CELLS))
+        for turn in range(turns):
+            result[turn] = distribution @ landings
+            distribution = distribution @ kernel
+        return result
+
+
+def rules_key(game_conf):
+    """the rules of a GameRulesConfig, as a hashable value"""
+    return tuple(
+        (name, repr(getattr(game_conf, name)))
+        for name in sorted(dir(game_conf))
+        if not name.startswith("_") and not callable(getattr(game_conf, name))
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _landing_model(rules, jail):
+    return LandingModel(jail)
+
+
+def landing_model(game_conf=None, jail="stay"):
+    """LandingModel of the board, computed once per set of rules and jail strategy"""
+    if game_conf is None:
+        game_conf = GameRulesConfig()
+    return _landing_model(rules_key(game_conf), jail)
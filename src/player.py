@@ -1,13 +1,15 @@
 from .cells import Property
+from .cards import CHANCE_JAIL_CARD, COMMUNITY_JAIL_CARD
+from .layout import NAME, GROUP_BY_NAME
+from .util.events import ROLL, MOVE, TRADE, BANKRUPT
+from .util.log import NULL_LOG
 from .util.configs import *
 from .util.common import *
 import progressbar
-import random
 from .board import Board
 from .expectiminimax import GetActions, powerset, ExpectiMiniMaxSearch
 from statistics import mean
 from src.util import *
-from copy import deepcopy
 import time
 
 BANK_NAME = "BANK"
@@ -18,8 +20,9 @@ class Player:
 
     def __init__(self, name, starting_money, behaviour, simulation_conf, write_log, log):
         self.name = name
-        self.write_log = write_log
-        self.log = log
+        self.index = None  # place in board.players (owner id of plots), set by Board
+        # game log, NULL_LOG if not written
+        self.log = log if write_log else NULL_LOG
         self.position = 0
         self.money = starting_money
         self.consequent_doubles = 0
@@ -32,6 +35,11 @@ class Player:
         self.plots_wanted = []
         self.plots_offered = []
         self.plots_to_build = []
+        # ledger, kept by the Board when owners, houses or mortgages change
+        self.plots = set()  # owned cells
+        self.plots_worth = 0  # plots and buildings, for net worth
+        self.houses_built = 0  # on owned plots (hotels not included)
+        self.hotels_built = 0
         self.cash_limit = behaviour.unspendable_cash
         self.behaviour = behaviour
         self.sim_conf = simulation_conf
@@ -60,6 +68,61 @@ class Player:
     def add_turn(self):
         self.turns += 1
 
+    # Save the state of the player, see Board.snapshot
+    def snapshot(self):
+        return (
+            self.position,
+            self.money,
+            self.consequent_doubles,
+            self.in_jail,
+            self.days_in_jail,
+            self.has_jail_card_chance,
+            self.has_jail_card_community,
+            self.is_bankrupt,
+            self.has_mortgages[:],
+            self.plots_wanted,
+            self.plots_offered,
+            self.plots_to_build,
+            set(self.plots),
+            self.plots_worth,
+            self.houses_built,
+            self.hotels_built,
+            self.turns,
+            self.action_list[:],
+            self.behaviour,
+            self.mcts_single_move,
+            self.log,
+        )
+
+    def restore(self, state):
+        (
+            self.position,
+            self.money,
+            self.consequent_doubles,
+            self.in_jail,
+            self.days_in_jail,
+            self.has_jail_card_chance,
+            self.has_jail_card_community,
+            self.is_bankrupt,
+            has_mortgages,
+            # replaced (not changed) on every recalculation, no need to copy
+            self.plots_wanted,
+            self.plots_offered,
+            self.plots_to_build,
+            plots,
+            self.plots_worth,
+            self.houses_built,
+            self.hotels_built,
+            self.turns,
+            action_list,
+            self.behaviour,
+            self.mcts_single_move,
+            self.log,
+        ) = state
+        self.has_mortgages = has_mortgages[:]
+        self.plots = set(plots)
+        self.action_list = action_list[:]
+
     # add money (salary, receive rent etc)
     def add_money(self, amount):
         self.money += amount
@@ -77,10 +140,11 @@ class Player:
         return amount_taken
 
     # subtract money (pay rent, buy property etc)
-    def move_to(self, position):
+    def move_to(self, position, board):
         self.position = position
-        if self.write_log:
-            self.log.write(self.name + " moves to cell " + str(position), 3)
+        if board.events:
+            board.events.add(MOVE, self.index, position)
+        self.log.write("%s moves to cell %d", 3, self.name, position)
 
     # Calulate utility of current player
     def calc_self_utility(self, board):
@@ -98,25 +162,31 @@ class Player:
     # simulate one game from already in-progress point of a game, for MCTS
     def MCTS_one_game(self, run_number, board):    
         sim_conf = SimulationConfig()
-        # create copy of board for simulation
-        game_board = deepcopy(board)
-        players = game_board.players
+        # rollouts must not replay the dice of the real game (or of each other)
+        rollout_rng = spawn_rng(board.rng, run_number)
+        players = board.players
 
         # Get and perform random available action(s) for player
-        # actions_powerset = GetActions(game_board, self)
+        # actions_powerset = GetActions(board, self)
         actions_powerset = powerset(["2waytrade", "3waytrade", "hasMortgage", "improveProperty"])
-        action_choice = random.choice(actions_powerset)
-        players[0].action_list = action_choice
+        action_choice = board.rng.choice(actions_powerset)
+
+        # play the game out on the board itself, and put it back as it was after
+        state = board.snapshot()
+        board.muteLog()
+        board.rng = rollout_rng
+
+        self.action_list = list(action_choice)
         # Perform the single specified move, then playout game as normal behavior
-        players[0].mcts_single_move = True
-        while players[0].make_a_move(game_board):
+        self.mcts_single_move = True
+        while self.make_a_move(board):
             pass
         
         # Since self got an extra turn, give everyone else a turn
-        for player in players[1::]:
+        for player in players[self.index + 1:]:
                 if not is_game_over(players):  # Only continue if 2 or more players
                     # returns True if player has to go again
-                    while player.make_a_move(game_board):
+                    while player.make_a_move(board):
                         pass
 
         last_turn = None
@@ -131,22 +201,26 @@ class Player:
             for player in players:
                 if not is_game_over(players):  # Only continue if 2 or more players
                     # returns True if player has to go again
-                    while player.make_a_move(game_board):
+                    while player.make_a_move(board):
                         pass
 
         # tests
         # for player in players:
         # player.three_way_trade(gameBoard)
 
-        # Revert back to MCTS behavior after game playout as normal player
-        player[0].behaviour = MCTSPlayerBehaviourConfig(0)
-
         # return final scores and action(s) causing that
         results = [players[i].get_money() for i in range(sim_conf.n_players)]
-        return results, last_turn, action_choice
+        self_bankrupt = self.is_bankrupt
+
+        # Back to the real game (and to MCTS behavior after game playout as normal player)
+        board.restore(state)
+        return results, last_turn, action_choice, self_bankrupt
 
+    # rollouts until the budget of the decision is spent (at least one)
     def MCTS_run_sim(self, board):
-        sim_conf = SimulationConfig()
+        sim_conf = self.sim_conf
+        if sim_conf.MCTS_simulations is None and sim_conf.decision_time is None:
+            raise ValueError("MCTS needs MCTS_simulations or decision_time")
 
         results = []
         game_lengths = []
@@ -155,21 +229,20 @@ class Player:
 
         MCTS_tracking = {}
 
-        # timeout = 1 # How long each MCTS sim will run (seconds)
-        # timeout_start = time.time()
-        for i in range(sim_conf.MCTS_simulations):
-            # If time runs out
-            # if time.time() > timeout_start + timeout:
-            #     break        
-            
+        timeout_start = time.perf_counter()
+        while i == 0 or (
+            (sim_conf.MCTS_simulations is None or i < sim_conf.MCTS_simulations)
+            and (sim_conf.decision_time is None or time.perf_counter() < timeout_start + sim_conf.decision_time)
+        ):
             # remaining players - add to the results list
             game_result = self.MCTS_one_game(i, board)
+            i += 1
             print(f"Game result: {game_result}")
             results.append(game_result)
 
             # determine winner
-            ending_net_worth, last_turn, actions = game_result
-            if (last_turn != sim_conf.MCTS_simulations - 2):
+            ending_net_worth, last_turn, actions, self_bankrupt = game_result
+            if (last_turn != sim_conf.n_moves - 2):
                 game_lengths.append(last_turn)
             
             winner_result_map = list(enumerate(ending_net_worth))
@@ -182,12 +255,12 @@ class Player:
 
             # Add/update actions and result from MCTS simulated game based on win or loss
             if tuple(actions) in MCTS_tracking:
-                if self.is_bankrupt:
+                if self_bankrupt:
                     MCTS_tracking[tuple(actions)] -= 1
                 else:
                     MCTS_tracking[tuple(actions)] += 2
             else:
-                if self.is_bankrupt:
+                if self_bankrupt:
                     MCTS_tracking[tuple(actions)] = 1
                 else:
                     MCTS_tracking[tuple(actions)] = 2
@@ -212,12 +285,12 @@ class Player:
     def takeAction(self, board):
         if self.is_bankrupt:
             return
-        if (self.behaviour.random and random.randint(0, 1)) or "hasMortgage" in self.action_list or self.behaviour.rule_based:
+        if (self.behaviour.random and board.rng.randint(0, 1)) or "hasMortgage" in self.action_list or self.behaviour.rule_based:
             while self.repay_mortgage(board):
                     board.recalculateAfterPropertyChange()
 
         # build houses while you have spare cash
-        if (self.behaviour.random and random.randint(0, 1)) or "improveProperty" in self.action_list or self.behaviour.rule_based:
+        if (self.behaviour.random and board.rng.randint(0, 1)) or "improveProperty" in self.action_list or self.behaviour.rule_based:
             while board.improveProperty(self, board, self.money - self.cash_limit):
                 pass
         
@@ -225,7 +298,7 @@ class Player:
         # Calculate property player wants to get and ready to give away
         if self.behaviour.refuse_to_trade:
                 pass  # Experiement: do not trade
-        elif (not self.behaviour.refuse_to_trade and ((self.behaviour.random and random.randint(0, 1))) or self.behaviour.rule_based):
+        elif (not self.behaviour.refuse_to_trade and ((self.behaviour.random and board.rng.randint(0, 1))) or self.behaviour.rule_based):
             #  Make a trade
             if (
                 not self.two_way_trade(board)
@@ -238,15 +311,10 @@ class Player:
         if ("3waytrade" in self.action_list):
             self.three_way_trade(board)
     # make a move procedure
-    def static_make_a_move(self, board, dieval):
+    # (for the search: the dice are given)
+    def static_make_a_move(self, board, dice1, dice2):
         goAgain = False
         justLeftJail = False
-        if dieval == 2:
-            dice1 = 0
-            dice2 = 2
-        else:
-            dice1 = dieval-1
-            dice2  = 1
         # Only proceed if player is alive (not bankrupt)
         if self.is_bankrupt:
             return
@@ -255,12 +323,12 @@ class Player:
 
         # non-board actions: Trade, unmortgage, build
         # repay mortgage if you have X times more cash than mortgage cost
-        if (self.behaviour.random and random.randint(0, 1)) or "hasMortgage" in self.action_list or self.behaviour.rule_based:
+        if (self.behaviour.random and board.rng.randint(0, 1)) or "hasMortgage" in self.action_list or self.behaviour.rule_based:
             while self.repay_mortgage(board):
                     board.recalculateAfterPropertyChange()
 
         # build houses while you have spare cash
-        if (self.behaviour.random and random.randint(0, 1)) or "improveProperty" in self.action_list or self.behaviour.rule_based:
+        if (self.behaviour.random and board.rng.randint(0, 1)) or "improveProperty" in self.action_list or self.behaviour.rule_based:
             while board.improveProperty(self, board, self.money - self.cash_limit):
                 pass
         
@@ -268,7 +336,7 @@ class Player:
         # Calculate property player wants to get and ready to give away
         if self.behaviour.refuse_to_trade:
                 pass  # Experiement: do not trade
-        elif (not self.behaviour.refuse_to_trade and ((self.behaviour.random and random.randint(0, 1))) or self.behaviour.rule_based):
+        elif (not self.behaviour.refuse_to_trade and ((self.behaviour.random and board.rng.randint(0, 1))) or self.behaviour.rule_based):
             #  Make a trade
             if (
                 not self.two_way_trade(board)
@@ -292,15 +360,15 @@ class Player:
                 # Try using GOOJF cards first
                 if self.has_jail_card_chance:
                     self.has_jail_card_chance = False
-                    board.chanceCards.append(1)  # return the card
+                    board.chanceCards.append(CHANCE_JAIL_CARD)  # return the card
                     self.log.write(
-                        self.name + " uses the Chance GOOJF card to get out of jail", 3
+                        "%s uses the Chance GOOJF card to get out of jail", 3, self.name,
                     )
                 elif self.has_jail_card_community:
                     self.has_jail_card_community = False
-                    board.communityCards.append(6)  # return the card
+                    board.communityCards.append(COMMUNITY_JAIL_CARD)  # return the card
                     self.log.write(
-                    self.name + " uses the Community GOOJF card to get out of jail", 3
+                        "%s uses the Community GOOJF card to get out of jail", 3, self.name,
                     )
                 # Else if you have enough to buy a property outside of it, pay fine
                 elif self.money >= (140 + board.game_conf.jail_fine):
@@ -308,21 +376,21 @@ class Player:
                         board.game_conf.jail_fine, board, BANK_NAME
                     )  # get out on fine
                     self.days_in_jail = 0
-                    self.log.write(self.name + " pays fine and gets out of jail", 3)
+                    self.log.write("%s pays fine and gets out of jail", 3, self.name)
                 # If no other methods work, doubles needed
                 elif dice1 != dice2:
                     self.days_in_jail += 1
                     if self.days_in_jail < 3:
-                        self.log.write(self.name + " spends this turn in jail", 3)
+                        self.log.write("%s spends this turn in jail", 3, self.name)
                         return False  # skip turn in jail
                     else:
                         self.take_money(
                             board.game_conf.jail_fine, board, BANK_NAME
                         )  # get out on fine
                         self.days_in_jail = 0
-                        self.log.write(self.name + " pays fine and gets out of jail", 3)
+                        self.log.write("%s pays fine and gets out of jail", 3, self.name)
                 else:  # get out of jail on doubles
-                    self.log.write(self.name + " rolls double and gets out of jail", 3)
+                    self.log.write("%s rolls double and gets out of jail", 3, self.name)
                     self.days_in_jail = 0
                     goAgain = False
                     justLeftJail = True
@@ -331,53 +399,53 @@ class Player:
                 if dice1 != dice2:
                     self.days_in_jail += 1
                     if self.days_in_jail < 3:
-                        self.log.write(self.name + " spends this turn in jail", 3)
+                        self.log.write("%s spends this turn in jail", 3, self.name)
                         return False  # skip turn in jail
                     else:
                         self.take_money(
                             board.game_conf.jail_fine, board, BANK_NAME
                         )  # get out on fine
                         self.days_in_jail = 0
-                        self.log.write(self.name + " pays fine and gets out of jail", 3)
+                        self.log.write("%s pays fine and gets out of jail", 3, self.name)
                 else:  # get out of jail on doubles
-                    self.log.write(self.name + " rolls double and gets out of jail", 3)
+                    self.log.write("%s rolls double and gets out of jail", 3, self.name)
                     self.days_in_jail = 0
                     goAgain = False
                     justLeftJail = True
             # If not advanced strat or midgame, stay in jail unless GOOJF card
             else:
-                if self.has_jail_card_chance and ((self.behaviour.random and random.randint(0, 1)) or not self.behaviour.random):
+                if self.has_jail_card_chance and ((self.behaviour.random and board.rng.randint(0, 1)) or not self.behaviour.random):
                     self.has_jail_card_chance = False
-                    board.chanceCards.append(1)  # return the card
+                    board.chanceCards.append(CHANCE_JAIL_CARD)  # return the card
                     self.log.write(
-                        self.name + " uses the Chance GOOJF card to get out of jail", 3
+                        "%s uses the Chance GOOJF card to get out of jail", 3, self.name,
                     )
-                elif self.has_jail_card_community and ((self.behaviour.random and random.randint(0, 1)) or not self.behaviour.random):
+                elif self.has_jail_card_community and ((self.behaviour.random and board.rng.randint(0, 1)) or not self.behaviour.random):
                     self.has_jail_card_community = False
-                    board.communityCards.append(6)  # return the card
+                    board.communityCards.append(COMMUNITY_JAIL_CARD)  # return the card
                     self.log.write(
-                        self.name + " uses the Community GOOJF card to get out of jail", 3
+                        "%s uses the Community GOOJF card to get out of jail", 3, self.name,
                     )
                 # If random behavior, random chance to pay fine
-                elif self.behaviour.random and random.randint(0, 1):
+                elif self.behaviour.random and board.rng.randint(0, 1):
                     self.take_money(
                         board.game_conf.jail_fine, board, BANK_NAME
                     )  # get out on fine
                     self.days_in_jail = 0
-                    self.log.write(self.name + " pays fine and gets out of jail", 3)
+                    self.log.write("%s pays fine and gets out of jail", 3, self.name)
                 elif dice1 != dice2:
                     self.days_in_jail += 1
                     if self.days_in_jail < 3:
-                        self.log.write(self.name + " spends this turn in jail", 3)
+                        self.log.write("%s spends this turn in jail", 3, self.name)
                         return False  # skip turn in jail
                     else:
                         self.take_money(
                             board.game_conf.jail_fine, board, BANK_NAME
                         )  # get out on fine
                         self.days_in_jail = 0
-                        self.log.write(self.name + " pays fine and gets out of jail", 3)
+                        self.log.write("%s pays fine and gets out of jail", 3, self.name)
                 else:  # get out of jail on doubles
-                    self.log.write(self.name + " rolls double and gets out of jail", 3)
+                    self.log.write("%s rolls double and gets out of jail", 3, self.name)
                     self.days_in_jail = 0
                     goAgain = False
                     justLeftJail = True
@@ -387,13 +455,11 @@ class Player:
         if dice1 == dice2 and not self.in_jail and not justLeftJail:
             goAgain = True  # go again if doubles
             self.consequent_doubles += 1
-            self.log.write(
-                "it's a number " + str(self.consequent_doubles) + " double in a row", 3
-            )
+            self.log.write("it's a number %d double in a row", 3, self.consequent_doubles)
             if self.consequent_doubles == 3:  # but go to jail if 3 times in a row
                 self.in_jail = True
-                self.log.write(self.name + " goes to jail on consequtive doubles", 3)
-                self.move_to(10)
+                self.log.write("%s goes to jail on consequtive doubles", 3, self.name)
+                self.move_to(10, board)
                 self.consequent_doubles = 0
                 return False
         else:
@@ -408,9 +474,7 @@ class Player:
             self.position = self.position - 40
             # get salary for passing GO
             self.add_money(board.game_conf.salary)
-            self.log.write(
-                self.name + " gets salary: $" + str(board.game_conf.salary), 3
-            )
+            self.log.write("%s gets salary: $%d", 3, self.name, board.game_conf.salary)
 
 
         # perform action of the cell player ended on
@@ -420,7 +484,7 @@ class Player:
             self.action_list.clear()
 
         if goAgain:
-            self.log.write(self.name + " will go again now", 3)
+            self.log.write("%s will go again now", 3, self.name)
             return True  # make a move again
         return False  # no extra move
 
@@ -444,21 +508,20 @@ class Player:
             val, actions = ExpectiMiniMaxSearch(None,0,board,self)
             self.action_list = actions
 
-        # to track the popular cells to land
-        if self.sim_conf.write_mode == WriteMode.CELL_HEATMAP and self.write_log:
-            self.log.write(str(self.position), data=True)
+        # to track the popular cells to land (not GO at the start of the game)
+        if board.landings and self.turns:
+            board.landings.land(self.index, self.position)
 
-        if self.write_log:
-            self.log.write("Player " + self.name + " goes:", 2)
+        self.log.write("Player %s goes:", 2, self.name)
 
         # non-board actions: Trade, unmortgage, build
         # repay mortgage if you have X times more cash than mortgage cost
-        if (self.behaviour.random and random.randint(0, 1)) or "hasMortgage" in self.action_list or self.behaviour.rule_based:
+        if (self.behaviour.random and board.rng.randint(0, 1)) or "hasMortgage" in self.action_list or self.behaviour.rule_based:
             while self.repay_mortgage(board):
                 board.recalculateAfterPropertyChange()
 
         # build houses while you have spare cash
-        if (self.behaviour.random and random.randint(0, 1)) or "improveProperty" in self.action_list or self.behaviour.rule_based:
+        if (self.behaviour.random and board.rng.randint(0, 1)) or "improveProperty" in self.action_list or self.behaviour.rule_based:
             while board.improveProperty(self, board, self.money - self.cash_limit):
                 pass
         
@@ -466,7 +529,7 @@ class Player:
         # Calculate property player wants to get and ready to give away
         if self.behaviour.refuse_to_trade:
                 pass  # Experiement: do not trade
-        elif (self.behaviour.random and random.randint(0, 1)) or self.behaviour.rule_based or "2waytrade" in self.action_list:
+        elif (self.behaviour.random and board.rng.randint(0, 1)) or self.behaviour.rule_based or "2waytrade" in self.action_list:
             #  Make a trade, if not able to do 2 try 3 player
             if not self.two_way_trade(board):
                 if ( # If expectiminimax behaviour
@@ -483,21 +546,13 @@ class Player:
                     self.three_way_trade(board)
 
         # roll dice
-        dice1 = random.randint(1, 6)
-        dice2 = random.randint(1, 6)
+        dice1 = board.rng.randint(1, 6)
+        dice2 = board.rng.randint(1, 6)
     
 
-        if self.write_log:
-            self.log.write(
-            self.name
-            + " rolls "
-            + str(dice1)
-            + " and "
-            + str(dice2)
-            + " = "
-            + str(dice1 + dice2),
-            3,
-            )
+        self.log.write("%s rolls %d and %d = %d", 3, self.name, dice1, dice2, dice1 + dice2)
+        if board.events:
+            board.events.add(ROLL, self.index, self.position, dice1, dice1 + dice2)
         self.add_turn()
 
         # Jail situation:
@@ -508,43 +563,37 @@ class Player:
                 # Try using GOOJF cards first
                 if self.has_jail_card_chance:
                     self.has_jail_card_chance = False
-                    board.chanceCards.append(1)  # return the card
-                    if self.write_log:
-                        self.log.write(
-                            self.name + " uses the Chance GOOJF card to get out of jail", 3
-                        )
+                    board.chanceCards.append(CHANCE_JAIL_CARD)  # return the card
+                    self.log.write(
+                        "%s uses the Chance GOOJF card to get out of jail", 3, self.name,
+                    )
                 elif self.has_jail_card_community:
                     self.has_jail_card_community = False
-                    board.communityCards.append(6)  # return the card
-                    if self.write_log:
-                        self.log.write(
-                            self.name + " uses the Community GOOJF card to get out of jail", 3
-                        )
+                    board.communityCards.append(COMMUNITY_JAIL_CARD)  # return the card
+                    self.log.write(
+                        "%s uses the Community GOOJF card to get out of jail", 3, self.name,
+                    )
                 # Else if you have enough to buy a property outside of it, pay fine
                 elif self.money >= (140 + board.game_conf.jail_fine):
                     self.take_money(
                         board.game_conf.jail_fine, board, BANK_NAME
                     )  # get out on fine
                     self.days_in_jail = 0
-                    if self.write_log:
-                        self.log.write(self.name + " pays fine and gets out of jail", 3)
+                    self.log.write("%s pays fine and gets out of jail", 3, self.name)
                 # If no other methods work, doubles needed
                 elif dice1 != dice2:
                     self.days_in_jail += 1
                     if self.days_in_jail < 3:
-                        if self.write_log:
-                            self.log.write(self.name + " spends this turn in jail", 3)
+                        self.log.write("%s spends this turn in jail", 3, self.name)
                         return False  # skip turn in jail
                     else:
                         self.take_money(
                             board.game_conf.jail_fine, board, BANK_NAME
                         )  # get out on fine
                         self.days_in_jail = 0
-                        if self.write_log:
-                            self.log.write(self.name + " pays fine and gets out of jail", 3)
+                        self.log.write("%s pays fine and gets out of jail", 3, self.name)
                 else:  # get out of jail on doubles
-                    if self.write_log:
-                        self.log.write(self.name + " rolls double and gets out of jail", 3)
+                    self.log.write("%s rolls double and gets out of jail", 3, self.name)
                     self.days_in_jail = 0
                     goAgain = False
                     justLeftJail = True
@@ -553,62 +602,53 @@ class Player:
                 if dice1 != dice2:
                     self.days_in_jail += 1
                     if self.days_in_jail < 3:
-                        if self.write_log:
-                            self.log.write(self.name + " spends this turn in jail", 3)
+                        self.log.write("%s spends this turn in jail", 3, self.name)
                         return False  # skip turn in jail
                     else:
                         self.take_money(
                             board.game_conf.jail_fine, board, BANK_NAME
                         )  # get out on fine
                         self.days_in_jail = 0
-                        if self.write_log:
-                            self.log.write(self.name + " pays fine and gets out of jail", 3)
+                        self.log.write("%s pays fine and gets out of jail", 3, self.name)
                 else:  # get out of jail on doubles
-                    if self.write_log:
-                        self.log.write(self.name + " rolls double and gets out of jail", 3)
+                    self.log.write("%s rolls double and gets out of jail", 3, self.name)
                     self.days_in_jail = 0
                     goAgain = False
                     justLeftJail = True
             # If not advanced strat or midgame, stay in jail unless GOOJF card
             else:
-                if self.has_jail_card_chance and ((self.behaviour.random and random.randint(0, 1)) or not self.behaviour.random):
+                if self.has_jail_card_chance and ((self.behaviour.random and board.rng.randint(0, 1)) or not self.behaviour.random):
                     self.has_jail_card_chance = False
-                    board.chanceCards.append(1)  # return the card
-                    if self.write_log:
-                        self.log.write(
-                            self.name + " uses the Chance GOOJF card to get out of jail", 3
-                        )
-                elif self.has_jail_card_community and ((self.behaviour.random and random.randint(0, 1)) or not self.behaviour.random):
+                    board.chanceCards.append(CHANCE_JAIL_CARD)  # return the card
+                    self.log.write(
+                        "%s uses the Chance GOOJF card to get out of jail", 3, self.name,
+                    )
+                elif self.has_jail_card_community and ((self.behaviour.random and board.rng.randint(0, 1)) or not self.behaviour.random):
                     self.has_jail_card_community = False
-                    board.communityCards.append(6)  # return the card
-                    if self.write_log:
-                        self.log.write(
-                            self.name + " uses the Community GOOJF card to get out of jail", 3
-                        )
+                    board.communityCards.append(COMMUNITY_JAIL_CARD)  # return the card
+                    self.log.write(
+                        "%s uses the Community GOOJF card to get out of jail", 3, self.name,
+                    )
                 # If random behavior, random chance to pay fine
-                elif self.behaviour.random and random.randint(0, 1):
+                elif self.behaviour.random and board.rng.randint(0, 1):
                     self.take_money(
                         board.game_conf.jail_fine, board, BANK_NAME
                     )  # get out on fine
                     self.days_in_jail = 0
-                    if self.write_log:
-                        self.log.write(self.name + " pays fine and gets out of jail", 3)
+                    self.log.write("%s pays fine and gets out of jail", 3, self.name)
                 elif dice1 != dice2:
                     self.days_in_jail += 1
                     if self.days_in_jail < 3:
-                        if self.write_log:
-                            self.log.write(self.name + " spends this turn in jail", 3)
+                        self.log.write("%s spends this turn in jail", 3, self.name)
                         return False  # skip turn in jail
                     else:
                         self.take_money(
                             board.game_conf.jail_fine, board, BANK_NAME
                         )  # get out on fine
                         self.days_in_jail = 0
-                        if self.write_log:
-                            self.log.write(self.name + " pays fine and gets out of jail", 3)
+                        self.log.write("%s pays fine and gets out of jail", 3, self.name)
                 else:  # get out of jail on doubles
-                    if self.write_log:
-                        self.log.write(self.name + " rolls double and gets out of jail", 3)
+                    self.log.write("%s rolls double and gets out of jail", 3, self.name)
                     self.days_in_jail = 0
                     goAgain = False
                     justLeftJail = True
@@ -618,15 +658,11 @@ class Player:
         if dice1 == dice2 and not self.in_jail and not justLeftJail:
             goAgain = True  # go again if doubles
             self.consequent_doubles += 1
-            if self.write_log:
-                self.log.write(
-                    "it's a number " + str(self.consequent_doubles) + " double in a row", 3
-                )
+            self.log.write("it's a number %d double in a row", 3, self.consequent_doubles)
             if self.consequent_doubles == 3:  # but go to jail if 3 times in a row
                 self.in_jail = True
-                if self.write_log:
-                    self.log.write(self.name + " goes to jail on consequtive doubles", 3)
-                self.move_to(10)
+                self.log.write("%s goes to jail on consequtive doubles", 3, self.name)
+                self.move_to(10, board)
                 self.consequent_doubles = 0
                 return False
         else:
@@ -641,26 +677,14 @@ class Player:
             self.position = self.position - 40
             # get salary for passing GO
             self.add_money(board.game_conf.salary)
-            if self.write_log:
-                self.log.write(
-                    self.name + " gets salary: $" + str(board.game_conf.salary), 3
-                )
-
-        if self.write_log:
-                self.log.write(
-                    self.name
-                    + " moves to cell "
-                    + str(self.position)
-                    + ": "
-                    + board.b[self.position].name
-                    + (
-                        " (" + board.b[self.position].owner.name + ")"
-                        if type(board.b[self.position]) == Property
-                        and board.b[self.position].owner != ""
-                        else ""
-                    ),
-                    3,
-                )
+            self.log.write("%s gets salary: $%d", 3, self.name, board.game_conf.salary)
+
+        if board.events:
+            board.events.add(MOVE, self.index, self.position)
+        self.log.write(
+            "%s moves to cell %d: %s%s", 3,
+            self.name, self.position, board.b[self.position].name, board.owner_names[board.owner_id[self.position]],
+        )
 
         # perform action of the cell player ended on
         board.action(self, self.position)
@@ -673,8 +697,7 @@ class Player:
             print("MCTS player switched to normal")
 
         if goAgain:
-            if self.write_log:
-                self.log.write(self.name + " will go again now", 3)
+            self.log.write("%s will go again now", 3, self.name)
             return True  # make a move again
         return False  # no extra move
 
@@ -691,30 +714,15 @@ class Player:
 
     # Chance card make general repairs: 25/house 100/hotel
     def make_repairs(self, board, repairtype):
-        repairCost = 0
         if repairtype == "chance":
             perHouse, perHotel = 25, 100
         else:
             perHouse, perHotel = 40, 115
-        if self.write_log:
-                self.log.write(
-                    "Repair cost: $"
-                    + str(perHouse)
-                    + " per house, $"
-                    + str(perHotel)
-                    + " per hotel",
-                    3,
-                )
-
-        for plot in board.b:
-            if type(plot) == Property and plot.owner == self:
-                if plot.hasHouses == 5:
-                    repairCost += perHotel
-                else:
-                    repairCost += plot.hasHouses * perHouse
+        self.log.write("Repair cost: $%s per house, $%s per hotel", 3, perHouse, perHotel)
+
+        repairCost = self.houses_built * perHouse + self.hotels_built * perHotel
         self.take_money(repairCost, board, BANK_NAME)
-        if self.write_log:
-            self.log.write(self.name + " pays total repair costs $" + str(repairCost), 3)
+        self.log.write("%s pays total repair costs $%s", 3, self.name, repairCost)
 
     # check if player has negative money
     # if so, start selling stuff and mortgage plots
@@ -722,48 +730,39 @@ class Player:
 
     def check_bankruptcy(self, board, bankrupter):
         if self.money < 0:
-            if self.write_log:
-                self.log.write(self.name + " doesn't have enough cash", 3)
+            self.log.write("%s doesn't have enough cash", 3, self.name)
             while self.money < 0:
                 worstAsset = board.choosePropertyToMortgageDowngrade(self)
                 if worstAsset == False:
                     self.is_bankrupt = True
+                    if board.events:
+                        board.events.add(
+                            BANKRUPT, self.index, -1, bankrupter.index if isinstance(bankrupter, Player) else -1
+                        )
                     if (
                         bankrupter == BANK_NAME
                         or board.game_conf.bankruptcy_goes_to_bank
                     ):
                         board.sellAll(self)
-                        if self.write_log:
-                            self.log.write(
-                                "The bank bankrupted "
-                                + self.name
-                                + ". Their property is back on the board",
-                                3,
-                            )
+                        self.log.write(
+                            "The bank bankrupted %s. Their property is back on the board", 3, self.name,
+                        )
                     elif bankrupter == "noone":
-                        if self.write_log:
-                            self.log.write("that shouldn't have happened...", 3)
+                        self.log.write("that shouldn't have happened...", 3)
                     else:
                         board.sellAll(self, bankrupter)
-                        if self.write_log:
-                            self.log.write(
-                                self.name
-                                + " is now bankrupt. "
-                                + bankrupter.name
-                                + " bankrupted them",
-                                3,
-                            )
+                        self.log.write(
+                            "%s is now bankrupt. %s bankrupted them", 3, self.name, bankrupter.name,
+                        )
                     board.recalculateAfterPropertyChange()
 
                     # to track players who lost
                     if self.sim_conf.write_mode == WriteMode.LOSERS:
-                        if self.write_log:
-                            self.log.write(self.name, data=True)
+                        self.log.write(self.name, data=True)
 
                     # to track cells to land one last time
-                    if self.sim_conf.write_mode == WriteMode.CELL_HEATMAP:
-                        if self.write_log:
-                            self.log.write(str(self.position), data=True)
+                    if board.landings:
+                        board.landings.land(self.index, self.position)
 
                     return
                 else:
@@ -772,15 +771,7 @@ class Player:
 
     # Calculate net worth of a player (for property tax)
     def net_worth(self, board):
-        worth = self.money
-        for plot in board.b:
-            if type(plot) == Property and plot.owner == self:
-                if plot.isMortgaged:
-                    worth += plot.cost_base // 2
-                else:
-                    worth += plot.cost_base
-                    worth += plot.cost_house * plot.hasHouses
-        return worth
+        return self.money + self.plots_worth
 
     # Behaviours
 
@@ -796,10 +787,7 @@ class Player:
     # does player want to buy a property
     def wants_to_buy(self, base_cost, cost, group, board):
         if self.name == "exp" and group == expRefuseProperty:
-            if self.write_log:
-                self.log.write(
-                    self.name + " refuses to buy " + expRefuseProperty + " property", 3
-                )
+            self.log.write("%s refuses to buy %s property", 3, self.name, expRefuseProperty)
             return False
 
         # If a player already has a property then they
@@ -808,16 +796,8 @@ class Player:
         # that property. Otherwise they are only
         # willing to pay up to the bank value of the
         # property.
-        groups = {}
-        for plot in board.b:
-            if plot.group == group:
-                if plot.group in groups:
-                    groups[plot.group][0] += 1
-                else:
-                    groups[plot.group] = [1, 0]
-                if plot.owner == self:
-                    groups[plot.group][1] += 1
-        if groups[group][1] >= 1:
+        owned = board.owned_in_group[self.index][GROUP_BY_NAME[group]]
+        if owned >= 1:
             if self.money > cost + self.cash_limit and cost <= base_cost * 2:
                 return True
             else:
@@ -868,18 +848,10 @@ class Player:
                     TheyWant in self.plots_offered
                     and board.b[IWant].group != board.b[TheyWant].group
                 ):  # prevent exchanging in groups of 2
-                    if self.write_log:
-                        self.log.write(
-                            "Trade match: "
-                            + self.name
-                            + " wants "
-                            + board.b[IWant].name
-                            + ", and "
-                            + ownerOfWanted.name
-                            + " wants "
-                            + board.b[TheyWant].name,
-                            3,
-                        )
+                    self.log.write(
+                        "Trade match: %s wants %s, and %s wants %s", 3,
+                        self.name, NAME[IWant], ownerOfWanted.name, NAME[TheyWant],
+                    )
 
                     # Compensate that one plot is cheaper than another one
                     if board.b[IWant].cost_base < board.b[TheyWant].cost_base:
@@ -889,18 +861,16 @@ class Player:
                     priceDiff = (
                         board.b[expensiveOne].cost_base - board.b[cheaperOne].cost_base
                     )
-                    if self.write_log:
-                        self.log.write("Price difference is $" + str(priceDiff), 3)
+                    self.log.write("Price difference is $%d", 3, priceDiff)
 
                     # make sure they they can pay the money
                     if (
                         board.b[cheaperOne].owner.money - priceDiff
                         >= board.b[cheaperOne].owner.cash_limit
                     ):
-                        if self.write_log:
-                            self.log.write(
-                                "We have a deal. Money and property changed hands", 3
-                            )
+                        self.log.write(
+                            "We have a deal. Money and property changed hands", 3
+                        )
                         # Money and property change hands
                         board.b[cheaperOne].owner.take_money(priceDiff, board, "noone")
                         board.b[expensiveOne].owner.add_money(priceDiff)
@@ -908,6 +878,12 @@ class Player:
                             board.b[expensiveOne].owner,
                             board.b[cheaperOne].owner,
                         )
+                        if board.events:
+                            # the owner of the cheaper plot paid the difference for the expensive one
+                            board.events.add(
+                                TRADE, board.owner_id[expensiveOne], expensiveOne, board.owner_id[cheaperOne], priceDiff
+                            )
+                            board.events.add(TRADE, board.owner_id[cheaperOne], cheaperOne, board.owner_id[expensiveOne])
                         trade_happened = True
 
                         # recalculated wanted and offered plots
@@ -981,42 +957,27 @@ class Player:
                             and first_owner_of_wanted.money - topay3
                             > second_owner_of_wanted.cash_limit
                         ):
-                            if self.write_log:
-                                self.log.write("Three way trade: ", 3)
-                                self.log.write(
-                                    self.name
-                                    + " gives "
-                                    + board.b[wanted3].name
-                                    + " and $"
-                                    + str(topay1)
-                                    + " for "
-                                    + board.b[wanted1].name,
-                                    4,
-                                )
-                                self.log.write(
-                                    first_owner_of_wanted.name
-                                    + " gives "
-                                    + board.b[wanted1].name
-                                    + " and $"
-                                    + str(topay2)
-                                    + " for "
-                                    + board.b[wanted2].name,
-                                    4,
-                                )
-                                self.log.write(
-                                    second_owner_of_wanted.name
-                                    + " gives "
-                                    + board.b[wanted2].name
-                                    + " and $"
-                                    + str(topay3)
-                                    + " for "
-                                    + board.b[wanted3].name,
-                                    4,
-                                )
+                            self.log.write("Three way trade: ", 3)
+                            self.log.write(
+                                "%s gives %s and $%d for %s", 4,
+                                self.name, NAME[wanted3], topay1, NAME[wanted1],
+                            )
+                            self.log.write(
+                                "%s gives %s and $%d for %s", 4,
+                                first_owner_of_wanted.name, NAME[wanted1], topay2, NAME[wanted2],
+                            )
+                            self.log.write(
+                                "%s gives %s and $%d for %s", 4,
+                                second_owner_of_wanted.name, NAME[wanted2], topay3, NAME[wanted3],
+                            )
                             # Money and property change hands
                             board.b[wanted1].owner = self
                             board.b[wanted2].owner = first_owner_of_wanted
                             board.b[wanted3].owner = second_owner_of_wanted
+                            if board.events:
+                                board.events.add(TRADE, self.index, wanted1, first_owner_of_wanted.index, topay1)
+                                board.events.add(TRADE, first_owner_of_wanted.index, wanted2, second_owner_of_wanted.index, topay2)
+                                board.events.add(TRADE, second_owner_of_wanted.index, wanted3, self.index, topay3)
                             self.take_money(
                                 topay1, board, "noone"
                             )  # guaranteed to have enough money
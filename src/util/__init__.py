@@ -1,4 +1,9 @@
-from .common import *
-from .log import Log
-from .analyze_results import *
-from .configs import *
+from .common import *
+from .log import Log, NullLog, NULL_LOG
+from .analyze_results import *
+from .configs import *
+from .aggregate import *
+from .seeding import *
+from .checkpoint import *
+from .events import *
+from .heatmap import *
@@ -0,0 +1,274 @@
+import json
+import math
+import os
+from collections import Counter
+
+from .heatmap import LandingHeatmap
+
+# width of the net worth sketch buckets, in dollars
+NET_WORTH_BUCKET = 100
+
+
+class SimulationAggregate:
+    """Running summary of any number of games, in constant memory
+
+    Workers fill one of these for their block of games and send only it
+    back to the parent, which merges the partial aggregates together.
+    """
+
+    def __init__(self, n_players, n_moves):
+        self.n_players = n_players
+        self.n_moves = n_moves
+        self.n_games = 0
+        self.winners = [0] * n_players
+        self.unfinished = 0
+        self.game_lengths = Counter()  # last_turn -> number of games
+        # running sums of finished game lengths and of their squares
+        # (exact integers, so merging blocks in any order gives the same result)
+        self.length_sum = 0
+        self.length_sum_sq = 0
+        # number of games by number of players still in the game at the end
+        self.remaining_players = [0] * (n_players + 1)
+        # per seat: final score bucket -> number of games
+        self.net_worth = [Counter() for _ in range(n_players)]
+        # LandingHeatmap of the games (WriteMode.CELL_HEATMAP), None if not counted
+        self.heatmap = None
+
+    # add the result of one game
+    # landings: LandingCounter of the game, if the heatmap is counted
+    def add_game(self, ending_net_worth, last_turn, landings=None):
+        self.n_games += 1
+        if landings is not None:
+            self.heatmap.add_game(landings)
+
+        # the game has a winner if everyone else is in debt
+        winner = max(range(self.n_players), key=lambda i: ending_net_worth[i])
+        if all(
+            ending_net_worth[i] < 0 for i in range(self.n_players) if i != winner
+        ):
+            self.winners[winner] += 1
+
+        alive = sum(1 for score in ending_net_worth if score >= 0)
+        self.remaining_players[alive] += 1
+
+        for i in range(self.n_players):
+            self.net_worth[i][ending_net_worth[i] // NET_WORTH_BUCKET] += 1
+
+        # games that hit the move limit do not count towards game length
+        if last_turn == self.n_moves - 2:
+            self.unfinished += 1
+        else:
+            self.game_lengths[last_turn] += 1
+            self.length_sum += last_turn
+            self.length_sum_sq += last_turn * last_turn
+
+    # add results of another (partial) aggregate to this one
+    def merge(self, other):
+        self.n_games += other.n_games
+        for i in range(self.n_players):
+            self.winners[i] += other.winners[i]
+            self.net_worth[i].update(other.net_worth[i])
+        for i in range(self.n_players + 1):
+            self.remaining_players[i] += other.remaining_players[i]
+        self.unfinished += other.unfinished
+        self.length_sum += other.length_sum
+        self.length_sum_sq += other.length_sum_sq
+        self.game_lengths.update(other.game_lengths)
+        if other.heatmap is not None:
+            if self.heatmap is None:
+                self.heatmap = other.heatmap.copy()
+            else:
+                self.heatmap.merge(other.heatmap)
+        return self
+
+    def to_dict(self):
+        """Plain (JSON-friendly) representation, see from_dict"""
+        return {
+            "n_players": self.n_players,
+            "n_moves": self.n_moves,
+            "n_games": self.n_games,
+            "winners": self.winners,
+            "unfinished": self.unfinished,
+            "game_lengths": dict(self.game_lengths),
+            "length_sum": self.length_sum,
+            "length_sum_sq": self.length_sum_sq,
+            "remaining_players": self.remaining_players,
+            "net_worth": [dict(sketch) for sketch in self.net_worth],
+            "heatmap": None if self.heatmap is None else self.heatmap.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        aggregate = cls(data["n_players"], data["n_moves"])
+        aggregate.n_games = data["n_games"]
+        aggregate.winners = list(data["winners"])
+        aggregate.unfinished = data["unfinished"]
+        # JSON turns integer keys into strings
+        aggregate.game_lengths = Counter(
+            {int(k): v for k, v in data["game_lengths"].items()}
+        )
+        aggregate.length_sum = data["length_sum"]
+        aggregate.length_sum_sq = data["length_sum_sq"]
+        aggregate.remaining_players = list(data["remaining_players"])
+        aggregate.net_worth = [
+            Counter({int(k): v for k, v in sketch.items()})
+            for sketch in data["net_worth"]
+        ]
+        if data.get("heatmap") is not None:
+            aggregate.heatmap = LandingHeatmap.from_dict(
+                data["heatmap"], aggregate.n_players, aggregate.n_moves
+            )
+        return aggregate
+
+    def n_finished(self):
+        return self.n_games - self.unfinished
+
+    def mean_game_length(self):
+        if self.n_finished() == 0:
+            return None
+        return self.length_sum / self.n_finished()
+
+    def game_length_variance(self):
+        finished = self.n_finished()
+        if finished < 2:
+            return None
+        # integer numerator: exact, however the sums were accumulated
+        numerator = finished * self.length_sum_sq - self.length_sum * self.length_sum
+        return numerator / (finished * (finished - 1))
+
+    def game_length_std(self):
+        variance = self.game_length_variance()
+        return None if variance is None else math.sqrt(variance)
+
+    def censored(self):
+        """Number of games without a winner (they reached the move limit)"""
+        return self.n_games - sum(self.winners)
+
+    def censored_rate(self):
+        """Fraction of the games that reached the move limit"""
+        if self.n_games == 0:
+            return None
+        return self.censored() / self.n_games
+
+    def win_rate_interval(self, seat, z=1.96):
+        """Confidence interval (low, high) of the probability that seat wins,
+        in the games that have a winner (games stopped at n_moves are left
+        out, as in report(); see censored_rate for how many they are)"""
+        n = sum(self.winners)
+        if n == 0:
+            return 0.0, 1.0
+        p = self.winners[seat] / n
+        margin = z * math.sqrt(p * (1 - p) / n)
+        return max(0.0, p - margin), min(1.0, p + margin)
+
+    def experiment_interval(self, seat, z=1.96):
+        """Confidence interval (low, high) of the experiment seat's win rate
+        minus the average win rate of the other (control) seats, in the
+        games that have a winner"""
+        n = sum(self.winners)
+        others = self.n_players - 1
+        if n == 0:
+            return -1 / others, 1.0
+        wins = self.winners[seat]
+        p, q = wins / n, (n - wins) / n
+        # variance of one game's (experiment win - control wins / others)
+        variance = p * (1 - p) + q * (1 - q) / others**2 + 2 * p * q / others
+        margin = z * math.sqrt(variance / n)
+        difference = p - q / others
+        return difference - margin, difference + margin
+
+    def net_worth_quantile(self, seat, q):
+        """Approximate q-quantile of the final score of a seat"""
+        sketch = self.net_worth[seat]
+        total = sum(sketch.values())
+        if total == 0:
+            return None
+        seen = 0
+        for bucket in sorted(sketch):
+            seen += sketch[bucket]
+            if seen >= q * total:
+                # middle of the bucket
+                return bucket * NET_WORTH_BUCKET + NET_WORTH_BUCKET // 2
+        return None
+
+    def report(self):
+        print(f"Winners distribution (A, B, C, D ...) across {self.n_finished()} games that finished:")
+        print(self.winners)
+
+        if self.n_finished() > 0:
+            print(f"Average game length: {self.mean_game_length()} (excluding games that did not finish).")
+        else:
+            print("No games finished.")
+        if self.censored() > 0:
+            print(f"Games without a winner (move limit): {self.censored()} ({self.censored_rate():.1%}).")
+
+        if self.heatmap is not None and self.heatmap.cells.sum() > 0:
+            frequencies = self.heatmap.frequencies()
+            top = sorted(range(len(frequencies)), key=lambda cell: -frequencies[cell])[:5]
+            print("Most landed cells:", ", ".join(f"{cell} ({frequencies[cell]:.2%})" for cell in top))
+
+
+def write_json_atomic(path, data):
+    """Write data as JSON, so that path always holds either the old or the new file"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+# Partial results of a campaign split into shards
+# (each one a slice of the game numbers of the same campaign)
+
+def write_partial(path, aggregate, campaign_seed, n_simulations, game_range, shard):
+    write_json_atomic(
+        path,
+        {
+            "campaign_seed": campaign_seed,
+            "n_simulations": n_simulations,
+            "games": list(game_range),
+            "shard": list(shard),
+            "aggregate": aggregate.to_dict(),
+        },
+    )
+
+
+def read_partial(path):
+    with open(path) as f:
+        partial = json.load(f)
+    partial["aggregate"] = SimulationAggregate.from_dict(partial["aggregate"])
+    return partial
+
+
+def merge_partials(partials):
+    """Merge partials of one campaign, checking they fit together
+
+    Returns the merged aggregate and the list of (start, stop) ranges of
+    game numbers that none of the partials covered.
+    """
+    first = partials[0]
+    merged = SimulationAggregate(first["aggregate"].n_players, first["aggregate"].n_moves)
+    for partial in partials:
+        for key in ("campaign_seed", "n_simulations"):
+            if partial[key] != first[key]:
+                raise ValueError(
+                    f"partials are from different campaigns ({key}: {first[key]} and {partial[key]})"
+                )
+        aggregate = partial["aggregate"]
+        if (aggregate.n_players, aggregate.n_moves) != (merged.n_players, merged.n_moves):
+            raise ValueError("partials were simulated with different n_players or n_moves")
+        merged.merge(aggregate)
+
+    # every game must be counted exactly once
+    missing = []
+    covered = 0
+    for start, stop in sorted(tuple(partial["games"]) for partial in partials):
+        if start < covered:
+            raise ValueError(f"games {start}..{min(stop, covered) - 1} are in more than one partial")
+        if start > covered:
+            missing.append((covered, start))
+        covered = max(covered, stop)
+    if covered < first["n_simulations"]:
+        missing.append((covered, first["n_simulations"]))
+    return merged, missing
@@ -1,16 +1,16 @@
-def analyze_results(results, sim_conf):
-    """Analize results"""
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from .configs import SimulationConfig
 
-    remainingPlayers = [
-        0,
-    ] * sim_conf.n_players
 
-    for result in results:
-        alive = 0
-        for score in result:
-            if score >= 0:
-                alive += 1
-        remainingPlayers[alive - 1] += 1
+def analyze_results(aggregate, sim_conf):
+    """Analize results"""
+
+    # number of games by players left at the end (1, 2, ...)
+    remainingPlayers = aggregate.remaining_players[1:]
 
     if sim_conf.show_rem_players:
         print("Remaining:", remainingPlayers)
@@ -49,16 +49,7 @@ def analyze_data():
             print("Exp result: {:.1%}".format(experiment - control / (nPlayers - 1)))
 
     if writeData == "net_worth":
-        print("graph here")
-        npdata = np.loadtxt("data.txt", dtype=int)
-        print(npdata)
-        x = np.arange(0, max([len(d) for d in npdata]))
-
-        plt.ioff()
-        fig, ax = plt.subplots()
-        for i in range(nPlayers):
-            ax.plot(x, npdata[i], label="1")
-        plt.savefig("fig" + str(time.time()) + ".png")
+        plot_net_worth(SimulationConfig.net_worth_file)
 
     if writeData == "lastTurn":
         npdata = np.transpose(np.loadtxt("data.txt", dtype=int, delimiter="\n"))
@@ -69,3 +60,15 @@ def analyze_data():
         axs.hist(npdata, bins=20)
 
         plt.savefig("fig" + str(time.time()) + ".png")
+
+
+def plot_net_worth(path, game=0):
+    """Plot the net worth history of one game of a net worth file (see SimulationConfig)"""
+    history = np.load(path, mmap_mode="r")[game]
+
+    plt.ioff()
+    fig, ax = plt.subplots()
+    for i in range(history.shape[1]):
+        ax.plot(np.arange(len(history)), history[:, i], label=str(i + 1))
+    ax.legend()
+    plt.savefig("fig" + str(time.time()) + ".png")
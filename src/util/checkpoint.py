@@ -0,0 +1,51 @@
+import json
+
+from .aggregate import SimulationAggregate, write_json_atomic
+
+
+# Completed game numbers are kept as a sorted list of disjoint [start, stop) ranges
+
+def add_range(ranges, start, stop):
+    """Add [start, stop) to sorted disjoint ranges, joining neighbours"""
+    merged = []
+    for range_start, range_stop in sorted(ranges + [[start, stop]]):
+        if merged and range_start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], range_stop)
+        else:
+            merged.append([range_start, range_stop])
+    return merged
+
+
+def missing_ranges(games, ranges):
+    """Parts of games (start, stop) not covered by ranges"""
+    missing = []
+    position, stop = games
+    for range_start, range_stop in ranges:
+        if range_start > position:
+            missing.append((position, min(range_start, stop)))
+        position = max(position, range_stop)
+        if position >= stop:
+            break
+    if position < stop:
+        missing.append((position, stop))
+    return missing
+
+
+def write_checkpoint(path, aggregate, campaign_seed, n_simulations, games, completed):
+    write_json_atomic(
+        path,
+        {
+            "campaign_seed": campaign_seed,
+            "n_simulations": n_simulations,
+            "games": list(games),
+            "completed": completed,
+            "aggregate": aggregate.to_dict(),
+        },
+    )
+
+
+def read_checkpoint(path):
+    with open(path) as f:
+        checkpoint = json.load(f)
+    checkpoint["aggregate"] = SimulationAggregate.from_dict(checkpoint["aggregate"])
+    return checkpoint
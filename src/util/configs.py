@@ -16,7 +16,7 @@ class WriteMode(Enum):
     CELL_HEATMAP = 4  # Cells to land
     LOSERS = 5  # Who lost
     NET_WORTH = 6  # Monetary history of a game
-    REMAINING_PLAYERS = 7
+    REMAINING_PLAYERS = 7  # Players left at the end (counted in SimulationAggregate.remaining_players too)
 
 
 class SimulationConfig(MonopolyConfig):
@@ -24,18 +24,70 @@ class SimulationConfig(MonopolyConfig):
     n_players = 4
     n_moves = 100
     n_simulations = 10 # Total number of games simulated
-    MCTS_simulations = 200 # Number of MCTS simulations does per turn 
+    MCTS_simulations = 200 # Number of MCTS simulations does per turn (None: as many as decision_time allows)
+    # deepest level of an expectiminimax search (levels are decisions and rolls
+    # of the dice); every level more takes several times as long: at 5 a
+    # decision takes up to about half a second, at 7 seconds
+    expectiminimax_depth = 5
+    expectiminimax_table_size = 1 << 16  # transposition table entries of an expectiminimax search (0: none)
+    # Budget of every decision of a search player (None: no limit), whichever
+    # runs out first; the player then takes the best actions found so far.
+    # Expectiminimax searches one level deeper at a time up to expectiminimax_depth,
+    # MCTS plays rollouts up to MCTS_simulations (time is checked between rollouts)
+    decision_time = None  # seconds
+    expectiminimax_nodes = None  # nodes of an expectiminimax search
+    # Processes an expectiminimax decision is searched in (0 or 1: the player's
+    # own), kept between decisions; for one game at a time, e.g. interactively
+    # (games simulated in parallel search in their own process)
+    expectiminimax_workers = 0
     seed = None  
     shuffle_players = True
     real_time = False  # Allow step by step execution via space/enter key
     num_threads = 16
+    # "objects": play games one by one (one_game)
+    # "lockstep": play each block of games at once as NumPy arrays (src/lockstep.py),
+    # rule based and random players only, no game log; results repeat only
+    # for the same seed and the same blocks (chunk_size, num_threads)
+    engine = "objects"
+    # Games each worker simulates per task, sending back only an aggregate
+    # None: split n_simulations evenly into a few tasks per thread (lockstep:
+    # one per thread, of at least lockstep_block games)
+    # 1: send every game result back to the parent
+    chunk_size = None
+    lockstep_block = 2000
+    # Also return every game result from run_simulation (memory grows with n_simulations)
+    keep_results = False
+    # Save progress of run_simulation to this file (None: no checkpoints), see --resume
+    checkpoint_file = None
+    checkpoint_interval = 60  # seconds between checkpoints
+    # Adaptive stopping: stop before n_simulations games once the 95% confidence
+    # interval of the win rate is at most this wide on each side (None: disabled)
+    # The win rate is that of the games with a winner, like in the results;
+    # games stopped at n_moves without one are reported separately
+    target_half_width = None
+    adaptive_metric = "seat"  # "seat": win rate of every seat, "experiment": see below
+    experiment_seat = 0  # "experiment": win rate of this seat minus the others' average
+    min_simulations = 100  # games before the first check
     # reporting settings
     show_progress_bar = True
     show_map = True  # only for 1 game: show final board map
     show_result = True  # only for 1 game: show final money score
     show_rem_players = True
     write_log = False  # write log with game events (log.txt file)
+    log_level = 4  # 1: turns, 2: players' money and moves, 3: every event, 4: details of trades
     write_mode = WriteMode.NET_WORTH
+    # NET_WORTH: .npy file for the net worth history of every game (None: off),
+    # int32 array (games, n_moves + 1, n_players), objects engine only
+    net_worth_file = None
+    # Directory to record every game to, as a binary event stream (None: off)
+    # one events-<pid>.bin file per process, see src/util/events.py to read them
+    # (objects engine only)
+    event_log = None
+    compress_events = False  # zlib compress the events of each game
+    # CELL_HEATMAP: count the cells players land on in every game, summed
+    # into the aggregate (SimulationAggregate.heatmap, objects engine only)
+    heatmap_per_player = False  # also count them by seat
+    heatmap_turn_bucket = None  # also by turns, in buckets of this many turns (None: off)
     
 
 
@@ -61,6 +113,7 @@ class PlayerBehaviourConfig(MonopolyConfig):
 
     build_expensive = False
     build_cheapest = False
+    build_by_rent = False  # build where a house adds the most expected rent per dollar
     refuse_property = ""  # refuse to buy this group
     build_only_three_houses = False
     unspendable_cash = 0  # unspendable money
@@ -81,6 +134,7 @@ class RuleBasedPlayerBehaviourConfig(MonopolyConfig):
 
     build_expensive = False
     build_cheapest = False
+    build_by_rent = False  # build where a house adds the most expected rent per dollar
     refuse_property = ""  # refuse to buy this group
     build_only_three_houses = False
     unspendable_cash = 0  # unspendable money
@@ -101,6 +155,7 @@ class RandomPlayerBehaviourConfig(MonopolyConfig):
 
     build_expensive = False
     build_cheapest = False
+    build_by_rent = False  # build where a house adds the most expected rent per dollar
     refuse_property = ""  # refuse to buy this group
     build_only_three_houses = False
     unspendable_cash = 0  # unspendable money
@@ -121,6 +176,7 @@ class ExpectMiniMaxConfig(MonopolyConfig):
 
     build_expensive = False
     build_cheapest = False
+    build_by_rent = False  # build where a house adds the most expected rent per dollar
     refuse_property = ""  # refuse to buy this group
     build_only_three_houses = False
     unspendable_cash = 0  # unspendable money
@@ -140,6 +196,7 @@ class MCTSPlayerBehaviourConfig(MonopolyConfig):
 
     build_expensive = False
     build_cheapest = False
+    build_by_rent = False  # build where a house adds the most expected rent per dollar
     refuse_property = ""  # refuse to buy this group
     build_only_three_houses = False
     unspendable_cash = 0  # unspendable money
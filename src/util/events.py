@@ -0,0 +1,168 @@
+import glob
+import mmap
+import os
+import struct
+import zlib
+
+import numpy as np
+
+# Binary event stream: what happened in every game, for analysis at scale
+# (SimulationConfig.event_log). One file per process:
+#   header: EVENTS_MAGIC, then 1 byte, 1 if blocks are zlib compressed
+#   blocks, one per game: <u4 number of records> <u4 size in bytes> records
+# Records are fixed width EVENT_DTYPE, see the event kinds below.
+
+EVENTS_MAGIC = b"MONOEV1\n"
+
+EVENT_DTYPE = np.dtype(
+    [
+        ("game", "<u4"),  # game (run) number
+        ("turn", "<u2"),  # 1 for the first turn
+        ("player", "i1"),  # seat (index in board.players) of the player it happened to
+        ("event", "u1"),  # kind, see below
+        ("cell", "i1"),  # -1 if none
+        ("other", "i1"),  # see below, -1 if none
+        ("amount", "<i4"),  # money, see below
+    ]
+)
+
+# kinds of events (other, amount), cell is the plot (or where the player is)
+ROLL = 0  # first die, total of the dice
+MOVE = 1  # -, - (by dice, card or to jail)
+BUY = 2  # -, price
+RENT = 3  # owner, rent paid
+BUILD = 4  # houses after (5: hotel), price
+SELL_HOUSE = 5  # houses after, money received
+MORTGAGE = 6  # -, money received
+UNMORTGAGE = 7  # -, money paid
+TRADE = 8  # previous owner, money the new owner paid for it
+BANKRUPT = 9  # bankrupter (-1: bank), -
+
+EVENT_NAMES = (
+    "roll", "move", "buy", "rent", "build", "sell_house", "mortgage", "unmortgage", "trade", "bankrupt",
+)
+
+_BLOCK_HEADER = struct.Struct("<II")
+
+
+class EventLog:
+    """Writes the event stream of the games of this process to path
+
+    The board calls add() for every event (board.events, None if not recorded);
+    game and turn are set by the game loop, end_game() writes the game out.
+    """
+
+    def __init__(self, path, compress=False):
+        self.compress = compress
+        self.pid = os.getpid()  # process writing it
+        self.game = 0
+        self.turn = 0
+        self.records = []
+        if os.path.exists(path):
+            # adding to the file: keep its compression
+            with open(path, "rb") as f:
+                header = f.read(len(EVENTS_MAGIC) + 1)
+            if header[:-1] != EVENTS_MAGIC:
+                raise ValueError(f"{path} is not an event file")
+            self.compress = bool(header[-1])
+            self.fs = open(path, "ab")
+        else:
+            self.fs = open(path, "ab")
+            self.fs.write(EVENTS_MAGIC + bytes([compress]))
+            self.fs.flush()
+
+    def start_game(self, game):
+        self.game = game
+        self.turn = 0
+        self.records = []
+
+    def add(self, event, player, cell=-1, other=-1, amount=0):
+        self.records.append((self.game, self.turn, player, event, cell, other, amount))
+
+    def end_game(self):
+        data = np.array(self.records, dtype=EVENT_DTYPE).tobytes()
+        if self.compress:
+            data = zlib.compress(data)
+        self.fs.write(_BLOCK_HEADER.pack(len(self.records), len(data)))
+        self.fs.write(data)
+        # whole games only: worker processes may be stopped at any time
+        self.fs.flush()
+        self.records = []
+
+    def close(self):
+        self.fs.close()
+
+
+def event_files(path):
+    """event files of a run: path itself, or the events-*.bin files in directory path"""
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "events-*.bin")))
+    return [path]
+
+
+def iter_event_blocks(path):
+    """Records of each game in an event file, as NumPy record arrays
+
+    The file is memory mapped: uncompressed blocks are views of it,
+    nothing is read until used.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size <= len(EVENTS_MAGIC):
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mm[: len(EVENTS_MAGIC)] != EVENTS_MAGIC:
+        raise ValueError(f"{path} is not an event file")
+    compressed = mm[len(EVENTS_MAGIC)]
+    offset = len(EVENTS_MAGIC) + 1
+    while offset + _BLOCK_HEADER.size <= len(mm):
+        count, size = _BLOCK_HEADER.unpack_from(mm, offset)
+        offset += _BLOCK_HEADER.size
+        if offset + size > len(mm):
+            break  # cut off while it was written
+        if compressed:
+            block = np.frombuffer(zlib.decompress(mm[offset:offset + size]), dtype=EVENT_DTYPE)
+        else:
+            block = np.frombuffer(mm, dtype=EVENT_DTYPE, count=count, offset=offset)
+        offset += size
+        yield block.view(np.recarray)
+
+
+def keep_games(path, ranges):
+    """Drop the games outside the [start, stop) ranges from an event file (or
+    the files of a run directory), e.g. those of the blocks a resumed run
+    simulates again; also drops a game cut off while it was written"""
+    game = struct.Struct("<I")  # first field of a record
+    for name in event_files(path):
+        with open(name, "rb") as f, open(name + ".tmp", "wb") as out:
+            header = f.read(len(EVENTS_MAGIC) + 1)
+            if header[:-1] != EVENTS_MAGIC:
+                raise ValueError(f"{name} is not an event file")
+            compressed = header[-1]
+            out.write(header)
+            while True:
+                block_header = f.read(_BLOCK_HEADER.size)
+                if len(block_header) < _BLOCK_HEADER.size:
+                    break
+                count, size = _BLOCK_HEADER.unpack(block_header)
+                data = f.read(size)
+                if len(data) < size or count == 0:
+                    continue
+                first = zlib.decompressobj().decompress(data, game.size) if compressed else data
+                number = game.unpack_from(first)[0]
+                if any(start <= number < stop for start, stop in ranges):
+                    out.write(block_header + data)
+        os.replace(name + ".tmp", name)
+
+
+def read_events(path):
+    """All the events of a file or a run directory, as one NumPy record array
+
+    e.g. rent paid on the orange group by turn:
+        events = read_events("events")
+        rent = events[(events.event == RENT) & np.isin(events.cell, GROUP_CELLS[3])]
+        np.bincount(rent.turn, weights=rent.amount)
+    """
+    blocks = [block for name in event_files(path) for block in iter_event_blocks(name)]
+    if not blocks:
+        return np.zeros(0, dtype=EVENT_DTYPE).view(np.recarray)
+    return np.concatenate(blocks).view(np.recarray)
@@ -0,0 +1,116 @@
+import math
+
+import numpy as np
+
+from ..layout import N_CELLS
+
+
+class LandingCounter:
+    """Cells landed on in one game (board.landings, None if not counted)
+
+    A landing is counted where a move starts (and where a player goes
+    bankrupt), except the first move of each player: GO, where every player
+    starts the game, is not a landing.
+    Plain lists, so that counting a landing costs a few increments.
+    cells: landings per cell
+    players: per seat, None if not counted
+    turns: per bucket of turn_bucket turns, None if not counted
+    """
+
+    def __init__(self, n_players, n_moves, per_player=False, turn_bucket=None):
+        self.cells = [0] * N_CELLS
+        self.players = [[0] * N_CELLS for _ in range(n_players)] if per_player else None
+        self.turn_bucket = turn_bucket
+        self.turns = None
+        self.bucket = None  # counter of the current turn
+        if turn_bucket is not None:
+            self.turns = [[0] * N_CELLS for _ in range(turn_buckets(n_moves, turn_bucket))]
+            self.bucket = self.turns[0]
+
+    # turn: 1 for the first turn
+    def set_turn(self, turn):
+        if self.turns is not None:
+            self.bucket = self.turns[(turn - 1) // self.turn_bucket]
+
+    def land(self, player, cell):
+        self.cells[cell] += 1
+        if self.players is not None:
+            self.players[player][cell] += 1
+        if self.bucket is not None:
+            self.bucket[cell] += 1
+
+
+def turn_buckets(n_moves, turn_bucket):
+    """number of buckets of turn_bucket turns in a game of n_moves turns"""
+    return math.ceil(n_moves / turn_bucket)
+
+
+class LandingHeatmap:
+    """Landings summed over any number of games, as int64 arrays
+
+    cells: (N_CELLS,)
+    players: (n_players, N_CELLS), None if not counted
+    turns: (buckets, N_CELLS), turns 1..turn_bucket in the first bucket and
+    so on, None if not counted
+    """
+
+    def __init__(self, n_players, n_moves, per_player=False, turn_bucket=None):
+        self.n_players = n_players
+        self.n_moves = n_moves
+        self.per_player = per_player
+        self.turn_bucket = turn_bucket
+        self.cells = np.zeros(N_CELLS, dtype=np.int64)
+        self.players = np.zeros((n_players, N_CELLS), dtype=np.int64) if per_player else None
+        self.turns = None
+        if turn_bucket is not None:
+            self.turns = np.zeros((turn_buckets(n_moves, turn_bucket), N_CELLS), dtype=np.int64)
+
+    def new_game(self):
+        """LandingCounter for one game, to add with add_game"""
+        return LandingCounter(self.n_players, self.n_moves, self.per_player, self.turn_bucket)
+
+    def add_game(self, counter):
+        self.cells += counter.cells
+        if self.players is not None:
+            self.players += counter.players
+        if self.turns is not None:
+            self.turns += counter.turns
+
+    def merge(self, other):
+        if (other.per_player, other.turn_bucket) != (self.per_player, self.turn_bucket):
+            raise ValueError("heatmaps were counted with different per_player or turn_bucket")
+        self.cells += other.cells
+        if self.players is not None:
+            self.players += other.players
+        if self.turns is not None:
+            self.turns += other.turns
+        return self
+
+    def copy(self):
+        return LandingHeatmap(
+            self.n_players, self.n_moves, self.per_player, self.turn_bucket
+        ).merge(self)
+
+    def frequencies(self):
+        """share of the landings on each cell"""
+        total = self.cells.sum()
+        return self.cells / total if total else self.cells.astype(float)
+
+    def to_dict(self):
+        return {
+            "per_player": self.per_player,
+            "turn_bucket": self.turn_bucket,
+            "cells": self.cells.tolist(),
+            "players": None if self.players is None else self.players.tolist(),
+            "turns": None if self.turns is None else self.turns.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data, n_players, n_moves):
+        heatmap = cls(n_players, n_moves, data["per_player"], data["turn_bucket"])
+        heatmap.cells[:] = data["cells"]
+        if heatmap.players is not None:
+            heatmap.players[:] = data["players"]
+        if heatmap.turns is not None:
+            heatmap.turns[:] = data["turns"]
+        return heatmap
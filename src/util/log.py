@@ -1,22 +1,86 @@
+import atexit
+import os
+
+
 class Log:
-    def __init__(self):
+    """Game log (log.txt) and raw data (data.txt, see WriteMode)
+
+    write(text, level, *args): text is formatted with text % args, but only
+    if the line is written at all, i.e. level is at most the log level.
+    Lines are kept in a buffer and appended to the file in one write when it
+    is full, after every game (flush) and on close (also called at exit).
+    The file is opened for appending, so worker processes of a parallel run
+    (which do not run atexit) add whole games to it next to each other.
+    Data lines (write(..., data=True)) go to data.txt the same way.
+    """
+
+    BUFFER_SIZE = 1 << 20
+
+    def __init__(self, level=3):
         for n in ["log.txt", "data.txt"]:
             with open(n, "w") as f:
                 f.write("")
         self.data = []
-        self.fs = open("log.txt", "ab", 0)
+        self.level = level
+        self.fd = os.open("log.txt", os.O_WRONLY | os.O_APPEND)
+        self.data_fd = os.open("data.txt", os.O_WRONLY | os.O_APPEND)
+        self.lines = []
+        self.data_lines = []
+        self.size = 0
+        atexit.register(self.close)
+
+    def flush(self):
+        if self.lines:
+            os.write(self.fd, "".join(self.lines).encode("utf-8"))
+            self.lines = []
+            self.size = 0
+        if self.data_lines:
+            os.write(self.data_fd, "".join(self.data_lines).encode("utf-8"))
+            self.data_lines = []
 
     def close(self):
-        pass
+        if self.fd is not None:
+            self.flush()
+            os.close(self.fd)
+            os.close(self.data_fd)
+            self.fd = None
 
-    def write(self, text, level=0, data=False):
+    def write(self, text, level=0, *args, data=False):
         if data:
             self.data.append(text)
+            self.data_lines.append(text + "\n")
             return
 
+        if level > self.level:
+            return
+        if args:
+            text = text % args
+        line = "\t" * level + text + "\n"
         if level < 2:
-            self.fs.write(bytes("\n" * (2 - level), "utf-8"))
-        self.fs.write(bytes("\t" * level + text + "\n", "utf-8"))
+            line = "\n" * (2 - level) + line
+        self.lines.append(line)
+        self.size += len(line)
+        if self.size >= self.BUFFER_SIZE:
+            self.flush()
 
     def get_data(self):
         return self.data
+
+
+class NullLog:
+    """Log of the games (and tried out moves) that are not logged
+
+    Objects write to their log unconditionally; this one drops everything.
+    """
+
+    def write(self, text, level=0, *args, data=False):
+        pass
+
+    def flush(self):
+        pass
+
+    def get_data(self):
+        return []
+
+
+NULL_LOG = NullLog()
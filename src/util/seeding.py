@@ -0,0 +1,88 @@
+import hashlib
+import random
+
+import numpy as np
+
+
+def new_campaign_seed():
+    """Pick a fresh campaign seed (to be printed, so the run can be repeated)"""
+    return random.SystemRandom().getrandbits(63)
+
+
+def derive_seed(*keys):
+    """Derive an independent 64-bit seed from a tuple of integer keys"""
+    digest = hashlib.blake2b(repr(keys).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class GameRandom:
+    """Random stream of one game, on a NumPy Generator
+
+    Dice and coin flips (randint(1, 6) and randint(0, 1), nearly all of the
+    draws of a game) are generated in blocks and handed out one by one.
+    Other draws go to the generator directly. It has the methods of
+    random.Random the game uses, including getstate/setstate for snapshots.
+    """
+
+    BLOCK = 1024
+
+    def __init__(self, seed=None):
+        self.generator = np.random.Generator(np.random.PCG64(seed))
+        self.dice = []
+        self.dice_pos = 0
+        self.coins = []
+        self.coins_pos = 0
+
+    def randint(self, a, b):
+        if a == 1 and b == 6:
+            if self.dice_pos == len(self.dice):
+                self.dice = self.generator.integers(1, 7, self.BLOCK).tolist()
+                self.dice_pos = 0
+            self.dice_pos += 1
+            return self.dice[self.dice_pos - 1]
+        if a == 0 and b == 1:
+            if self.coins_pos == len(self.coins):
+                self.coins = self.generator.integers(0, 2, self.BLOCK).tolist()
+                self.coins_pos = 0
+            self.coins_pos += 1
+            return self.coins[self.coins_pos - 1]
+        return int(self.generator.integers(a, b + 1))
+
+    def choice(self, seq):
+        return seq[int(self.generator.integers(len(seq)))]
+
+    def shuffle(self, x):
+        x[:] = [x[i] for i in self.generator.permutation(len(x)).tolist()]
+
+    def getrandbits(self, k):
+        return int(self.generator.bit_generator.random_raw()) >> (64 - k)
+
+    # blocks are replaced, never changed, so the state only refers to them
+    def getstate(self):
+        return (
+            self.generator.bit_generator.state,
+            self.dice,
+            self.dice_pos,
+            self.coins,
+            self.coins_pos,
+        )
+
+    def setstate(self, state):
+        bit_generator_state, self.dice, self.dice_pos, self.coins, self.coins_pos = state
+        self.generator.bit_generator.state = bit_generator_state
+
+
+def game_rng(campaign_seed, game_index):
+    """Random stream of one game, identified by (campaign_seed, game_index)
+
+    The stream depends on nothing else, so any game of a campaign can be
+    re-run on its own (in any process, on any machine) with the same result.
+    """
+    if campaign_seed is None:
+        return GameRandom()
+    return GameRandom(derive_seed(campaign_seed, game_index))
+
+
+def spawn_rng(rng, key):
+    """Child random stream, e.g. for a search rollout of the game using rng"""
+    return GameRandom(derive_seed(rng.getrandbits(64), key))
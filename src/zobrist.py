@@ -0,0 +1,72 @@
+import random
+
+from .layout import N_CELLS
+
+# Zobrist keys of game states, for the transposition table of the search
+# players (expectiminimax.py)
+#
+# Every value of every feature of the state has a random 64-bit number, the
+# key of a state is the XOR of the numbers of its values: changing one value
+# changes the key with two XORs. Board.zobrist keeps the key of the plots
+# (owners, houses, mortgages) up to date that way, state_key adds the players:
+# everything of theirs the rules look at, except the exact money.
+# The number of the value a new game starts with is 0 (nobody owns a plot,
+# no houses...), so an empty board has key 0.
+
+MAX_PLAYERS = 26  # players are named by letters
+# money is hashed in buckets, everything above the last bucket in it
+MONEY_BUCKET = 100
+MONEY_BUCKETS = 64
+
+# fixed seed: the keys are the same in every process
+_rng = random.Random(0x2B992DDFA23249D6)
+
+
+def _keys(n, first_zero=True):
+    return tuple(0 if first_zero and i == 0 else _rng.getrandbits(64) for i in range(n))
+
+
+OWNER = tuple(_keys(MAX_PLAYERS + 1) for cell in range(N_CELLS))  # by owner id + 1
+HOUSES = tuple(_keys(6) for cell in range(N_CELLS))
+MORTGAGED = _keys(N_CELLS, first_zero=False)  # in the key while mortgaged
+POSITION = tuple(_keys(N_CELLS) for player in range(MAX_PLAYERS))
+MONEY = tuple(_keys(MONEY_BUCKETS) for player in range(MAX_PLAYERS))
+JAIL = tuple(_keys(4) for player in range(MAX_PLAYERS))  # 0: free, 1 + days in jail (0-2)
+BANKRUPT = _keys(MAX_PLAYERS, first_zero=False)
+# player to move, at a decision (0) or a roll of the dice (1)
+TO_MOVE = tuple(_keys(2, first_zero=False) for player in range(MAX_PLAYERS))
+# Get Out Of Jail Free cards, in the key while held: Chance, Community Chest
+JAIL_CARDS = tuple(_keys(2, first_zero=False) for player in range(MAX_PLAYERS))
+DOUBLES = tuple(_keys(3) for player in range(MAX_PLAYERS))  # doubles rolled in a row (0-2)
+# turns played, as far as advanced_jail_strat tells them apart: up to 20, to 39, 40 on
+TURNS = tuple(_keys(3) for player in range(MAX_PLAYERS))
+
+
+def plots_key(board):
+    """key of the plots of board, from scratch (Board.zobrist keeps it up to date)"""
+    key = 0
+    for i in range(N_CELLS):
+        key ^= OWNER[i][board.owner_id[i] + 1] ^ HOUSES[i][board.houses[i]]
+        if board.mortgaged[i]:
+            key ^= MORTGAGED[i]
+    return key
+
+
+def state_key(board, player, chance=False):
+    """key of the state of the game with player to move (at a roll of the dice if chance)"""
+    key = board.zobrist ^ TO_MOVE[player.index][chance]
+    for other in board.players:
+        i = other.index
+        if other.is_bankrupt:
+            key ^= BANKRUPT[i]
+            continue
+        bucket = min(max(other.money, 0) // MONEY_BUCKET, MONEY_BUCKETS - 1)
+        jail = 1 + other.days_in_jail if other.in_jail else 0
+        turns = 0 if other.turns <= 20 else 1 if other.turns < 40 else 2
+        key ^= POSITION[i][other.position] ^ MONEY[i][bucket] ^ JAIL[i][jail]
+        key ^= DOUBLES[i][other.consequent_doubles] ^ TURNS[i][turns]
+        if other.has_jail_card_chance:
+            key ^= JAIL_CARDS[i][0]
+        if other.has_jail_card_community:
+            key ^= JAIL_CARDS[i][1]
+    return key
@@ -0,0 +1,48 @@
+"""Time of a game with the lockstep engine and with the default one
+
+python tests/benchmark_lockstep.py [n_games] [n_moves ...]
+
+Plays the same games (seed 3) in one process with both engines, for each
+n_moves (100 by default), and prints the time per game. Not a test:
+timings depend on the machine and what else runs on it.
+"""
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def load_simulator():
+    spec = importlib.util.spec_from_file_location("monopoly_simulator", os.path.join(ROOT, "monopoly-simulator.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def seconds_per_game(sim, engine, n_games, n_moves):
+    conf = sim.sim_conf
+    conf.engine = engine
+    conf.n_simulations = n_games
+    conf.n_moves = n_moves
+    start = time.perf_counter()
+    sim.run_simulation()
+    return (time.perf_counter() - start) / n_games
+
+
+if __name__ == "__main__":
+    n_games = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    moves = [int(x) for x in sys.argv[2:]] or [100]
+    os.chdir(tempfile.mkdtemp())
+    sim = load_simulator()
+    sim.sim_conf.show_progress_bar = False
+    sim.sim_conf.seed = 3
+    sim.player_behaviours = lambda: [sim.RuleBasedPlayerBehaviourConfig(0), sim.PlayerBehaviourConfig(0)] * 2
+    for n_moves in moves:
+        objects = seconds_per_game(sim, "objects", n_games, n_moves)
+        lockstep = seconds_per_game(sim, "lockstep", n_games, n_moves)
+        print(f"n_moves {n_moves}: objects {objects * 1000:.2f} ms/game, "
+              f"lockstep {lockstep * 1000:.2f} ms/game ({objects / lockstep:.2f}x)")
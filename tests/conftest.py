@@ -0,0 +1,19 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def sim(tmp_path, monkeypatch):
+    """monopoly-simulator.py, freshly loaded, running in tmp_path"""
+    monkeypatch.chdir(tmp_path)
+    spec = importlib.util.spec_from_file_location("monopoly_simulator", os.path.join(ROOT, "monopoly-simulator.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.sim_conf.show_progress_bar = False
+    return module
@@ -0,0 +1,35 @@
+from src.util.aggregate import SimulationAggregate
+
+
+def aggregate_of(winners, censored):
+    aggregate = SimulationAggregate(len(winners), 100)
+    aggregate.winners = list(winners)
+    aggregate.n_games = sum(winners) + censored
+    aggregate.unfinished = censored
+    return aggregate
+
+
+def half_width(interval):
+    low, high = interval
+    return (high - low) / 2
+
+
+def test_intervals_narrow_with_games_despite_censored_games():
+    """games stopped at n_moves (1 in 6 here) do not hold the intervals open"""
+    widths = []
+    for scale in (1, 100):
+        aggregate = aggregate_of([210 * scale, 210 * scale, 190 * scale, 190 * scale], 160 * scale)
+        assert aggregate.censored_rate() == 1 / 6
+        widths.append((half_width(aggregate.win_rate_interval(0)), half_width(aggregate.experiment_interval(0))))
+    (seat, experiment), (seat_100, experiment_100) = widths
+    # 100 times the games: a tenth of the width
+    assert abs(seat_100 * 10 - seat) < 1e-12 and abs(experiment_100 * 10 - experiment) < 1e-12
+    assert seat_100 < 0.01 and experiment_100 < 0.01
+
+
+def test_win_rate_of_finished_games():
+    aggregate = aggregate_of([300, 100, 100, 100], 400)
+    low, high = aggregate.win_rate_interval(0)
+    assert low < 0.5 < high
+    low, high = aggregate.experiment_interval(0)
+    assert low < 0.5 - 0.5 / 3 < high
@@ -0,0 +1,12 @@
+def test_heatmap_leaves_out_the_start_on_go(sim, monkeypatch):
+    """in one-turn games almost every landing would be GO if starts counted"""
+    conf = sim.sim_conf
+    conf.write_mode = sim.WriteMode.CELL_HEATMAP
+    conf.n_simulations = 50
+    conf.n_moves = 1
+    conf.seed = 5
+    monkeypatch.setattr(sim, "player_behaviours", lambda: [sim.RuleBasedPlayerBehaviourConfig(0)] * conf.n_players)
+    heatmap = sim.run_simulation().heatmap
+    # only the moves after a double are counted, GO only through a card
+    assert heatmap.cells.sum() < conf.n_simulations * conf.n_players
+    assert heatmap.cells[0] <= 2
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from src import Board, Player
+from src.lockstep import LockstepGames
+from src.util.configs import GameRulesConfig, PlayerBehaviourConfig, SimulationConfig
+
+# orange, red and dark blue
+PLOTS = [16, 18, 19, 21, 23, 24, 37, 39]
+
+
+def by_rent():
+    behaviour = PlayerBehaviourConfig(0)
+    behaviour.build_by_rent = True
+    return behaviour
+
+
+def board_houses(money):
+    """houses build_by_rent players build with money, on Board"""
+    behaviours = [by_rent(), PlayerBehaviourConfig(1)]
+    players = [Player(f"pl{i}", 1500, b, SimulationConfig(), False, None) for i, b in enumerate(behaviours)]
+    board = Board(players, GameRulesConfig(), False, None)
+    player = players[0]
+    for i in PLOTS:
+        board.setOwner(i, 0)
+    board.recalculateAfterPropertyChange()
+    player.money = money
+    while board.improveProperty(player, board, player.money - player.cash_limit):
+        pass
+    return [board.houses[i] for i in PLOTS]
+
+
+def lockstep_houses(money):
+    games = LockstepGames(1, [by_rent(), PlayerBehaviourConfig(1)], GameRulesConfig(), np.random.default_rng(0))
+    games.owner[0, PLOTS] = 0
+    games.count_owned(np.array([0]))
+    games.money[0, 0] = money
+    games.build(np.array([0]), 0)
+    return games.houses[0, PLOTS].tolist()
+
+
+@pytest.mark.parametrize("money", [150, 700, 1500, 4000])
+def test_lockstep_builds_by_rent_like_board(money):
+    assert lockstep_houses(money) == board_houses(money)
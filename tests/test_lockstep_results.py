@@ -0,0 +1,46 @@
+import hashlib
+
+import numpy as np
+import pytest
+
+from src.lockstep import LockstepGames
+from src.util.configs import (
+    GameRulesConfig, PlayerBehaviourConfig, RandomPlayerBehaviourConfig, RuleBasedPlayerBehaviourConfig,
+)
+
+
+def cheap():
+    behaviour = PlayerBehaviourConfig(0)
+    behaviour.build_cheapest = True
+    behaviour.unspendable_cash = 200
+    return behaviour
+
+
+PLAYERS = {
+    "mixed": lambda: [PlayerBehaviourConfig(0), RandomPlayerBehaviourConfig(0),
+                      RandomPlayerBehaviourConfig(0), RuleBasedPlayerBehaviourConfig(0)],
+    "rules": lambda: [RuleBasedPlayerBehaviourConfig(0), PlayerBehaviourConfig(0)] * 2,
+    "cheap": lambda: [cheap(), RandomPlayerBehaviourConfig(0), PlayerBehaviourConfig(0)],
+}
+
+# final money and last turns of 100 games (seed 3, 100 moves), as played by
+# the engine before ownership was counted incrementally and trades were
+# looked for by group (count_owned, trade_lists)
+RESULTS = {
+    "mixed": "37205b8f37d723dbc202410a52b74b87",
+    "rules": "76375d25263eb822b992f688395d37a6",
+    "cheap": "7ff15b021c3bc92c6f16c04304f76378",
+}
+
+
+@pytest.mark.parametrize("players", sorted(PLAYERS))
+def test_lockstep_results_do_not_change(players):
+    games = LockstepGames(100, PLAYERS[players](), GameRulesConfig(), np.random.default_rng(3))
+    money, last_turns = games.play(100)
+    assert hashlib.md5(money.tobytes() + last_turns.tobytes()).hexdigest() == RESULTS[players]
+
+    # the counts kept up to date on the way are those of the final owners
+    owned_in_group, group_owner = games.owned_in_group.copy(), games.group_owner.copy()
+    games.count_owned(np.arange(games.n_games))
+    assert (games.owned_in_group == owned_in_group).all()
+    assert (games.group_owner == group_owner).all()
@@ -0,0 +1,36 @@
+import pytest
+
+from src.util.events import event_files, iter_event_blocks
+
+
+def recorded_games(path):
+    """game number of every block of the event files, one block per game"""
+    return sorted(int(block.game[0]) for name in event_files(path) for block in iter_event_blocks(name))
+
+
+def test_resumed_run_records_every_game_once(sim, tmp_path, monkeypatch):
+    conf = sim.sim_conf
+    conf.n_simulations = 40
+    conf.chunk_size = 5
+    conf.seed = 7
+    conf.event_log = str(tmp_path / "events")
+    monkeypatch.setattr(sim, "player_behaviours", lambda: [sim.RuleBasedPlayerBehaviourConfig(0)] * conf.n_players)
+    checkpoint = str(tmp_path / "checkpoint.json")
+
+    # interrupted in the middle of the block of games 20..24
+    one_game = sim.one_game
+
+    def interrupted(run_number, *args, **kwargs):
+        if run_number == 23:
+            raise KeyboardInterrupt
+        return one_game(run_number, *args, **kwargs)
+
+    monkeypatch.setattr(sim, "one_game", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        sim.run_simulation(checkpoint=checkpoint)
+    assert recorded_games(conf.event_log) == list(range(23))
+
+    monkeypatch.setattr(sim, "one_game", one_game)
+    aggregate = sim.run_simulation(checkpoint=checkpoint, resume=True)
+    assert aggregate.n_games == 40
+    assert recorded_games(conf.event_log) == list(range(40))
@@ -0,0 +1,37 @@
+from src import Board, Player
+from src.expectiminimax import ExpectiMiniMaxSearch
+from src.util.configs import ExpectMiniMaxConfig, GameRulesConfig, SimulationConfig
+from src.util.seeding import GameRandom
+
+# plots of the two players; the search player can repay, build and trade
+PLOTS = [[1, 3, 6, 9, 11, 12, 13, 14, 21, 26, 32], [8, 15, 18, 25, 27, 28, 29, 35, 39]]
+MORTGAGED = [11, 15, 25]
+
+
+def search(workers):
+    """value and actions of the decision of the first player"""
+    sim_conf = SimulationConfig()
+    sim_conf.expectiminimax_depth = 3
+    sim_conf.expectiminimax_workers = workers
+    # (the table tells positions apart only roughly, and the parallel search
+    # goes through them in another order)
+    sim_conf.expectiminimax_table_size = 0
+    players = [Player(f"pl{i}", 1500, ExpectMiniMaxConfig(i), sim_conf, False, None) for i in range(2)]
+    board = Board(players, GameRulesConfig(), False, None, GameRandom(1))
+    for owner, plots in enumerate(PLOTS):
+        for i in plots:
+            board.setOwner(i, owner)
+    board.recalculateAfterPropertyChange()
+    for i in MORTGAGED:
+        board.b[i].mortgage(players[board.owner_id[i]], board)
+    players[0].money = 1495
+    players[1].money = 666
+    players[0].position = 4
+    return ExpectiMiniMaxSearch(None, 0, board, players[0])
+
+
+def test_root_parallel_search_is_the_serial_search():
+    serial_value, serial_actions = search(0)
+    value, actions = search(2)
+    assert value == serial_value
+    assert sorted(actions) == sorted(serial_actions)
@@ -0,0 +1,14 @@
+import sys
+
+import pytest
+
+
+def test_shard_rejects_adaptive_stopping(sim, monkeypatch):
+    """a shard stopped early would be silently short in the merge"""
+    monkeypatch.setattr(sim.sim_conf, "target_half_width", 0.02)
+    monkeypatch.setattr(sys, "argv", ["monopoly-simulator.py", "--seed", "1", "--shard", "1/2"])
+    with pytest.raises(SystemExit):
+        sim.parse_args()
+
+    monkeypatch.setattr(sim.sim_conf, "target_half_width", None)
+    assert sim.parse_args().shard == (1, 2)
@@ -0,0 +1,42 @@
+import pytest
+
+from src import Board, Player
+from src.util.configs import GameRulesConfig, PlayerBehaviourConfig, SimulationConfig
+from src.zobrist import state_key
+
+
+@pytest.fixture
+def board():
+    players = [Player(f"pl{i}", 1500, PlayerBehaviourConfig(i), SimulationConfig(), False, None) for i in range(2)]
+    return Board(players, GameRulesConfig(), False, None)
+
+
+# (attribute, values) of a player that the rules tell apart
+FEATURES = [
+    ("position", [0, 5, 39]),
+    ("money", [0, 150, 1500]),
+    ("has_jail_card_chance", [False, True]),
+    ("has_jail_card_community", [False, True]),
+    ("consequent_doubles", [0, 1, 2]),
+    ("turns", [0, 21, 40]),
+]
+
+
+@pytest.mark.parametrize("attribute, values", FEATURES)
+def test_state_key_tells_player_states_apart(board, attribute, values):
+    player = board.players[1]
+    keys = set()
+    for value in values:
+        setattr(player, attribute, value)
+        keys.add(state_key(board, board.players[0]))
+    assert len(keys) == len(values)
+
+
+def test_state_key_tells_days_in_jail_apart(board):
+    player = board.players[1]
+    keys = {state_key(board, board.players[0])}
+    player.in_jail = True
+    for days in range(3):
+        player.days_in_jail = days
+        keys.add(state_key(board, board.players[0]))
+    assert len(keys) == 4